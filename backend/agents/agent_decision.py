@@ -6,20 +6,30 @@ It dynamically routes user queries to the appropriate agent based on content and
 """
 
 import json
-from typing import Dict, List, Optional, Any, Literal, TypedDict, Union, Annotated
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Literal, TypedDict, Union, Annotated, Iterator
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage, RemoveMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from langgraph.graph import MessagesState, StateGraph, END
 import os, getpass
 from dotenv import load_dotenv
-from agents.rag_agent import MedicalRAG
+from agents.rag_agent import RAGService
+from agents.rag_agent.semantic_cache import get_semantic_cache
 from agents.web_search_processor_agent import WebSearchProcessorAgent
 from agents.image_analysis_agent import ImageAnalysisAgent
 from agents.guardrails.local_guardrails import LocalGuardrails
-
-from langgraph.checkpoint.memory import MemorySaver
+from agents.session_manager import SessionThreadManager
+from agents.checkpoint_store import create_checkpoint_store
+from agents.language_detection import detect_language_locally
+from agents.translation_cache import TranslationCache
+from agents.fast_router import FastRouter
+from agents.http_pool import get_http_pool
+from agents.streaming import ANSWER_STREAM_TAG, SentenceChunker
 
 import cv2
 import numpy as np
@@ -31,11 +41,62 @@ load_dotenv()
 # Load configuration
 config = Config()
 
-# Initialize memory
-memory = MemorySaver()
-
-# Specify a thread
-thread_config = {"configurable": {"thread_id": "1"}}
+# Initialize memory (in-memory or disk-backed, see SessionConfig)
+checkpoint_store = create_checkpoint_store(config)
+memory = checkpoint_store.checkpointer
+
+# Map each API session to its own conversation thread
+session_manager = SessionThreadManager(checkpoint_store, config)
+
+# RAG models are loaded once per process and shared by all requests
+rag_service = RAGService(config)
+
+# Resolves unambiguous routing decisions without the decision LLM
+fast_router = FastRouter(config)
+
+# Workers for the concurrent input guardrail / image analysis / routing preflight
+preflight_executor = ThreadPoolExecutor(max_workers=config.agent_decision.preflight_workers, thread_name_prefix="preflight")
+
+# Workers that guardrail and translate streamed answer chunks while the answer is being generated
+stream_executor = ThreadPoolExecutor(max_workers=config.conversation.stream_workers, thread_name_prefix="stream")
+stream_guardrails = LocalGuardrails(config.rag.llm)
+
+# Translations shared across turns and sessions, persisted per model deployment
+translation_cache = TranslationCache(
+    max_entries=config.conversation.translation_cache_size,
+    db_path=config.conversation.translation_cache_path,
+    namespace=getattr(config.conversation.llm, "deployment_name", None) or ""
+)
+
+# Fixed responses translated on many requests, pre-warmed into the translation cache at startup
+NO_BRAIN_MRI_TEXT = "No image was provided for analysis. Please upload a brain MRI image."
+CHEST_XRAY_POSITIVE_TEXT = "The analysis of the uploaded chest X-ray image indicates a **POSITIVE** result for **COVID-19**."
+CHEST_XRAY_NEGATIVE_TEXT = "The analysis of the uploaded chest X-ray image indicates a **NEGATIVE** result for **COVID-19**, i.e., **NORMAL**."
+UNCLEAR_IMAGE_TEXT = "The uploaded image is not clear enough to make a diagnosis / the image is not a medical image."
+SKIN_LESION_SEGMENTED_TEXT = "Following is the analyzed **segmented** output of the uploaded skin lesion image:"
+VALIDATION_REJECTED_TEXT = "The previous medical analysis requires further review. A healthcare professional has flagged potential inaccuracies."
+HUMAN_VALIDATION_TEXT = "\n\n**Human Validation Required:**\n- If you're a healthcare professional: Please validate the output. Select **Yes** or **No**. If No, provide comments.\n- If you're a patient: Simply click Yes to confirm."
+
+TRANSLATION_TEMPLATES = [
+    NO_BRAIN_MRI_TEXT,
+    CHEST_XRAY_POSITIVE_TEXT,
+    CHEST_XRAY_NEGATIVE_TEXT,
+    UNCLEAR_IMAGE_TEXT,
+    SKIN_LESION_SEGMENTED_TEXT,
+    VALIDATION_REJECTED_TEXT,
+]
+
+# Vision results that are always followed by the human validation prompt
+VALIDATED_TEMPLATES = [
+    CHEST_XRAY_POSITIVE_TEXT,
+    CHEST_XRAY_NEGATIVE_TEXT,
+    UNCLEAR_IMAGE_TEXT,
+    SKIN_LESION_SEGMENTED_TEXT,
+]
+
+# Process-level registry for the compiled agent graph (built once, reused by every request)
+_graph_lock = threading.Lock()
+_compiled_graph = None
 
 
 # Agent that takes the decision of routing the request further to correct task specific agent
@@ -83,7 +144,12 @@ class AgentConfig:
 
 
 class AgentState(MessagesState):
-    """State maintained across the workflow."""
+    """
+    State maintained across the workflow.
+
+    Messages are stored in English, the language the agents work in; answers are translated
+    to the user's language only when they are returned (see process_query and stream_query).
+    """
     # messages: List[BaseMessage]  # Conversation history
     agent_name: Optional[str]  # Current active agent
     current_input: Optional[Union[str, Dict]]  # Input to be processed
@@ -95,6 +161,9 @@ class AgentState(MessagesState):
     bypass_routing: bool  # Flag to bypass agent routing for guardrails
     insufficient_info: bool  # Flag indicating RAG response has insufficient information
     input_lang: str  # Detected language of the input
+    routing_decision: Optional[Dict]  # Routing decision computed concurrently with the input guardrails
+    streaming: bool  # Whether the answer is streamed to the user (see stream_query)
+    deferred_output: bool  # Output guardrails are left to the streaming caller
 
 
 class AgentDecision(TypedDict):
@@ -104,6 +173,13 @@ class AgentDecision(TypedDict):
     confidence: float
 
 
+class NormalizedQuery(TypedDict):
+    """Output structure for the query normalization stage."""
+    language: str
+    translation: str
+    rewritten_query: str
+
+
 def create_agent_graph():
     """Create and configure the LangGraph for agent orchestration."""
 
@@ -124,6 +200,49 @@ def create_agent_graph():
     
     # Create the decision chain
     decision_chain = decision_prompt | decision_model | json_parser
+
+    def decide_agent(messages: List[BaseMessage], input_text: str, has_image: bool, image_type: Optional[str]) -> Dict:
+        """Decide which agent should handle the query, asking the decision model only for ambiguous queries."""
+        # Forced or high-similarity cases are resolved locally
+        fast_decision = fast_router.route(input_text, has_image, image_type)
+        if fast_decision is not None:
+            return fast_decision
+
+        # Create context from recent conversation history (last 3 messages)
+        recent_context = ""
+        for msg in messages[-6:]:  # Get last 3 exchanges (6 messages)  # Not provided control from config
+            if isinstance(msg, HumanMessage):
+                recent_context += f"User: {msg.content}\n"
+            elif isinstance(msg, AIMessage):
+                recent_context += f"Assistant: {msg.content}\n"
+        
+        # Combine everything for the decision input
+        decision_input = f"""
+        User query: {input_text}
+
+        Recent conversation context:
+        {recent_context}
+
+        Has image: {has_image}
+        Image type: {image_type if has_image else 'None'}
+
+        Based on this information, which agent should handle this query?
+        """
+        
+        # Make the decision
+        decision = decision_chain.invoke({"input": decision_input})
+        fast_router.record("llm", decision.get("agent"))
+        return decision
+
+    def classify_and_route(messages: List[BaseMessage], input_text: str, image_path: Optional[str]) -> tuple:
+        """Classify the uploaded image (if any), then decide on the agent."""
+        image_type = None
+        if image_path:
+            image_type_response = AgentConfig.image_analyzer.analyze_image(image_path)
+            image_type = image_type_response['image_type']
+            print("ANALYZED IMAGE TYPE: ", image_type)
+        decision = decide_agent(messages, input_text, image_path is not None, image_type)
+        return image_type, decision
     
     # Define graph state transformations
     def analyze_input(state: AgentState) -> AgentState:
@@ -131,6 +250,7 @@ def create_agent_graph():
         current_input = state["current_input"]
         has_image = False
         image_type = None
+        routing_decision = None
         
         # Get the text from the input
         input_text = ""
@@ -139,22 +259,29 @@ def create_agent_graph():
         elif isinstance(current_input, dict):
             input_text = current_input.get("text", "")
         
-        # Detect language of user input
-        input_lang = 'vi'  # Default to Vietnamese
-        if input_text:
-            input_lang = detect_language(input_text)
+        # Language was already detected while normalizing the query
+        input_lang = state.get("input_lang", "vi")
+
+        image_path = None
+        if isinstance(current_input, dict) and "image" in current_input:
+            has_image = True
+            image_path = current_input.get("image", None)
+
+        # Optimistically classify the image and route while the input guardrails run,
+        # the result is discarded if the guardrails block the input
+        routing_future = None
+        if config.agent_decision.concurrent_preflight and input_text:
+            routing_future = preflight_executor.submit(classify_and_route, state["messages"], input_text, image_path)
         
         # Check input through guardrails if text is present
         if input_text:
             is_allowed, message = guardrails.check_input(input_text)
             if not is_allowed:
+                if routing_future is not None:
+                    routing_future.cancel()
                 # If input is blocked, return early with guardrail message
                 print(f"Selected agent: INPUT GUARDRAILS, Message: ", message)
                 
-                # Translate the guardrail message if needed
-                if input_lang != 'en':
-                    message = translate_text(message, input_lang)
-                
                 return {
                     **state,
                     "messages": message,
@@ -165,10 +292,16 @@ def create_agent_graph():
                     "input_lang": input_lang  # Store the detected language
                 }
         
+        if routing_future is not None:
+            try:
+                image_type, routing_decision = routing_future.result()
+            except Exception as e:
+                # Fall back to the sequential path below and in route_to_agent
+                print(f"Concurrent routing failed, retrying sequentially: {e}")
+                routing_future = None
+
         # Original image processing code
-        if isinstance(current_input, dict) and "image" in current_input:
-            has_image = True
-            image_path = current_input.get("image", None)
+        if routing_future is None and has_image:
             image_type_response = AgentConfig.image_analyzer.analyze_image(image_path)
             image_type = image_type_response['image_type']
             print("ANALYZED IMAGE TYPE: ", image_type)
@@ -178,7 +311,8 @@ def create_agent_graph():
             "has_image": has_image,
             "image_type": image_type,
             "bypass_routing": False,  # Explicitly set to False for normal flow
-            "input_lang": input_lang  # Store the detected language
+            "input_lang": input_lang,  # Store the detected language
+            "routing_decision": routing_decision
         }
     
     def check_if_bypassing(state: AgentState) -> str:
@@ -201,29 +335,10 @@ def create_agent_graph():
         elif isinstance(current_input, dict):
             input_text = current_input.get("text", "")
         
-        # Create context from recent conversation history (last 3 messages)
-        recent_context = ""
-        for msg in messages[-6:]:  # Get last 3 exchanges (6 messages)  # Not provided control from config
-            if isinstance(msg, HumanMessage):
-                recent_context += f"User: {msg.content}\n"
-            elif isinstance(msg, AIMessage):
-                recent_context += f"Assistant: {msg.content}\n"
-        
-        # Combine everything for the decision input
-        decision_input = f"""
-        User query: {input_text}
-
-        Recent conversation context:
-        {recent_context}
-
-        Has image: {has_image}
-        Image type: {image_type if has_image else 'None'}
-
-        Based on this information, which agent should handle this query?
-        """
-        
-        # Make the decision
-        decision = decision_chain.invoke({"input": decision_input})
+        # Reuse the decision made concurrently with the input guardrails if there is one
+        decision = state.get("routing_decision")
+        if decision is None:
+            decision = decide_agent(messages, input_text, has_image, image_type)
 
         # Decided agent
         print(f"Decision: {decision['agent']}")
@@ -249,9 +364,6 @@ def create_agent_graph():
         messages = state["messages"]
         current_input = state["current_input"]
         
-        # Get input language from state
-        input_lang = state.get("input_lang", "vi")
-        
         # Get query text
         input_text = ""
         if isinstance(current_input, str):
@@ -325,11 +437,7 @@ def create_agent_graph():
 
         # print("Conversation Prompt:", conversation_prompt)
 
-        response = config.conversation.llm.invoke(conversation_prompt)
-
-        # Translate response if needed
-        if input_lang != 'en':
-            response.content = translate_text(response.content, input_lang)
+        response = config.conversation.llm.invoke(conversation_prompt, config={"tags": [ANSWER_STREAM_TAG]})
 
         # print("Conversation respone:", response)
 
@@ -338,24 +446,21 @@ def create_agent_graph():
         return {
             **state,
             "output": response,
-            "agent_name": "CONVERSATION_AGENT"
+            "agent_name": "CONVERSATION_AGENT",
+            "deferred_output": state.get("streaming", False)
         }
     
     def run_rag_agent(state: AgentState) -> AgentState:
         """Handle medical knowledge queries using RAG."""
-        # Initialize the RAG agent
-
         print(f"Selected agent: RAG_AGENT")
 
-        rag_agent = MedicalRAG(config)
+        # Shared RAG agent (models are loaded once per process)
+        rag_agent = rag_service.get()
         
         messages = state["messages"]
         query = state["current_input"]
         rag_context_limit = config.rag.context_limit
 
-        # Get input language from state
-        input_lang = state.get("input_lang", "vi")
-
         recent_context = ""
         for msg in messages[-rag_context_limit:]:# limit controlled from config
             if isinstance(msg, HumanMessage):
@@ -402,10 +507,6 @@ def create_agent_graph():
 
         print(f"Insufficient info flag set to: {insufficient_info}")
 
-        # Translate response if needed
-        if input_lang != 'en' and isinstance(response_text, str):
-            response_text = translate_text(response_text, input_lang)
-
         # Store RAG output ONLY if confidence is high
         if retrieval_confidence >= config.rag.min_retrieval_confidence:
             # response_output = response["response"]
@@ -419,7 +520,8 @@ def create_agent_graph():
             "needs_human_validation": False,  # Assuming no validation needed for RAG responses
             "retrieval_confidence": retrieval_confidence,
             "agent_name": "RAG_AGENT",
-            "insufficient_info": insufficient_info
+            "insufficient_info": insufficient_info,
+            "deferred_output": state.get("streaming", False)
         }
 
     # Web Search Processor Node
@@ -432,9 +534,6 @@ def create_agent_graph():
         messages = state["messages"]
         web_search_context_limit = config.web_search.context_limit
 
-        # Get input language from state
-        input_lang = state.get("input_lang", "vi")
-
         recent_context = ""
         for msg in messages[-web_search_context_limit:]: # limit controlled from config
             if isinstance(msg, HumanMessage):
@@ -447,10 +546,6 @@ def create_agent_graph():
         web_search_processor = WebSearchProcessorAgent(config)
 
         processed_response = web_search_processor.process_web_search_results(query=state["current_input"], chat_history=recent_context)
-
-        # Translate response if needed
-        if input_lang != 'en':
-            processed_response.content = translate_text(processed_response.content, input_lang)
         
         if state['agent_name'] != None:
             involved_agents = f"{state['agent_name']}, WEB_SEARCH_PROCESSOR_AGENT"
@@ -462,7 +557,8 @@ def create_agent_graph():
             **state,
             # "output": "This would be handled by the web search agent, finding the latest information.",
             "output": processed_response,
-            "agent_name": involved_agents
+            "agent_name": involved_agents,
+            "deferred_output": state.get("streaming", False)
         }
 
     # Define Routing Logic
@@ -487,13 +583,8 @@ def create_agent_graph():
         current_input = state["current_input"]
         image_path = current_input.get("image", None)
 
-        # Get input language from state
-        input_lang = state.get("input_lang", "vi")
-
         if not image_path:
-            response_text = "No image was provided for analysis. Please upload a brain MRI image."
-            if input_lang != 'en':
-                response_text = translate_text(response_text, input_lang)
+            response_text = NO_BRAIN_MRI_TEXT
             response = AIMessage(content=response_text)
             return {
                 **state,
@@ -513,8 +604,6 @@ def create_agent_graph():
             # Check if there was an error in analysis
             if 'error' in analysis_results:
                 response_text = f"Error analyzing the image: {analysis_results['error']}"
-                if input_lang != 'en':
-                    response_text = translate_text(response_text, input_lang)
                 response = AIMessage(content=response_text)
                 return {
                     **state,
@@ -549,10 +638,6 @@ def create_agent_graph():
 
 ⚠️ **Important Note**: This is an AI-assisted analysis. Please consult with a medical professional for proper diagnosis and treatment."""
 
-            # Translate the response if needed
-            if input_lang != 'en':
-                response_text = translate_text(response_text, input_lang)
-
             response = AIMessage(content=response_text)
 
             return {
@@ -564,8 +649,6 @@ def create_agent_graph():
 
         except Exception as e:
             error_text = f"An error occurred while analyzing the brain MRI image: {str(e)}"
-            if input_lang != 'en':
-                error_text = translate_text(error_text, input_lang)
             error_response = AIMessage(content=error_text)
             return {
                 **state,
@@ -582,22 +665,15 @@ def create_agent_graph():
 
         print(f"Selected agent: CHEST_XRAY_AGENT")
 
-        # Get input language from state
-        input_lang = state.get("input_lang", "vi")
-
         # classify chest x-ray into covid or normal
         predicted_class = AgentConfig.image_analyzer.classify_chest_xray(image_path)
 
         if predicted_class == "covid19":
-            response_text = "The analysis of the uploaded chest X-ray image indicates a **POSITIVE** result for **COVID-19**."
+            response_text = CHEST_XRAY_POSITIVE_TEXT
         elif predicted_class == "normal":
-            response_text = "The analysis of the uploaded chest X-ray image indicates a **NEGATIVE** result for **COVID-19**, i.e., **NORMAL**."
+            response_text = CHEST_XRAY_NEGATIVE_TEXT
         else:
-            response_text = "The uploaded image is not clear enough to make a diagnosis / the image is not a medical image."
-
-        # Translate response if needed
-        if input_lang != 'en':
-            response_text = translate_text(response_text, input_lang)
+            response_text = UNCLEAR_IMAGE_TEXT
 
         response = AIMessage(content=response_text)
 
@@ -616,20 +692,13 @@ def create_agent_graph():
 
         print(f"Selected agent: SKIN_LESION_AGENT")
 
-        # Get input language from state
-        input_lang = state.get("input_lang", "vi")
-
         # classify chest x-ray into covid or normal
         predicted_mask = AgentConfig.image_analyzer.segment_skin_lesion(image_path)
 
         if predicted_mask:
-            response_text = "Following is the analyzed **segmented** output of the uploaded skin lesion image:"
+            response_text = SKIN_LESION_SEGMENTED_TEXT
         else:
-            response_text = "The uploaded image is not clear enough to make a diagnosis / the image is not a medical image."
-
-        # Translate response if needed
-        if input_lang != 'en':
-            response_text = translate_text(response_text, input_lang)
+            response_text = UNCLEAR_IMAGE_TEXT
 
         response = AIMessage(content=response_text)
 
@@ -650,18 +719,11 @@ def create_agent_graph():
         """Handle human validation process."""
         print(f"Selected agent: HUMAN_VALIDATION")
         
-        # Get input language from state
-        input_lang = state.get("input_lang", "vi")
-        
         # Get the original output content
         output_content = state['output'].content
         
         # Create the validation prompt
-        validation_prompt = f"{output_content}\n\n**Human Validation Required:**\n- If you're a healthcare professional: Please validate the output. Select **Yes** or **No**. If No, provide comments.\n- If you're a patient: Simply click Yes to confirm."
-        
-        # Translate the validation prompt if needed
-        if input_lang != 'en':
-            validation_prompt = translate_text(validation_prompt, input_lang)
+        validation_prompt = f"{output_content}{HUMAN_VALIDATION_TEXT}"
         
         # Create an AI message with the validation prompt
         validation_message = AIMessage(content=validation_prompt)
@@ -684,9 +746,6 @@ def create_agent_graph():
 
         output_text = output if isinstance(output, str) else output.content
         
-        # Get input language from state
-        input_lang = state.get("input_lang", "vi")
-        
         # If the last message was a human validation message
         if "Human Validation Required" in output_text:
             # Check if the current input is a human validation response
@@ -703,11 +762,7 @@ def create_agent_graph():
                 
                 # If validation is 'No', modify the output
                 if validation_input.lower().startswith('no'):
-                    fallback_message_text = "The previous medical analysis requires further review. A healthcare professional has flagged potential inaccuracies."
-                    
-                    # Translate if needed
-                    if input_lang != 'en':
-                        fallback_message_text = translate_text(fallback_message_text, input_lang)
+                    fallback_message_text = VALIDATION_REJECTED_TEXT
                     
                     fallback_message = AIMessage(content=fallback_message_text)
                     return {
@@ -721,6 +776,14 @@ def create_agent_graph():
                     "messages": validation_response
                 }
         
+        # Streamed answers are checked and translated chunk by chunk by the caller
+        if state.get("deferred_output", False):
+            return {
+                **state,
+                "messages": output,
+                "output": output
+            }
+
         # Get the original input text
         input_text = ""
         if isinstance(current_input, str):
@@ -731,10 +794,6 @@ def create_agent_graph():
         # Apply output sanitization
         sanitized_output = guardrails.check_output(output_text, input_text)
         
-        # Translate the sanitized output if needed
-        if input_lang != 'en':
-            sanitized_output = translate_text(sanitized_output, input_lang)
-        
         # For non-validation cases, add the sanitized output to messages
         sanitized_message = AIMessage(content=sanitized_output) if isinstance(output, AIMessage) else sanitized_output
         
@@ -744,6 +803,13 @@ def create_agent_graph():
             "output": sanitized_message
         }
 
+    def trim_history(state: AgentState) -> Dict:
+        """Keep the stored conversation within the configured history window."""
+        messages = state["messages"]
+        if len(messages) <= config.max_conversation_history:
+            return {}
+        stale_messages = messages[:-config.max_conversation_history]
+        return {"messages": [RemoveMessage(id=msg.id) for msg in stale_messages]}
     
     # Create the workflow graph
     workflow = StateGraph(AgentState)
@@ -760,6 +826,7 @@ def create_agent_graph():
     workflow.add_node("check_validation", handle_human_validation)
     workflow.add_node("human_validation", perform_human_validation)
     workflow.add_node("apply_guardrails", apply_output_guardrails)
+    workflow.add_node("trim_history", trim_history)
     
     # Define the edges (workflow connections)
     workflow.set_entry_point("analyze_input")
@@ -799,7 +866,8 @@ def create_agent_graph():
     workflow.add_edge("SKIN_LESION_AGENT", "check_validation")
 
     workflow.add_edge("human_validation", "apply_guardrails")
-    workflow.add_edge("apply_guardrails", END)
+    workflow.add_edge("apply_guardrails", "trim_history")
+    workflow.add_edge("trim_history", END)
     
     workflow.add_conditional_edges(
         "check_validation",
@@ -816,6 +884,45 @@ def create_agent_graph():
     return workflow.compile(checkpointer=memory)
 
 
+def get_agent_graph():
+    """
+    Return the process-wide compiled agent graph, building it on first use.
+
+    The graph (guardrails, decision chain and compiled StateGraph) does not depend on
+    the request, so it is compiled once and shared by all API requests.
+
+    Returns:
+        Compiled LangGraph workflow
+    """
+    global _compiled_graph
+    if _compiled_graph is None:
+        with _graph_lock:
+            if _compiled_graph is None:
+                _compiled_graph = create_agent_graph()
+    return _compiled_graph
+
+def rebuild_agent_graph():
+    """
+    Recompile the agent graph and atomically replace the shared instance.
+
+    Use after configuration changes; in-flight requests finish on the old graph.
+
+    Returns:
+        Newly compiled LangGraph workflow
+    """
+    global _compiled_graph
+    graph = create_agent_graph()
+    with _graph_lock:
+        _compiled_graph = graph
+    return graph
+
+def invalidate_agent_graph() -> None:
+    """Drop the shared agent graph so that the next request rebuilds it lazily."""
+    global _compiled_graph
+    with _graph_lock:
+        _compiled_graph = None
+
+
 def init_agent_state() -> AgentState:
     """Initialize the agent state with default values."""
     return {
@@ -829,13 +936,16 @@ def init_agent_state() -> AgentState:
         "retrieval_confidence": 0.0,
         "bypass_routing": False,
         "insufficient_info": False,
-        "input_lang": "vi"
+        "input_lang": "vi",
+        "routing_decision": None,
+        "streaming": False,
+        "deferred_output": False
     }
 
 
 def detect_language(text: str) -> str:
     """
-    Detect the language of the input text using the conversation LLM.
+    Detect the language of the input text, using local heuristics first and the conversation LLM otherwise.
     
     Args:
         text: The text to detect language for
@@ -843,6 +953,10 @@ def detect_language(text: str) -> str:
     Returns:
         Language code (e.g., 'en', 'vi', etc.)
     """
+    local_lang = detect_language_locally(text)
+    if local_lang:
+        return local_lang
+
     detection_prompt = f"""Please detect the language of the following text and respond with only the ISO 639-1 language code (e.g., 'en' for English, 'vi' for Vietnamese, etc.):
 
     Text: {text}
@@ -855,14 +969,51 @@ def detect_language(text: str) -> str:
 def translate_text(text: str, target_lang: str) -> str:
     """
     Translate text to the target language using the conversation LLM.
+
+    Translations are memoized in the translation cache, so repeated text costs no LLM call.
     
     Args:
-        text: The text to translate
+        text: The text (or message) to translate
         target_lang: Target language code (e.g., 'en', 'vi')
         
     Returns:
         Translated text
     """
+    if isinstance(text, BaseMessage):
+        text = text.content
+
+    cached_translation = translation_cache.get(text, target_lang)
+    if cached_translation is not None:
+        return cached_translation
+
+    translated_text = config.conversation.llm.invoke(build_translation_prompt(text, target_lang))
+    translation_cache.put(text, target_lang, translated_text.content)
+    return translated_text.content
+
+async def atranslate_text(text: str, target_lang: str) -> str:
+    """
+    Async variant of `translate_text`, awaiting the LLM instead of blocking the event loop.
+
+    Args:
+        text: The text (or message) to translate
+        target_lang: Target language code (e.g., 'en', 'vi')
+
+    Returns:
+        Translated text
+    """
+    if isinstance(text, BaseMessage):
+        text = text.content
+
+    cached_translation = await translation_cache.aget(text, target_lang)
+    if cached_translation is not None:
+        return cached_translation
+
+    translated_text = await config.conversation.llm.ainvoke(build_translation_prompt(text, target_lang))
+    await translation_cache.aput(text, target_lang, translated_text.content)
+    return translated_text.content
+
+def build_translation_prompt(text: str, target_lang: str) -> str:
+    """Build the prompt translating a text to the target language."""
     lang_names = {
         'en': 'English',
         'vi': 'Vietnamese',
@@ -887,100 +1038,228 @@ def translate_text(text: str, target_lang: str) -> str:
     {text}
 
     {target_lang_name} translation (maintaining exact formatting):"""
+    return translation_prompt
 
-    translated_text = config.conversation.llm.invoke(translation_prompt)
-    return translated_text.content
+def prewarm_translations(languages: Optional[List[str]] = None) -> None:
+    """
+    Translate the fixed response templates ahead of time so canned responses cost no LLM call.
 
-def process_query(query: Union[str, Dict], conversation_history: List[BaseMessage] = None) -> str:
+    Args:
+        languages: Target language codes, defaults to the configured pre-warm languages
     """
-    Process a user query through the agent decision system.
-    
+    for lang in languages or config.conversation.translation_prewarm_languages:
+        if lang == 'en':
+            continue
+        try:
+            for template in TRANSLATION_TEMPLATES:
+                translate_text(template, lang)
+            # Vision results are returned together with the validation prompt
+            for template in VALIDATED_TEMPLATES:
+                translate_text(f"{template}{HUMAN_VALIDATION_TEXT}", lang)
+        except Exception as e:
+            print(f"Failed to pre-warm translations for '{lang}': {e}")
+
+def get_metrics() -> Dict[str, Any]:
+    """Collect runtime metrics of the agent decision system."""
+    return {
+        "sessions": session_manager.stats(),
+        "translation_cache": translation_cache.stats(),
+        "routing": fast_router.stats(),
+        "semantic_cache": get_semantic_cache(config).stats(),
+        "rag": rag_service.stats(),
+        "embedding_cache": config.rag.embedding_model.stats() if config.rag.use_embedding_cache else None,
+        "http": get_http_pool(config).stats()
+    }
+
+NORMALIZE_QUERY_PROMPT = """You prepare user messages for a medical assistant that works in English.
+
+    For the user message below:
+    1. Detect its language and give the ISO 639-1 code (e.g., 'en' for English, 'vi' for Vietnamese).
+    2. Translate it to English (keep it unchanged if it is already English). Keep medical terms intact.
+    3. Rewrite the English version in clear, simple English while maintaining its original meaning and intent.
+
+    User message: {text}
+
+    You must provide your answer in JSON format with the following structure:
+    {{
+    "language": "ISO 639-1 code",
+    "translation": "English translation",
+    "rewritten_query": "Rewritten English query"
+    }}
+    """
+
+normalize_chain = (
+    ChatPromptTemplate.from_template(NORMALIZE_QUERY_PROMPT)
+    | config.conversation.llm
+    | JsonOutputParser(pydantic_object=NormalizedQuery)
+)
+
+def normalize_query(text: str) -> NormalizedQuery:
+    """
+    Detect the language of a query, translate it to English and rewrite it in a single LLM call.
+
+    Obviously English input is resolved locally and skips the LLM entirely (unless
+    `rewrite_english_queries` is enabled); everything else needs one structured call.
+
+    Args:
+        text: The raw user query
+
+    Returns:
+        Dictionary with language code, English translation and rewritten English query
+    """
+    local_lang = detect_language_locally(text)
+    if local_lang == 'en' and not config.conversation.rewrite_english_queries:
+        return {"language": "en", "translation": text, "rewritten_query": text}
+
+    try:
+        return parse_normalized_query(normalize_chain.invoke({"text": text}), text, local_lang)
+    except Exception as e:
+        print(f"Query normalization failed, using the original query: {e}")
+        return {"language": local_lang or 'vi', "translation": text, "rewritten_query": text}
+
+async def anormalize_query(text: str) -> NormalizedQuery:
+    """
+    Async variant of `normalize_query`, awaiting the LLM instead of blocking the event loop.
+
+    Args:
+        text: The raw user query
+
+    Returns:
+        Dictionary with language code, English translation and rewritten English query
+    """
+    local_lang = detect_language_locally(text)
+    if local_lang == 'en' and not config.conversation.rewrite_english_queries:
+        return {"language": "en", "translation": text, "rewritten_query": text}
+
+    try:
+        return parse_normalized_query(await normalize_chain.ainvoke({"text": text}), text, local_lang)
+    except Exception as e:
+        print(f"Query normalization failed, using the original query: {e}")
+        return {"language": local_lang or 'vi', "translation": text, "rewritten_query": text}
+
+def parse_normalized_query(normalized: Dict[str, Any], text: str, local_lang: Optional[str]) -> NormalizedQuery:
+    """Fill in missing fields of the normalization LLM output."""
+    language = str(normalized.get("language", "")).strip().lower() or local_lang or 'vi'
+    translation = normalized.get("translation") or text
+    return {
+        # The LLM was asked, its language wins over the local heuristics
+        "language": language,
+        "translation": translation,
+        "rewritten_query": normalized.get("rewritten_query") or translation
+    }
+
+def prepare_turn(query: Union[str, Dict], session_id: Optional[str] = None) -> tuple:
+    """
+    Normalize a user query and build the graph input for one conversation turn.
+
     Args:
         query: User input (text string or dict with text and image)
-        conversation_history: Optional list of previous messages, NOT NEEDED ANYMORE since the state saves the conversation history now
-        
+        session_id: Session identifier from the API cookie
+
     Returns:
-        Response from the appropriate agent
+        Tuple of (graph, initial state, thread config, input language, ids of messages from earlier turns)
+    """
+    # Get the shared compiled graph
+    graph = get_agent_graph()
+
+    # Detect language, translate to English and rewrite in one pass
+    query_text = query.get("text", "") if isinstance(query, dict) else query
+    normalized = normalize_query(query_text) if query_text else None
+    state, input_lang = build_turn_state(query, normalized)
+
+    # Process the query in the session's own thread
+    thread_config = session_manager.get_thread_config(session_id)
+    previous_message_ids = {msg.id for msg in graph.get_state(thread_config).values.get("messages", [])}
+    return graph, state, thread_config, input_lang, previous_message_ids
+
+async def aprepare_turn(query: Union[str, Dict], session_id: Optional[str] = None) -> tuple:
+    """
+    Async variant of `prepare_turn`.
+
+    Args:
+        query: User input (text string or dict with text and image)
+        session_id: Session identifier from the API cookie
+
+    Returns:
+        Tuple of (graph, initial state, thread config, input language, ids of messages from earlier turns)
+    """
+    graph = get_agent_graph()
+
+    query_text = query.get("text", "") if isinstance(query, dict) else query
+    normalized = await anormalize_query(query_text) if query_text else None
+    state, input_lang = build_turn_state(query, normalized)
+
+    thread_config = await session_manager.aget_thread_config(session_id)
+    previous_message_ids = {msg.id for msg in (await graph.aget_state(thread_config)).values.get("messages", [])}
+    return graph, state, thread_config, input_lang, previous_message_ids
+
+def build_turn_state(query: Union[str, Dict], normalized: Optional[NormalizedQuery]) -> tuple:
+    """
+    Build the initial graph state of a turn from the user query and its normalization.
+
+    Args:
+        query: User input (text string or dict with text and image)
+        normalized: Output of the query normalization, None for an empty text
+
+    Returns:
+        Tuple of (initial state, input language)
     """
-    # Initialize the graph
-    graph = create_agent_graph()
-    
     # Initialize state
     state = init_agent_state()
-    
-    # Extract query text and detect language
-    if isinstance(query, dict):
-        query_text = query.get("text", "")
-    else:
-        query_text = query
 
-    # Detect input language if there's text, otherwise default to English
     input_lang = 'vi'  # Default to Vietnamese
-    if query_text:
-        detected_lang = detect_language(query_text)
-        # Only use detected language if not empty
-        if detected_lang and len(detected_lang) > 0:
-            input_lang = detected_lang
-        
-        # Translate input to English if it's not already English
-        if input_lang != 'en':
-            translated_query = translate_text(query_text, 'en')
-            if isinstance(query, dict):
-                query["text"] = translated_query
-            else:
-                query = translated_query
+    if normalized:
+        input_lang = normalized["language"]
+
+        # Update the query with the rewritten English version
+        if isinstance(query, dict):
+            query["text"] = normalized["rewritten_query"]
+        else:
+            query = normalized["rewritten_query"]
     
     # Store the original language in the state
     state["input_lang"] = input_lang
     
-    # Add the current query (now in English)
+    # Add the current query (now in clear English)
     state["current_input"] = query
 
-    # Rewrite the query to be more clear and understandable
-    if isinstance(query, dict):
-        query_text = query.get("text", "")
-    else:
-        query_text = query
-
-    # Only rewrite if there's actual text to rewrite
-    if query_text:
-        rewrite_prompt = f"""Please rewrite the following query in clear, simple English while maintaining its original meaning and intent:
-
-        Original query: {query_text}
-
-        Rewritten query:"""
-
-        rewritten_query = config.conversation.llm.invoke(rewrite_prompt)
-        
-        # Update the query with the rewritten version
-        if isinstance(query, dict):
-            query["text"] = rewritten_query.content
-        else:
-            query = rewritten_query.content
-            
-        # Update state with rewritten query
-        state["current_input"] = query
-
     # To handle image upload case
     if isinstance(query, dict):
         query = query.get("text", "") + ", user uploaded an image for diagnosis."
     
     state["messages"] = [HumanMessage(content=query)]
+    return state, input_lang
 
-    # Process the query
+def process_query(query: Union[str, Dict], conversation_history: List[BaseMessage] = None, session_id: Optional[str] = None) -> str:
+    """
+    Process a user query through the agent decision system.
+    
+    Args:
+        query: User input (text string or dict with text and image)
+        conversation_history: Optional list of previous messages, NOT NEEDED ANYMORE since the state saves the conversation history now
+        session_id: Session identifier from the API cookie, each session gets an isolated conversation thread
+        
+    Returns:
+        Response from the appropriate agent
+    """
+    graph, state, thread_config, input_lang, previous_message_ids = prepare_turn(query, session_id)
     result = graph.invoke(state, thread_config)
 
-    # Keep history to reasonable size
-    if len(result["messages"]) > config.max_conversation_history:
-        result["messages"] = result["messages"][-config.max_conversation_history:]
+    # Superseded checkpoints of this thread are compacted in the background (history itself is trimmed inside the graph)
+    session_manager.mark_updated(thread_config["configurable"]["thread_id"])
 
-    # Always translate messages to user's input language unless the detected language was explicitly English
+    # Always translate messages to user's input language unless the detected language was explicitly English.
+    # Only messages produced in this turn are sent to the LLM, earlier ones come from the translation cache.
     if input_lang != 'en':
         translated_messages = []
         for message in result["messages"]:
             if isinstance(message, (HumanMessage, AIMessage)):
-                translated_content = translate_text(message.content, input_lang)
-                translated_messages.append(type(message)(content=translated_content))
+                if message.id in previous_message_ids:
+                    # Translated on an earlier turn, keep it as is if it is no longer cached
+                    translated_content = translation_cache.get(message.content, input_lang) or message.content
+                else:
+                    translated_content = translate_text(message.content, input_lang)
+                translated_messages.append(type(message)(content=translated_content, id=message.id))
             else:
                 translated_messages.append(message)
         result["messages"] = translated_messages
@@ -990,4 +1269,168 @@ def process_query(query: Union[str, Dict], conversation_history: List[BaseMessag
         m.pretty_print()
     
     # Add the response to conversation history
-    return result
\ No newline at end of file
+    return result
+
+async def aprocess_query(query: Union[str, Dict], session_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Async variant of `process_query` for the API event loop.
+
+    The LLM calls made for the request itself (normalization, translation) are awaited and
+    the graph runs with `ainvoke`, which executes the agent nodes on worker threads, so a
+    slow turn never blocks other requests served by the same worker.
+
+    Args:
+        query: User input (text string or dict with text and image)
+        session_id: Session identifier from the API cookie, each session gets an isolated conversation thread
+
+    Returns:
+        Final graph state with the messages in the user's language
+    """
+    graph, state, thread_config, input_lang, previous_message_ids = await aprepare_turn(query, session_id)
+    result = await graph.ainvoke(state, thread_config)
+
+    session_manager.mark_updated(thread_config["configurable"]["thread_id"])
+
+    # Translate the messages of this turn concurrently, earlier ones come from the translation cache
+    if input_lang != 'en':
+        async def translate_message(message):
+            if not isinstance(message, (HumanMessage, AIMessage)):
+                return message
+            if message.id in previous_message_ids:
+                translated_content = await translation_cache.aget(message.content, input_lang) or message.content
+            else:
+                translated_content = await atranslate_text(message.content, input_lang)
+            return type(message)(content=translated_content, id=message.id)
+
+        result["messages"] = list(await asyncio.gather(*(translate_message(message) for message in result["messages"])))
+
+    for m in result["messages"]:
+        m.pretty_print()
+
+    return result
+
+def postprocess_chunk(chunk: str, input_text: str, input_lang: str) -> tuple:
+    """
+    Apply the output guardrails and the translation to one chunk of a streamed answer.
+
+    Args:
+        chunk: Sentence-sized piece of the English answer
+        input_text: The (English) user query, context for the guardrails
+        input_lang: Language to translate to
+
+    Returns:
+        Tuple of (checked English chunk, checked and translated chunk), both with the
+        surrounding whitespace of the input chunk preserved
+    """
+    core = chunk.strip()
+    if not core:
+        return chunk, chunk
+    leading = chunk[:len(chunk) - len(chunk.lstrip())]
+    trailing = chunk[len(chunk.rstrip()):]
+
+    checked = stream_guardrails.check_output(core, input_text).strip() or core
+    text = translate_text(checked, input_lang).strip() if input_lang != 'en' else checked
+    return f"{leading}{checked}{trailing}", f"{leading}{text}{trailing}"
+
+def stream_query(query: Union[str, Dict], session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Process a user query and stream the answer while it is generated.
+
+    Tokens of the answering LLM are cut into sentence chunks, each chunk goes through the
+    output guardrails and the translation concurrently with the rest of the generation, and
+    chunks are emitted in order. Answers that are not generated by an LLM (image analysis,
+    blocked input, validation) are emitted in one piece.
+
+    Args:
+        query: User input (text string or dict with text and image)
+        session_id: Session identifier from the API cookie
+
+    Yields:
+        Events: {"type": "delta", "content"} for answer text, {"type": "reset"} when a later
+        agent replaces the text streamed so far, and a final {"type": "done", "agent", "response"}
+    """
+    graph, state, thread_config, input_lang, previous_message_ids = prepare_turn(query, session_id)
+    state["streaming"] = True
+    current_input = state["current_input"]
+    input_text = current_input.get("text", "") if isinstance(current_input, dict) else current_input
+
+    chunker = SentenceChunker(config.conversation.stream_chunk_min_chars)
+    pending = deque()  # Post-processing futures of the chunks, in answer order
+    answer_parts = []  # Post-processed chunks emitted so far
+    checked_parts = []  # The same chunks in English, as stored in the conversation history
+    streamed_text = ""  # Raw answer text received so far
+    streamed_node = None
+
+    def submit(chunks):
+        for chunk in chunks:
+            pending.append(stream_executor.submit(postprocess_chunk, chunk, input_text, input_lang))
+
+    def emit_ready(wait: bool = False):
+        while pending and (wait or pending[0].done()):
+            checked, part = pending.popleft().result()
+            checked_parts.append(checked)
+            answer_parts.append(part)
+            yield {"type": "delta", "content": part}
+
+    def reset() -> bool:
+        """Drop the answer so far (including text still buffered in the chunker); returns whether any of it was emitted."""
+        emitted = bool(answer_parts)
+        for future in pending:
+            future.cancel()
+        pending.clear()
+        answer_parts.clear()
+        checked_parts.clear()
+        chunker.flush()
+        return emitted
+
+    for message_chunk, metadata in graph.stream(state, thread_config, stream_mode="messages"):
+        if ANSWER_STREAM_TAG not in (metadata.get("tags") or []) or not isinstance(message_chunk.content, str):
+            continue
+        node = metadata.get("langgraph_node")
+        if node != streamed_node:
+            # A later agent (e.g. web search after a low-confidence RAG answer) replaces the answer
+            if streamed_node is not None:
+                streamed_text = ""
+                if reset():
+                    yield {"type": "reset"}
+            streamed_node = node
+        streamed_text += message_chunk.content
+        submit(chunker.feed(message_chunk.content))
+        yield from emit_ready()
+
+    session_manager.mark_updated(thread_config["configurable"]["thread_id"])
+    values = graph.get_state(thread_config).values
+    final_message = values["messages"][-1]
+
+    if values.get("deferred_output", False):
+        output = values.get("output")
+        output_text = output.content if isinstance(output, BaseMessage) else str(output or "")
+        if output_text.startswith(streamed_text):
+            # Text appended after generation (e.g. source links), or an answer that was not generated (cache hit)
+            submit(chunker.split(output_text[len(streamed_text):]))
+        else:
+            # The output replaced the streamed text (e.g. validation); re-chunk it from scratch
+            if reset():
+                yield {"type": "reset"}
+            submit(chunker.split(output_text))
+        yield from emit_ready(wait=True)
+        final_text = "".join(answer_parts)
+        checked_text = "".join(checked_parts)
+
+        # Store the checked English answer in place of the raw one, like the graph does on the non-streaming path;
+        # the translation is cached so that later turns return it without another LLM call
+        graph.update_state(thread_config, {"messages": [AIMessage(content=checked_text, id=final_message.id)]}, as_node="trim_history")
+        if input_lang != 'en':
+            translation_cache.put(checked_text, input_lang, final_text)
+    else:
+        if streamed_text and reset():
+            yield {"type": "reset"}
+        final_text = final_message.content
+        if input_lang != 'en':
+            if final_message.id in previous_message_ids:
+                final_text = translation_cache.get(final_text, input_lang) or final_text
+            else:
+                final_text = translate_text(final_text, input_lang)
+        yield {"type": "delta", "content": final_text}
+
+    yield {"type": "done", "agent": values.get("agent_name"), "response": final_text}
@@ -0,0 +1,320 @@
+import os
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional, AsyncIterator, Iterator
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+class ThreadedSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver that also serves the async checkpointer API (needed by `graph.ainvoke`).
+
+    The async methods run the synchronous ones on a worker thread, so the sync and async
+    request paths share one connection, guarded by the saver's own lock.
+    """
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+class LockedMemorySaver(MemorySaver):
+    """
+    MemorySaver whose reads and writes hold a lock, like SqliteSaver does.
+
+    The background compactor edits the saver's dictionaries in place, so request-path
+    reads and writes must not interleave with it. The async methods of MemorySaver call
+    the sync ones, so they are covered as well.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self.lock:
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self.lock:
+            checkpoints = list(super().list(config, filter=filter, before=before, limit=limit))
+        yield from checkpoints
+
+    def put(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        with self.lock:
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        with self.lock:
+            super().put_writes(config, writes, task_id, task_path)
+
+class MemoryCheckpointStore:
+    """
+    In-process checkpoint storage. Fast, but conversations are lost on restart.
+
+    Maintenance holds the saver's lock, so it never races the graph's reads and writes.
+    """
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.checkpointer = LockedMemorySaver()
+
+    def load_sessions(self) -> Dict[str, float]:
+        """Nothing survives a restart in memory."""
+        return {}
+
+    def touch_session(self, thread_id: str, last_access: float) -> None:
+        """Session activity is only tracked by the session manager."""
+        pass
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Remove every checkpoint, pending write and channel blob of a thread."""
+        with self.checkpointer.lock:
+            if hasattr(self.checkpointer, "delete_thread"):
+                self.checkpointer.delete_thread(thread_id)
+                return
+
+            self.checkpointer.storage.pop(thread_id, None)
+            for key in [key for key in list(self.checkpointer.writes.keys()) if key[0] == thread_id]:
+                self.checkpointer.writes.pop(key, None)
+            blobs = getattr(self.checkpointer, "blobs", None)
+            if blobs is not None:
+                for key in [key for key in list(blobs.keys()) if key[0] == thread_id]:
+                    blobs.pop(key, None)
+
+    def _remove_unreferenced_blobs(self, thread_id: str, checkpoint_ns: str, checkpoints: Dict[str, Any]) -> None:
+        """
+        Drop channel values of a namespace that no remaining checkpoint points to.
+
+        Newer savers keep channel values (the message history) in `blobs`, keyed by
+        (thread, namespace, channel, version), instead of inside the checkpoints.
+        """
+        blobs = getattr(self.checkpointer, "blobs", None)
+        if not blobs:
+            return
+        referenced = set()
+        for checkpoint, _metadata, _parent in list(checkpoints.values()):
+            channel_versions = self.checkpointer.serde.loads_typed(checkpoint).get("channel_versions", {})
+            referenced.update(channel_versions.items())
+        for key in list(blobs.keys()):
+            if key[0] == thread_id and key[1] == checkpoint_ns and (key[2], key[3]) not in referenced:
+                blobs.pop(key, None)
+
+    def compact_thread(self, thread_id: str, keep: int) -> int:
+        """
+        Drop superseded checkpoints of a thread, keeping only the most recent ones.
+
+        Args:
+            thread_id: Thread to compact
+            keep: Number of most recent checkpoints to keep
+
+        Returns:
+            Number of checkpoints removed
+        """
+        removed = 0
+        with self.checkpointer.lock:
+            namespaces = self.checkpointer.storage.get(thread_id, {})
+            for checkpoint_ns, checkpoints in list(namespaces.items()):
+                if len(checkpoints) <= keep:
+                    continue
+                # Checkpoint IDs are time-ordered, so the oldest sort first
+                superseded = sorted(checkpoints.keys())[:-keep]
+                for checkpoint_id in superseded:
+                    checkpoints.pop(checkpoint_id, None)
+                    self.checkpointer.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                self._remove_unreferenced_blobs(thread_id, checkpoint_ns, checkpoints)
+                removed += len(superseded)
+        return removed
+
+    def maintenance(self) -> None:
+        """No periodic maintenance needed in memory."""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report checkpoint storage usage.
+
+        Returns:
+            Dictionary with checkpoint and blob counts and approximate memory in bytes
+        """
+        checkpoint_count = 0
+        checkpoint_bytes = 0
+        with self.checkpointer.lock:
+            for namespaces in self.checkpointer.storage.values():
+                for checkpoints in namespaces.values():
+                    for checkpoint, metadata, _parent in checkpoints.values():
+                        checkpoint_count += 1
+                        checkpoint_bytes += len(checkpoint[1]) + len(metadata[1])
+            for writes in self.checkpointer.writes.values():
+                for _task_id, _channel, value, _path in writes.values():
+                    checkpoint_bytes += len(value[1])
+            blobs = list(getattr(self.checkpointer, "blobs", {}).values())
+        for _type, value in blobs:
+            checkpoint_bytes += len(value)
+
+        return {
+            "backend": "memory",
+            "checkpoints": checkpoint_count,
+            "blobs": len(blobs),
+            "checkpoint_bytes": checkpoint_bytes
+        }
+
+class SqliteCheckpointStore:
+    """
+    Disk-backed checkpoint storage in a local SQLite file.
+
+    Conversations survive restarts and can be shared by several workers on the same host.
+    Session activity is persisted next to the checkpoints so TTL eviction resumes after a restart.
+    """
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the checkpoint database.
+
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # The saver serializes access to the shared connection with its own lock
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.checkpointer = ThreadedSqliteSaver(conn)
+        with self.checkpointer.cursor() as cur:
+            cur.execute(
+                """CREATE TABLE IF NOT EXISTS sessions (
+                    thread_id TEXT PRIMARY KEY,
+                    last_access REAL NOT NULL
+                )"""
+            )
+        self.logger.info(f"Using SQLite checkpoint store: {db_path}")
+
+    def load_sessions(self) -> Dict[str, float]:
+        """
+        Load known sessions so that a restarted worker resumes them.
+
+        Returns:
+            Mapping of thread ID to last access time
+        """
+        with self.checkpointer.cursor(transaction=False) as cur:
+            cur.execute("SELECT thread_id, last_access FROM sessions ORDER BY last_access")
+            return {thread_id: last_access for thread_id, last_access in cur.fetchall()}
+
+    def touch_session(self, thread_id: str, last_access: float) -> None:
+        """Persist the last access time of a session."""
+        with self.checkpointer.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO sessions (thread_id, last_access) VALUES (?, ?)",
+                (thread_id, last_access),
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Remove every checkpoint, pending write and activity record of a thread."""
+        with self.checkpointer.cursor() as cur:
+            cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            cur.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+
+    def compact_thread(self, thread_id: str, keep: int) -> int:
+        """
+        Drop superseded checkpoints of a thread, keeping only the most recent ones.
+
+        Args:
+            thread_id: Thread to compact
+            keep: Number of most recent checkpoints to keep per namespace
+
+        Returns:
+            Number of checkpoints removed
+        """
+        removed = 0
+        with self.checkpointer.cursor() as cur:
+            cur.execute("SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            for (checkpoint_ns,) in cur.fetchall():
+                # Checkpoint IDs are time-ordered, so the newest sort last
+                cur.execute(
+                    """DELETE FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints
+                        WHERE thread_id = ? AND checkpoint_ns = ?
+                        ORDER BY checkpoint_id DESC LIMIT ?
+                    )""",
+                    (thread_id, checkpoint_ns, thread_id, checkpoint_ns, keep),
+                )
+                removed += cur.rowcount
+            cur.execute(
+                """DELETE FROM writes
+                WHERE thread_id = ? AND checkpoint_id NOT IN (
+                    SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?
+                )""",
+                (thread_id, thread_id),
+            )
+        return removed
+
+    def maintenance(self) -> None:
+        """Fold the write-ahead log back into the database file so it does not grow unbounded."""
+        with self.checkpointer.cursor() as cur:
+            cur.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report checkpoint storage usage.
+
+        Returns:
+            Dictionary with checkpoint count, stored bytes and database file size
+        """
+        with self.checkpointer.cursor(transaction=False) as cur:
+            cur.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints")
+            checkpoint_count, checkpoint_bytes = cur.fetchone()
+            cur.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes")
+            writes_bytes = cur.fetchone()[0]
+
+        return {
+            "backend": "sqlite",
+            "checkpoints": checkpoint_count,
+            "checkpoint_bytes": checkpoint_bytes + writes_bytes,
+            "db_file_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        }
+
+def create_checkpoint_store(config):
+    """
+    Create the checkpoint store selected in the configuration.
+
+    Args:
+        config: Configuration object with session settings
+
+    Returns:
+        Checkpoint store exposing the LangGraph checkpointer as `.checkpointer`
+    """
+    backend = config.session.checkpointer_backend
+    if backend == "sqlite":
+        return SqliteCheckpointStore(config.session.checkpoint_db_path)
+    if backend == "memory":
+        return MemoryCheckpointStore()
+    raise ValueError(f"Unknown checkpointer backend: {backend}")
@@ -0,0 +1,225 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class EmbeddingCache:
+    """
+    Persistent content-hash -> vector store.
+
+    Vectors are appended as float32 rows to a flat file that is memory-mapped for reads;
+    a SQLite index maps each key to its row. Rows are allocated inside an exclusive SQLite
+    transaction, so several processes can share the same cache directory.
+    """
+    def __init__(self, cache_dir: str):
+        """
+        Open (or create) the cache.
+
+        Args:
+            cache_dir: Directory holding the index and the vector file
+        """
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+        self._vectors = None  # Memory map of the vector file, reopened when it grows
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up vectors by key.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            One float32 vector per key, None for misses
+        """
+        rows = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.update(self._conn.execute(
+                    f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall())
+
+            vectors = self._map_vectors(max(rows.values()) + 1) if rows else None
+            results = [np.array(vectors[rows[key]]) if key in rows else None for key in keys]
+            self.hits += len([result for result in results if result is not None])
+            self.misses += len([result for result in results if result is None])
+        return results
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]) -> None:
+        """
+        Append vectors to the cache, skipping keys that are already present.
+
+        Args:
+            keys: Cache keys
+            vectors: Vectors in the same order as the keys
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or not len(vectors):
+            return
+
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if self.dim is None:
+                    row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+                    self.dim = int(row[0]) if row else vectors.shape[1]
+                    self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+                if vectors.shape[1] != self.dim:
+                    self._conn.execute("ROLLBACK")
+                    self.logger.warning(f"Not caching embeddings of dimension {vectors.shape[1]} (cache holds {self.dim})")
+                    return
+
+                # Keep only the first occurrence of every key that is not cached yet
+                new_rows = {}
+                for index, key in enumerate(keys):
+                    if key not in new_rows:
+                        new_rows[key] = index
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    for (key,) in self._conn.execute(f"SELECT key FROM embeddings WHERE key IN ({placeholders})", batch):
+                        new_rows.pop(key, None)
+                if not new_rows:
+                    self._conn.execute("ROLLBACK")
+                    return
+
+                # Rows are allocated from the file size; a partially written row from a crash is discarded
+                row_bytes = self.dim * 4
+                with open(self.vectors_path, "ab") as f:
+                    first_row = f.tell() // row_bytes
+                    f.truncate(first_row * row_bytes)
+                    f.write(vectors[list(new_rows.values())].tobytes())
+                self._conn.executemany(
+                    "INSERT INTO embeddings (key, row) VALUES (?, ?)",
+                    [(key, first_row + offset) for offset, key in enumerate(new_rows)],
+                )
+                self._conn.execute("COMMIT")
+            except (sqlite3.Error, OSError) as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                self.logger.error(f"Error persisting embeddings: {e}")
+
+    def _map_vectors(self, min_rows: int) -> np.ndarray:
+        """Return a memory map covering at least `min_rows` rows (caller holds the lock)."""
+        if self._vectors is None or len(self._vectors) < min_rows:
+            rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._vectors
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache size and hit/miss counters."""
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "entries": entries,
+            "dim": self.dim,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends cache misses to the underlying model.
+    """
+    def __init__(self, embeddings: Embeddings, cache_dir: str, namespace: Optional[str] = None):
+        """
+        Wrap an embeddings model.
+
+        Args:
+            embeddings: The embeddings model to cache
+            cache_dir: Directory of the persistent cache
+            namespace: Model identity included in every key (defaults to the deployment or model name)
+        """
+        self.embeddings = embeddings
+        self.cache = get_embedding_cache(cache_dir)
+        self.namespace = namespace or str(
+            getattr(embeddings, "deployment", None) or getattr(embeddings, "model", None) or type(embeddings).__name__
+        )
+
+    def _make_keys(self, texts: List[str], kind: str) -> List[str]:
+        """Build keys from the model identity, the embedding kind and the content hash."""
+        return [
+            f"{self.namespace}:{kind}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+            for text in texts
+        ]
+
+    def _lookup(self, texts: List[str], kind: str):
+        """Return keys, cached vectors and the unique texts that must be embedded."""
+        keys = self._make_keys(texts, kind)
+        vectors = self.cache.get_many(keys)
+        missing = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+        return keys, vectors, missing
+
+    def _merge(self, keys, vectors, missing, embedded) -> List[List[float]]:
+        """Store freshly embedded vectors and assemble the results in input order."""
+        if missing:
+            self.cache.put_many(list(missing), embedded)
+            fresh = dict(zip(missing, embedded))
+        else:
+            fresh = {}
+        return [
+            vector.tolist() if vector is not None else list(fresh[key])
+            for key, vector in zip(keys, vectors)
+        ]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, sending only uncached texts to the model in one batch."""
+        keys, vectors, missing = self._lookup(texts, "document")
+        embedded = self.embeddings.embed_documents(list(missing.values())) if missing else []
+        return self._merge(keys, vectors, missing, embedded)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, served from the cache when it was seen before."""
+        keys, vectors, missing = self._lookup([text], "query")
+        embedded = [self.embeddings.embed_query(text)] if missing else []
+        return self._merge(keys, vectors, missing, embedded)[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of `embed_documents`."""
+        keys, vectors, missing = self._lookup(texts, "document")
+        embedded = await self.embeddings.aembed_documents(list(missing.values())) if missing else []
+        return self._merge(keys, vectors, missing, embedded)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async variant of `embed_query`."""
+        keys, vectors, missing = self._lookup([text], "query")
+        embedded = [await self.embeddings.aembed_query(text)] if missing else []
+        return self._merge(keys, vectors, missing, embedded)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache size and hit/miss counters."""
+        return self.cache.stats()
+
+# One cache per directory, shared by every Config instance of the process
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(cache_dir: str) -> EmbeddingCache:
+    """Return the process-wide cache for a directory, opening it on first use."""
+    cache_dir = os.path.abspath(cache_dir)
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = EmbeddingCache(cache_dir)
+        return _caches[cache_dir]
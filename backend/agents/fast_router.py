@@ -0,0 +1,172 @@
+import re
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+class FastRouter:
+    """
+    Resolves unambiguous routing decisions locally so the decision LLM is only called for ambiguous queries.
+
+    Rules handle uploaded medical images of a known type and plain greetings; an embedding
+    match against example utterances handles other high-similarity intents. A query that
+    misses both pays for its embedding on top of the decision LLM, so only queries that could
+    match are embedded: short ones made up mostly of words that occur in the examples (a match
+    above the threshold is a near paraphrase). The embedding is cached, so the RAG agent's
+    semantic cache lookup of the same query reuses it.
+    """
+    # Image types reported by the image classifier and the vision agent that must handle them
+    IMAGE_ROUTES = {
+        "CHEST X-RAY": "CHEST_XRAY_AGENT",
+        "SKIN LESION": "SKIN_LESION_AGENT",
+        "BRAIN MRI SCAN": "BRAIN_TUMOR_AGENT",
+    }
+
+    WORD_PATTERN = re.compile(r"[a-z']+")
+
+    GREETING_PATTERN = re.compile(
+        r"^\s*(hi|hello|hey|good (morning|afternoon|evening)|thanks?( you)?( so much)?|bye|goodbye|how are you( doing)?)"
+        r"( there)?[\s!.?,]*$",
+        re.IGNORECASE,
+    )
+
+    def __init__(self, config):
+        """
+        Initialize the router.
+
+        Args:
+            config: Configuration object with fast routing settings
+        """
+        self.logger = logging.getLogger(__name__)
+        self.embedding_model = config.rag.embedding_model
+        self.use_embeddings = config.agent_decision.fast_route_embeddings
+        self.similarity_threshold = config.agent_decision.fast_route_similarity_threshold
+        self.max_words = config.agent_decision.fast_route_max_words
+        self.min_word_overlap = config.agent_decision.fast_route_min_word_overlap
+        self.intent_examples = config.agent_decision.fast_route_examples
+        self._example_words = {
+            word for utterances in self.intent_examples.values() for utterance in utterances
+            for word in self.WORD_PATTERN.findall(utterance.lower())
+        }
+
+        self._example_agents = []
+        self._example_vectors = None  # Embedded lazily on first use
+        self._lock = threading.Lock()
+        self.route_counts = Counter()
+        self.embedding_counts = Counter()  # Queries embedded for the similarity match, or skipped by the word overlap check
+
+    def route(self, input_text: str, has_image: bool, image_type: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Try to decide on the agent without the decision LLM.
+
+        Args:
+            input_text: The (English) user query
+            has_image: Whether an image was uploaded
+            image_type: Image type from the image classifier
+
+        Returns:
+            Decision dictionary in the decision LLM's format, or None if the query is ambiguous
+        """
+        decision = self._route_by_rules(input_text, has_image, image_type)
+        if (
+            decision is None and not has_image and input_text and self.use_embeddings
+            and len(input_text.split()) <= self.max_words
+        ):
+            if self._could_match(input_text):
+                with self._lock:
+                    self.embedding_counts["embedded"] += 1
+                try:
+                    decision = self._route_by_similarity(input_text)
+                except Exception as e:
+                    self.logger.warning(f"Embedding-based routing failed, falling back to the LLM: {e}")
+            else:
+                with self._lock:
+                    self.embedding_counts["skipped"] += 1
+
+        if decision is not None:
+            self.record(decision["method"], decision["agent"])
+        return decision
+
+    def record(self, method: str, agent: str) -> None:
+        """Count a routing decision by method ('rule', 'embedding' or 'llm') and agent."""
+        with self._lock:
+            self.route_counts[(method, agent)] += 1
+
+    def _route_by_rules(self, input_text: str, has_image: bool, image_type: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Apply the routing rules that are forced by the decision system prompt."""
+        if has_image:
+            # Uploaded medical images always go to the matching vision agent first
+            agent = self.IMAGE_ROUTES.get(str(image_type or "").strip().upper())
+            if agent:
+                return {"agent": agent, "reasoning": f"Uploaded image classified as {image_type}", "confidence": 1.0, "method": "rule"}
+            return None
+
+        if input_text and self.GREETING_PATTERN.match(input_text):
+            return {"agent": "CONVERSATION_AGENT", "reasoning": "Greeting or small talk", "confidence": 1.0, "method": "rule"}
+        return None
+
+    def _could_match(self, input_text: str) -> bool:
+        """Whether enough of the query's words occur in the examples for an embedding match to be possible."""
+        words = self.WORD_PATTERN.findall(input_text.lower())
+        if not words:
+            return False
+        return sum(1 for word in words if word in self._example_words) / len(words) >= self.min_word_overlap
+
+    def _route_by_similarity(self, input_text: str) -> Optional[Dict[str, Any]]:
+        """Match the query against embedded example utterances of each intent."""
+        example_vectors = self._get_example_vectors()
+        if example_vectors is None:
+            return None
+
+        query_vector = np.asarray(self.embedding_model.embed_query(input_text), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        similarities = example_vectors @ query_vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        return {
+            "agent": self._example_agents[best],
+            "reasoning": f"Matches a known intent (similarity {similarities[best]:.2f})",
+            "confidence": float(similarities[best]),
+            "method": "embedding"
+        }
+
+    def _get_example_vectors(self) -> Optional[np.ndarray]:
+        """Embed the intent examples once and keep them normalized for cosine similarity."""
+        if self._example_vectors is None and self.intent_examples:
+            with self._lock:
+                if self._example_vectors is None:
+                    agents, examples = [], []
+                    for agent, utterances in self.intent_examples.items():
+                        agents.extend([agent] * len(utterances))
+                        examples.extend(utterances)
+                    vectors = np.asarray(self.embedding_model.embed_documents(examples), dtype=np.float32)
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                    self._example_agents = agents
+                    self._example_vectors = vectors
+        return self._example_vectors
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report how requests were routed.
+
+        Returns:
+            Dictionary with per-route counters, the share of requests that avoided the decision LLM
+            and how many queries were embedded for the similarity match
+        """
+        with self._lock:
+            counts = dict(self.route_counts)
+            embedding_counts = dict(self.embedding_counts)
+        total = sum(counts.values())
+        llm_routed = sum(count for (method, _agent), count in counts.items() if method == "llm")
+        return {
+            "total": total,
+            "llm_avoided": total - llm_routed,
+            "llm_avoided_ratio": (total - llm_routed) / total if total else 0.0,
+            "routes": {f"{method}:{agent}": count for (method, agent), count in sorted(counts.items())},
+            "queries_embedded": embedding_counts.get("embedded", 0),
+            "embeddings_skipped": embedding_counts.get("skipped", 0)
+        }
@@ -0,0 +1,221 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+class HttpPool:
+    """
+    Shared keep-alive HTTP clients for the outbound integrations (Azure Speech, Tavily, PubMed).
+
+    A sync and an async client keep connections open between calls, concurrent requests to
+    the same host are capped, failed requests (connection errors, 429 and 5xx responses) are
+    retried with exponential backoff, and every host reports how often a connection was reused.
+    """
+    def __init__(self, config):
+        """
+        Initialize the pool.
+
+        Args:
+            config: Configuration object with HTTP settings
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_connections_per_host = config.http.max_connections_per_host
+        self.host_limits = config.http.host_limits
+        self.max_retries = config.http.max_retries
+        self.backoff_factor = config.http.backoff_factor
+        self.max_backoff = config.http.max_backoff
+        self.retry_statuses = set(config.http.retry_statuses)
+
+        self._limits = httpx.Limits(
+            max_connections=None,  # Bounded per host below
+            max_keepalive_connections=config.http.max_keepalive_connections,
+            keepalive_expiry=config.http.keepalive_expiry
+        )
+        self._timeout = httpx.Timeout(config.http.timeout, connect=config.http.connect_timeout)
+        self.client = httpx.Client(limits=self._limits, timeout=self._timeout)
+        self._async_client = None  # Created inside the event loop that uses it
+
+        self._lock = threading.Lock()
+        self._host_semaphores = {}
+        self._async_host_semaphores = {}
+        self._stats = {}
+
+    def _host_stats(self, host: str) -> Dict[str, int]:
+        """Counters of a host (caller holds the lock)."""
+        if host not in self._stats:
+            self._stats[host] = {"requests": 0, "connections_opened": 0, "retries": 0, "errors": 0}
+        return self._stats[host]
+
+    def _count(self, host: str, counter: str) -> None:
+        with self._lock:
+            self._host_stats(host)[counter] += 1
+
+    def _host_limit(self, host: str) -> int:
+        return self.host_limits.get(host, self.max_connections_per_host)
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self._host_limit(host))
+            return self._host_semaphores[host]
+
+    def _async_semaphore(self, host: str) -> asyncio.Semaphore:
+        with self._lock:
+            if host not in self._async_host_semaphores:
+                self._async_host_semaphores[host] = asyncio.Semaphore(self._host_limit(host))
+            return self._async_host_semaphores[host]
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """The shared async client, opened on first use."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+        return self._async_client
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Backoff before the next attempt, honouring a Retry-After header in seconds."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return min(self.backoff_factor * (2 ** attempt), self.max_backoff) * random.uniform(0.5, 1.0)
+
+    def _should_retry(self, attempt: int, retries: int, response: Optional[httpx.Response]) -> bool:
+        return attempt < retries and (response is None or response.status_code in self.retry_statuses)
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared sync client.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            retries: Retries after the first attempt, defaults to the configured number
+            **kwargs: Passed on to `httpx.Client.request` (params, json, content, headers, timeout, ...)
+
+        Returns:
+            The response of the last attempt
+
+        Raises:
+            httpx.HTTPError: When the last attempt failed without a response
+        """
+        host = urlsplit(url).netloc
+        retries = self.max_retries if retries is None else retries
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                self._count(host, "connections_opened")
+
+        attempt = 0
+        while True:
+            response = None
+            self._count(host, "requests")
+            try:
+                with self._semaphore(host):
+                    response = self.client.request(method, url, extensions={"trace": trace}, **kwargs)
+            except httpx.TransportError as e:
+                self._count(host, "errors")
+                if not self._should_retry(attempt, retries, None):
+                    raise
+                self.logger.warning(f"Request to {host} failed ({e}), retrying")
+            if response is not None and not self._should_retry(attempt, retries, response):
+                return response
+            if response is not None:
+                response.close()
+            self._count(host, "retries")
+            time.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def arequest(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+        """
+        Async variant of `request`, through the shared async client.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            retries: Retries after the first attempt, defaults to the configured number
+            **kwargs: Passed on to `httpx.AsyncClient.request`
+
+        Returns:
+            The response of the last attempt
+
+        Raises:
+            httpx.HTTPError: When the last attempt failed without a response
+        """
+        host = urlsplit(url).netloc
+        retries = self.max_retries if retries is None else retries
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                self._count(host, "connections_opened")
+
+        attempt = 0
+        while True:
+            response = None
+            self._count(host, "requests")
+            try:
+                async with self._async_semaphore(host):
+                    response = await self.async_client.request(method, url, extensions={"trace": trace}, **kwargs)
+            except httpx.TransportError as e:
+                self._count(host, "errors")
+                if not self._should_retry(attempt, retries, None):
+                    raise
+                self.logger.warning(f"Request to {host} failed ({e}), retrying")
+            if response is not None and not self._should_retry(attempt, retries, response):
+                return response
+            if response is not None:
+                await response.aclose()
+            self._count(host, "retries")
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the async client, e.g. when its event loop shuts down."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self._async_host_semaphores = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report request, connection and retry counters per host.
+
+        Returns:
+            Dictionary keyed by host; `connection_reuse_rate` is the share of requests
+            served over an already open connection
+        """
+        with self._lock:
+            stats = {host: dict(counters) for host, counters in self._stats.items()}
+        for counters in stats.values():
+            sent = counters["requests"] - counters["errors"]
+            counters["connection_reuse_rate"] = max(0.0, 1 - counters["connections_opened"] / sent) if sent else 0.0
+        return stats
+
+# Process-wide pool shared by every integration
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_http_pool(config) -> HttpPool:
+    """Return the process-wide HTTP pool, creating it on first use."""
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = HttpPool(config)
+    return _shared_pool
@@ -0,0 +1,61 @@
+import re
+from typing import Optional
+
+# Letters that only occur in Vietnamese among the languages we serve
+VIETNAMESE_CHARS = set(
+    "ăâđêôơư"
+    "àảãáạằẳẵắặầẩẫấậ"
+    "èẻẽéẹềểễếệ"
+    "ìỉĩíị"
+    "òỏõóọồổỗốộờởỡớợ"
+    "ùủũúụừửữứự"
+    "ỳỷỹýỵ"
+)
+
+# Frequent English function words and chat openers. Words that are also common in unaccented
+# Vietnamese ("to", "do", "an", "me", "no", "may", "can", "on", "it", ...), Spanish ("a", "no",
+# "me", "he", "has") or German ("was", "in", "an", "am", "will") are left out on purpose.
+ENGLISH_STOPWORDS = {
+    "the", "is", "are", "were", "been", "does", "did",
+    "what", "which", "who", "whom", "whose", "when", "where", "why", "how",
+    "i", "you", "your", "she", "its", "we", "our", "they", "their", "this", "that", "these", "those",
+    "of", "for", "from", "with", "about", "into", "and", "not",
+    "could", "should", "would", "might", "have", "had", "there",
+    "hi", "hello", "hey", "thanks", "thank", "please", "yes", "bye",
+}
+
+# Fewer words than this are only English when every word is an English function word
+MIN_ENGLISH_WORDS = 4
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+def detect_language_locally(text: str) -> Optional[str]:
+    """
+    Identify obviously English or obviously Vietnamese text without calling an LLM.
+
+    Args:
+        text: The text to detect language for
+
+    Returns:
+        'en' or 'vi' when the heuristics are confident, otherwise None
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return None
+
+    # Vietnamese: a sizeable share of words carry Vietnamese-only letters
+    vietnamese_words = sum(1 for word in words if any(char in VIETNAMESE_CHARS for char in word))
+    if vietnamese_words / len(words) >= 0.3:
+        return "vi"
+
+    # English: plain ASCII that is unambiguously English. Unaccented Vietnamese, Spanish or German
+    # misread as English would skip the translation, so anything doubtful goes to the LLM.
+    if vietnamese_words == 0 and all(word.isascii() for word in words):
+        stopwords = [word for word in words if word in ENGLISH_STOPWORDS]
+        if len(words) < MIN_ENGLISH_WORDS:
+            if len(stopwords) == len(words):
+                return "en"
+        elif len(set(stopwords)) >= 2 and len(stopwords) / len(words) >= 0.3:
+            return "en"
+
+    return None
@@ -1,7 +1,8 @@
 import os
 import time
 import logging
-from typing import List, Optional, Dict, Any
+import threading
+from typing import List, Optional, Dict, Any, Tuple
 
 from .doc_parser import MedicalDocParser
 from .content_processor import ContentProcessor
@@ -9,6 +10,9 @@ from .vectorstore_qdrant import VectorStore
 from .reranker import Reranker
 from .query_expander import QueryExpander
 from .response_generator import ResponseGenerator
+from .semantic_cache import get_semantic_cache, mark_ingestion
+from .ingestion_pipeline import IngestionPipeline
+from .ingestion_manifest import IngestionManifest
 
 class MedicalRAG:
     """
@@ -31,18 +35,31 @@ class MedicalRAG:
         self.reranker = Reranker(config)
         self.query_expander = QueryExpander(config)
         self.response_generator = ResponseGenerator(config)
+        self.semantic_cache = get_semantic_cache(config) if config.rag.use_semantic_cache else None
         self.parsed_content_dir = self.config.rag.parsed_content_dir
+        # Content hashes of ingested files and their chunks, for incremental re-ingestion
+        self.manifest = IngestionManifest(self.config.rag.ingestion_manifest_path, self.config.rag.ingestion_data_root)
+        # The embedded (on-disk) Qdrant client must not be used by several threads at once
+        self._retrieval_lock = threading.Lock()
     
-    def ingest_directory(self, directory_path: str) -> Dict[str, Any]:
+    def ingest_directory(self, directory_path: str, workers: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
         """
         Ingest all files in a directory into the RAG system.
+
+        Files whose content is unchanged since their last ingestion are skipped, and the
+        chunks of files that were removed from the directory are deleted.
         
         Args:
             directory_path: Path to the directory containing files to ingest
+            workers: Parsing processes, more than one runs the staged ingestion pipeline
+                (defaults to config.rag.ingestion_workers)
+            force: Re-ingest unchanged files as well, and delete chunks that are not recorded
+                in the manifest (see `remove_unmanaged_chunks`)
             
         Returns:
             Dictionary with ingestion results
         """
+        workers = workers or self.config.rag.ingestion_workers
         start_time = time.time()
         self.logger.info(f"Ingesting files from directory: {directory_path}")
         
@@ -50,33 +67,78 @@ class MedicalRAG:
             # Check if directory exists
             if not os.path.isdir(directory_path):
                 raise ValueError(f"Directory not found: {directory_path}")
+
+            self.remove_unmanaged_chunks(force)
             
             # Get all files in the directory
             files = [os.path.join(directory_path + '/', f) for f in os.listdir(directory_path) 
                      if os.path.isfile(os.path.join(directory_path, f))]
+
+            # Delete the chunks of files that are no longer in the directory
+            present = {self.manifest.source_key(f) for f in files}
+            removed_sources = [source for source in self.manifest.sources_in(directory_path) if self.manifest.source_key(source) not in present]
+            for source in removed_sources:
+                self.logger.info(f"Removing chunks of deleted file: {source}")
+                self.vector_store.delete_chunks(self.manifest.chunk_ids(source))
+                self.manifest.remove(source)
+            if removed_sources:
+                self._invalidate_cached_answers()
             
             if not files:
                 self.logger.warning(f"No files found in directory: {directory_path}")
                 return {
                     "success": True,
                     "documents_ingested": 0,
+                    "documents_removed": len(removed_sources),
                     "chunks_processed": 0,
                     "processing_time": time.time() - start_time
                 }
             
+            if workers > 1:
+                # Only changed and new files enter the pipeline
+                file_hashes = {f: self.manifest.file_hash(f) for f in files}
+                changed_files = [f for f in files if force or self.manifest.content_hash(f) != file_hashes[f]]
+                self.logger.info(f"{len(changed_files)} of {len(files)} files are new or changed")
+
+                pipeline = IngestionPipeline(
+                    self,
+                    workers=workers,
+                    llm_workers=self.config.rag.ingestion_llm_workers,
+                    max_pending_documents=self.config.rag.ingestion_max_pending_documents,
+                    write_batch_size=self.config.rag.ingestion_write_batch_size
+                )
+                result = pipeline.run(changed_files, file_hashes) if changed_files else {}
+
+                if result.get("documents_ingested"):
+                    self._invalidate_cached_answers()
+                return {
+                    "success": True,
+                    "documents_ingested": 0,
+                    "failed_documents": 0,
+                    "failed_files": [],
+                    "chunks_processed": 0,
+                    **result,
+                    "documents_skipped": len(files) - len(changed_files),
+                    "documents_removed": len(removed_sources),
+                    "processing_time": time.time() - start_time
+                }
+
             # Track statistics
             total_chunks_processed = 0
             successful_ingestions = 0
+            skipped_ingestions = 0
             failed_ingestions = 0
             failed_files = []
             
             # Process each file
             for file_path in files:
-                self.logger.info(f"Processing file {successful_ingestions + failed_ingestions + 1}/{len(files)}: {file_path}")
+                self.logger.info(f"Processing file {successful_ingestions + skipped_ingestions + failed_ingestions + 1}/{len(files)}: {file_path}")
                 
                 try:
-                    result = self.ingest_file(file_path)
-                    if result["success"]:
+                    result = self.ingest_file(file_path, force=force)
+                    if result.get("skipped"):
+                        skipped_ingestions += 1
+                    elif result["success"]:
                         successful_ingestions += 1
                         total_chunks_processed += result.get("chunks_processed", 0)
                     else:
@@ -90,9 +152,12 @@ class MedicalRAG:
             return {
                 "success": True,
                 "documents_ingested": successful_ingestions,
+                "documents_skipped": skipped_ingestions,
+                "documents_removed": len(removed_sources),
                 "failed_documents": failed_ingestions,
                 "failed_files": failed_files,
                 "chunks_processed": total_chunks_processed,
+                **self.content_processor.stats(),
                 "processing_time": time.time() - start_time
             }
             
@@ -104,12 +169,16 @@ class MedicalRAG:
                 "processing_time": time.time() - start_time
             }
     
-    def ingest_file(self, document_path: str) -> Dict[str, Any]:
+    def ingest_file(self, document_path: str, force: bool = False) -> Dict[str, Any]:
         """
         Ingest a single file into the RAG system.
+
+        Callers ingesting files one by one run `remove_unmanaged_chunks` once beforehand;
+        `ingest_directory` does so itself.
         
         Args:
             document_path: Path to the file to ingest
+            force: Re-ingest the file even if its content is unchanged since the last ingestion
             
         Returns:
             Dictionary with ingestion results
@@ -118,6 +187,17 @@ class MedicalRAG:
         self.logger.info(f"Ingesting file: {document_path}")
 
         try:
+            file_hash = self.manifest.file_hash(document_path)
+            if not force and self.manifest.content_hash(document_path) == file_hash:
+                self.logger.info("   File is unchanged since its last ingestion, skipping")
+                return {
+                    "success": True,
+                    "skipped": True,
+                    "documents_ingested": 0,
+                    "chunks_processed": 0,
+                    "processing_time": time.time() - start_time
+                }
+
             # Step 1: Parse document
             self.logger.info("1. Parsing document and extracting images...")
             parsed_document, images = self.doc_parser.parse_document(document_path, self.parsed_content_dir)
@@ -139,10 +219,9 @@ class MedicalRAG:
 
             # Step 5: Create vector store and document store
             self.logger.info("5. Creating vector store knowledge base...")
-            self.vector_store.create_vectorstore(
-                document_chunks=document_chunks, 
-                document_path=document_path
-                )
+            self.store_documents([(document_chunks, document_path)], {document_path: file_hash})
+
+            self._invalidate_cached_answers()
             
             return {
                 "success": True,
@@ -159,6 +238,69 @@ class MedicalRAG:
                 "processing_time": time.time() - start_time
             }
         
+    def store_documents(self, documents: List[Tuple[List[str], str]], file_hashes: Dict[str, str]) -> int:
+        """
+        Write the chunks of ingested documents and update the manifest.
+
+        Chunk IDs are derived from the content, so chunks that are already stored are not
+        embedded again, and chunks of an earlier version of a file that are gone are deleted.
+
+        Args:
+            documents: (document chunks, document path) pairs
+            file_hashes: Content hash of every document path, as hashed before parsing
+
+        Returns:
+            Number of chunks written
+        """
+        previous_ids = {document_path: self.manifest.chunk_ids(document_path) for _chunks, document_path in documents}
+        stored_ids = {doc_id for doc_ids in previous_ids.values() for doc_id in doc_ids}
+        chunk_ids, written = self.vector_store.ingest_chunks(documents, skip_ids=stored_ids)
+
+        for (chunks, document_path), doc_ids in zip(documents, chunk_ids):
+            stale_ids = set(previous_ids[document_path]) - set(doc_ids)
+            if stale_ids:
+                self.vector_store.delete_chunks(list(stale_ids))
+            self.manifest.record(
+                document_path,
+                file_hashes[document_path],
+                {doc_id: self.manifest.chunk_hash(chunk) for doc_id, chunk in zip(doc_ids, chunks)}
+            )
+        return written
+
+    def remove_unmanaged_chunks(self, force: bool) -> None:
+        """
+        Handle a knowledge base built before the ingestion manifest existed.
+
+        Its chunks have random IDs that are not in the manifest, so ingesting the same files
+        again would add every chunk a second time. Incremental ingestion refuses to run on
+        such a collection; a forced ingestion deletes those chunks once and rebuilds.
+        This scrolls the whole collection, so it runs once per ingestion run, not per file.
+
+        Args:
+            force: Delete the unmanaged chunks instead of refusing
+
+        Raises:
+            ValueError: When unmanaged chunks exist and `force` is not set
+        """
+        unmanaged_ids = self.vector_store.unmanaged_chunk_ids(self.manifest.all_chunk_ids())
+        if not unmanaged_ids:
+            return
+        if not force:
+            raise ValueError(
+                f"The collection holds {len(unmanaged_ids)} chunks that are not recorded in the ingestion manifest "
+                "(ingested before incremental ingestion); ingesting incrementally would duplicate them. "
+                "Re-run with --force to delete them and rebuild the knowledge base from the ingested files."
+            )
+        self.logger.warning(f"Deleting {len(unmanaged_ids)} chunks that are not recorded in the ingestion manifest")
+        self.vector_store.delete_chunks(unmanaged_ids)
+        self._invalidate_cached_answers()
+
+    def _invalidate_cached_answers(self) -> None:
+        """Cached answers may be outdated now, in this and in every other process."""
+        mark_ingestion(self.config)
+        if self.semantic_cache:
+            self.semantic_cache.invalidate()
+
     def process_query(self, query: str, chat_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """
         Process a query with the RAG system.
@@ -175,6 +317,17 @@ class MedicalRAG:
         
         # Process query and return result, passing chat_history
         try:
+            # Step 0: Reuse the answer of a semantically equivalent earlier query
+            # (only after the same earlier conversation, follow-up questions depend on it)
+            query_vector = None
+            if self.semantic_cache and isinstance(query, str):
+                cache_context = self.semantic_cache.context_key(chat_history, query)
+                cached_response, query_vector = self.semantic_cache.lookup(query, cache_context)
+                if cached_response:
+                    cached_response["processing_time"] = time.time() - start_time
+                    return cached_response
+            cache_key = query
+
             # Step 1: Expand query
             self.logger.info(f"1. Expanding query: '{query}'")
             expansion_result = self.query_expander.expand_query(query)
@@ -185,12 +338,13 @@ class MedicalRAG:
 
             # Step 2: Retrieval
             self.logger.info(f"2. Retrieving relevant documents for the query: '{query}'")
-            vectorstore, docstore = self.vector_store.load_vectorstore()
-            retrieved_documents = self.vector_store.retrieve_relevant_chunks(
-                query=query,
-                vectorstore=vectorstore,
-                docstore=docstore,
-                )
+            with self._retrieval_lock:
+                vectorstore, docstore = self.vector_store.load_vectorstore()
+                retrieved_documents = self.vector_store.retrieve_relevant_chunks(
+                    query=query,
+                    vectorstore=vectorstore,
+                    docstore=docstore,
+                    )
 
             self.logger.info(f"   Retrieved {len(retrieved_documents)} relevant document chunks")
 
@@ -214,6 +368,10 @@ class MedicalRAG:
                 chat_history=chat_history
                 )
             
+            # Cache answers that are confident enough to be served
+            if query_vector is not None and response.get("confidence", 0.0) >= self.config.rag.min_retrieval_confidence:
+                self.semantic_cache.store(cache_key, query_vector, response, cache_context)
+
             # Add timing information
             processing_time = time.time() - start_time
             response["processing_time"] = processing_time
@@ -230,4 +388,97 @@ class MedicalRAG:
                 "sources": [],
                 "confidence": 0.0,
                 "processing_time": time.time() - start_time
-            }
\ No newline at end of file
+            }
+
+class RAGService:
+    """
+    Long-lived, thread-safe holder of a single MedicalRAG instance.
+
+    The RAG components (cross-encoder, Qdrant client, sparse encoder) are loaded once,
+    either eagerly by `warmup` at startup or lazily by the first query, so that per-query
+    cost is retrieval and generation only.
+    """
+    def __init__(self, config):
+        """
+        Initialize the service without loading any model.
+
+        Args:
+            config: Configuration object with RAG settings
+        """
+        self.logger = logging.getLogger(f"{self.__module__}")
+        self.config = config
+        self._rag = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._warming_up = False
+        self._error = None
+
+    def get(self) -> MedicalRAG:
+        """
+        Return the shared MedicalRAG instance, building it on first use.
+
+        Returns:
+            Initialized MedicalRAG
+        """
+        if self._rag is None:
+            with self._lock:
+                if self._rag is None:
+                    self._rag = MedicalRAG(self.config)
+        return self._rag
+
+    def warmup(self, background: bool = True) -> None:
+        """
+        Load the RAG models and open the vector store ahead of the first query.
+
+        Args:
+            background: Run in a daemon thread instead of blocking the caller
+        """
+        if background:
+            threading.Thread(target=self.warmup, kwargs={"background": False}, daemon=True).start()
+            return
+
+        self._warming_up = True
+        start_time = time.time()
+        try:
+            rag = self.get()
+            rag.vector_store.load_vectorstore()
+            # A first forward pass initializes the cross-encoder kernels
+            rag.reranker.model.predict([("warmup", "warmup")])
+            self._error = None
+            self._ready.set()
+            self.logger.info(f"RAG service ready in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            self._error = str(e)
+            self.logger.error(f"RAG service warmup failed: {e}")
+        finally:
+            self._warming_up = False
+
+    def is_ready(self) -> bool:
+        """Whether the models are loaded and the vector store is reachable."""
+        return self._ready.is_set()
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness information for health checks."""
+        return {
+            "ready": self.is_ready(),
+            "warming_up": self._warming_up,
+            "error": self._error
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Report readiness and retrieval cache usage."""
+        stats = self.status()
+        if self._rag is not None and self._rag.vector_store.chunk_cache:
+            stats["chunk_cache"] = self._rag.vector_store.chunk_cache.stats()
+        if self._rag is not None:
+            stats["reranker_backend"] = self._rag.reranker.backend
+            stats["retrieval"] = self._rag.vector_store.retrieval_stats()
+            stats["reranking"] = self._rag.reranker.stats()
+            stats["context"] = self._rag.response_generator.stats()
+        if self._rag is not None and self._rag.reranker.batcher:
+            stats["rerank_batching"] = self._rag.reranker.batcher.stats()
+        return stats
+
+    def process_query(self, query: str, chat_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """Process a query with the shared MedicalRAG instance."""
+        return self.get().process_query(query, chat_history=chat_history)
@@ -1,4 +1,5 @@
 import re
+import hashlib
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 
@@ -6,10 +7,49 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
 
+from .image_summary_cache import ImageSummaryCache
+from .image_filter import ImageFilter
+from .context_packer import load_token_encoding
+
+IMAGE_SUMMARY_PROMPT = """Describe the image in detail while keeping it concise and to the point. 
+                        For context, the image is part of either a medical research paper or a research paper
+                        demonstrating the use of artificial intelligence techniques like
+                        machine learning and deep learning in diagnosing diseases or a medical report.
+                        Be specific about graphs, such as bar plots if they are present in the image.
+                        Only summarize what is present in the image, without adding any extra detail or comment.
+                        Summarize the image only if it is related to the context, return 'non-informative' explicitly 
+                        if the image is of some button not relevant to the context."""
+
+# LLM-based semantic chunking
+CHUNKING_PROMPT = """
+You are an assistant specialized in splitting text into semantically consistent sections. 
+
+Following is the document text:
+<document>
+{document_text}
+</document>
+
+<instructions>
+Instructions:
+    1. The text has been divided into chunks, each marked with <|start_chunk_X|> and <|end_chunk_X|> tags, where X is the chunk number.
+    2. Identify points where splits should occur, such that consecutive chunks of similar themes stay together.
+    3. Each chunk must be between 256 and 512 words.
+    4. If chunks 1 and 2 belong together but chunk 3 starts a new topic, suggest a split after chunk 2.
+    5. The chunks must be listed in ascending order.
+    6. Provide your response in the form: 'split_after: 3, 5'.
+</instructions>
+
+Respond only with the IDs of the chunks where you believe a split should occur.
+YOU MUST RESPOND WITH AT LEAST ONE SPLIT.
+""".strip()
+
 class ContentProcessor:
     """
     Processes the parsed content - summarizes images, creates llm based semantic chunks
     """
+    IMAGE_PLACEHOLDER = "<!-- image_placeholder -->"
+    PAGE_BREAK_PLACEHOLDER = "<!-- page_break -->"
+
     def __init__(self, config):
         """
         Initialize the response generator.
@@ -20,10 +60,28 @@ class ContentProcessor:
         self.logger = logging.getLogger(__name__)
         self.summarizer_model = config.rag.summarizer_model     # temperature 0.5
         self.chunker_model = config.rag.chunker_model     # temperature 0.0
+        self.summary_concurrency = config.rag.image_summary_concurrency
+        self.summary_cache = None
+        if config.rag.image_summary_cache_path:
+            deployment = getattr(self.summarizer_model, "deployment_name", None) or ""
+            prompt_hash = hashlib.sha256(IMAGE_SUMMARY_PROMPT.encode("utf-8")).hexdigest()[:12]
+            self.summary_cache = ImageSummaryCache(config.rag.image_summary_cache_path, namespace=f"{deployment}:{prompt_hash}")
+        self.image_filter = ImageFilter(config) if config.rag.image_prefilter else None
+        self.chunking_mode = config.rag.chunking_mode
+        self.chunking_window_tokens = config.rag.chunking_window_tokens
+        self.chunking_window_overlap = config.rag.chunking_window_overlap
+        self.chunking_concurrency = config.rag.chunking_concurrency
+        self.chunk_size = config.rag.chunk_size
+        self.chunk_overlap = config.rag.chunk_overlap
+        self.encoding = load_token_encoding(None, config.rag.context_tokenizer_encoding)
     
     def summarize_images(self, images: List[str]) -> List[str]:
         """
         Summarize images using the provided model, with error handling.
+
+        Tiny and blank images, and images matching a known 'non-informative' one, are screened
+        out locally without an LLM call; see `ImageFilter`. Only byte-identical images share a
+        summary.
         
         Args:
             images: List of image paths
@@ -31,21 +89,66 @@ class ContentProcessor:
         Returns:
             List of image summaries, with placeholders for failed images
         """
-        
-        prompt_template = """Describe the image in detail while keeping it concise and to the point. 
-                        For context, the image is part of either a medical research paper or a research paper
-                        demonstrating the use of artificial intelligence techniques like
-                        machine learning and deep learning in diagnosing diseases or a medical report.
-                        Be specific about graphs, such as bar plots if they are present in the image.
-                        Only summarize what is present in the image, without adding any extra detail or comment.
-                        Summarize the image only if it is related to the context, return 'non-informative' explicitly 
-                        if the image is of some button not relevant to the context."""
+        if not images or not self.image_filter:
+            return self._summarize_distinct(images)
 
+        verdicts = self.image_filter.screen(images)
+        kept = [index for index, verdict in enumerate(verdicts) if verdict.reason is None]
+        results = ["non-informative"] * len(images)
+        for index, summary in zip(kept, self._summarize_distinct([images[index] for index in kept])):
+            results[index] = summary
+        self.image_filter.remember_non_informative([
+            verdicts[index].phash for index in kept
+            if verdicts[index].phash is not None and results[index].strip().lower() == "non-informative"
+        ])
+        self.logger.info(f"Pre-filter skipped {len(images) - len(kept)} of {len(images)} images")
+        return results
+
+    def _summarize_distinct(self, images: List[str]) -> List[str]:
+        """
+        Summarize images with the vision model.
+
+        Identical images are summarized once (and served from the persistent cache on later
+        runs); the remaining images are summarized concurrently. Rate limits and transient
+        errors are retried by the summarizer client (see `max_retries` in the configuration).
+        """
+        if not images:
+            return []
+
+        # Deduplicate by content hash, the image string itself without a cache
+        keys = [self.summary_cache.make_key(image) for image in images] if self.summary_cache else list(images)
+        unique_images = dict(zip(keys, images))
+        summaries = self.summary_cache.get_many(list(unique_images)) if self.summary_cache else {}
+        pending = [key for key in unique_images if key not in summaries]
+
+        if pending:
+            outputs = self._summary_chain().batch(
+                [{"image": unique_images[key]} for key in pending],
+                config={"max_concurrency": self.summary_concurrency},
+                return_exceptions=True
+            )
+            fresh = {}
+            for key, output in zip(pending, outputs):
+                if isinstance(output, Exception):
+                    # Log the error if needed
+                    print(f"Error processing image: {str(output)}")
+                    continue
+                fresh[key] = output
+            if self.summary_cache:
+                self.summary_cache.put_many(fresh)
+            summaries.update(fresh)
+
+        self.logger.info(f"Summarized {len(pending)} of {len(unique_images)} distinct images ({len(images)} in the document)")
+        # Add placeholder for the failed images
+        return [summaries.get(key, "no image summary") for key in keys]
+
+    def _summary_chain(self):
+        """Vision chain that summarizes one image."""
         messages = [
             (
                 "user",
                 [
-                    {"type": "text", "text": prompt_template},
+                    {"type": "text", "text": IMAGE_SUMMARY_PROMPT},
                     {
                         "type": "image_url",
                         "image_url": {"url": "{image}"},
@@ -55,20 +158,14 @@ class ContentProcessor:
         ]
 
         prompt = ChatPromptTemplate.from_messages(messages)
-        summary_chain = prompt | self.summarizer_model | StrOutputParser()
-        
-        results = []
-        for image in images:
-            try:
-                summary = summary_chain.invoke({"image": image})
-                results.append(summary)
-            except Exception as e:
-                # Log the error if needed
-                print(f"Error processing image: {str(e)}")
-                # Add placeholder for the failed image
-                results.append("no image summary")
-        
-        return results
+        return prompt | self.summarizer_model | StrOutputParser()
+
+    def stats(self) -> Dict[str, Any]:
+        """Report the image summary cache and pre-filter counters."""
+        return {
+            "image_summary_cache": self.summary_cache.stats() if self.summary_cache else None,
+            "image_prefilter": self.image_filter.stats() if self.image_filter else None
+        }
     
     def format_document_with_images(self, parsed_document: Any, image_summaries: List[str]) -> str:
         """
@@ -81,21 +178,36 @@ class ContentProcessor:
         Returns:
             Formatted document text with image summaries
         """
-        IMAGE_PLACEHOLDER = "<!-- image_placeholder -->"
-        PAGE_BREAK_PLACEHOLDER = "<!-- page_break -->"
-        
-        formatted_parsed_document = parsed_document.export_to_markdown(
-            page_break_placeholder=PAGE_BREAK_PLACEHOLDER, 
-            image_placeholder=IMAGE_PLACEHOLDER
-        )
-        
-        formatted_document = self._replace_occurrences(
-            formatted_parsed_document, 
-            IMAGE_PLACEHOLDER, 
-            image_summaries
+        return self.format_markdown_with_images(self.export_markdown(parsed_document), image_summaries)
+
+    @staticmethod
+    def export_markdown(parsed_document: Any) -> str:
+        """
+        Export a parsed document to markdown with image and page break placeholders.
+
+        Args:
+            parsed_document: Parsed document from doc_parser
+
+        Returns:
+            Markdown text, also picklable for parsing in worker processes
+        """
+        return parsed_document.export_to_markdown(
+            page_break_placeholder=ContentProcessor.PAGE_BREAK_PLACEHOLDER,
+            image_placeholder=ContentProcessor.IMAGE_PLACEHOLDER
         )
-        
-        return formatted_document
+
+    def format_markdown_with_images(self, markdown: str, image_summaries: List[str]) -> str:
+        """
+        Replace the image placeholders of an exported document with image summaries.
+
+        Args:
+            markdown: Output of `export_markdown`
+            image_summaries: List of image summaries
+
+        Returns:
+            Formatted document text with image summaries
+        """
+        return self._replace_occurrences(markdown, self.IMAGE_PLACEHOLDER, image_summaries)
     
     def _replace_occurrences(self, text: str, target: str, replacements: List[str]) -> str:
         """
@@ -129,10 +241,14 @@ class ContentProcessor:
     def chunk_document(self, formatted_document: str) -> List[str]:
         """
         Split the document into semantic chunks.
+
+        Documents that fit into one chunking window are split with a single LLM call. Longer
+        documents are cut into overlapping windows of sections whose split points are requested
+        concurrently and reconciled at the window boundaries. In "local" mode, or when the LLM
+        is unavailable, the local splitter is used instead.
         
         Args:
             formatted_document: Formatted document text
-            model: AzureChatOpenAI model instance (will create one if not provided)
             
         Returns:
             List of document chunks
@@ -142,40 +258,165 @@ class ContentProcessor:
         SPLIT_PATTERN = "\n#"
         chunks = formatted_document.split(SPLIT_PATTERN)
         
-        chunked_text = ""
+        sections = []
         for i, chunk in enumerate(chunks):
             if chunk.startswith("#"):
                 chunk = f"#{chunk}"  # add the # back to the chunk
-            chunked_text += f"<|start_chunk_{i}|>\n{chunk}\n<|end_chunk_{i}|>\n"
-        
-        # LLM-based semantic chunking
-        CHUNKING_PROMPT = """
-        You are an assistant specialized in splitting text into semantically consistent sections. 
-        
-        Following is the document text:
-        <document>
-        {document_text}
-        </document>
-        
-        <instructions>
-        Instructions:
-            1. The text has been divided into chunks, each marked with <|start_chunk_X|> and <|end_chunk_X|> tags, where X is the chunk number.
-            2. Identify points where splits should occur, such that consecutive chunks of similar themes stay together.
-            3. Each chunk must be between 256 and 512 words.
-            4. If chunks 1 and 2 belong together but chunk 3 starts a new topic, suggest a split after chunk 2.
-            5. The chunks must be listed in ascending order.
-            6. Provide your response in the form: 'split_after: 3, 5'.
-        </instructions>
-        
-        Respond only with the IDs of the chunks where you believe a split should occur.
-        YOU MUST RESPOND WITH AT LEAST ONE SPLIT.
-        """.strip()
-        
-        formatted_chunking_prompt = CHUNKING_PROMPT.format(document_text=chunked_text)
-        chunking_response = self.chunker_model.invoke(formatted_chunking_prompt).content
-        
-        return self._split_text_by_llm_suggestions(chunked_text, chunking_response)
-    
+            sections.append(chunk)
+
+        if self.chunking_mode == "local":
+            return self._split_locally(sections)
+
+        section_tokens = [self._count_tokens(section) for section in sections]
+        try:
+            if sum(section_tokens) <= self.chunking_window_tokens:
+                chunked_text = self._mark_sections(sections, range(len(sections)))
+                chunking_response = self.chunker_model.invoke(CHUNKING_PROMPT.format(document_text=chunked_text)).content
+                return self._split_text_by_llm_suggestions(chunked_text, chunking_response)
+            return self._chunk_in_windows(sections, section_tokens)
+        except Exception as e:
+            self.logger.warning(f"LLM chunking failed, splitting locally: {e}")
+            return self._split_locally(sections)
+
+    @staticmethod
+    def _mark_sections(sections: List[str], section_ids) -> str:
+        """Wrap sections in numbered chunk markers (numbers are positions in the whole document)."""
+        return "".join(f"<|start_chunk_{i}|>\n{sections[i]}\n<|end_chunk_{i}|>\n" for i in section_ids)
+
+    def _count_tokens(self, text: str) -> int:
+        if self.encoding is None:
+            return (len(text) + 3) // 4
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _build_windows(self, section_tokens: List[int]) -> List[Tuple[int, int]]:
+        """
+        Group consecutive sections into windows of at most `chunking_window_tokens` tokens.
+
+        Returns:
+            (first section, end section) ranges; each window repeats the last
+            `chunking_window_overlap` sections of the previous one
+        """
+        windows = []
+        start = 0
+        while start < len(section_tokens):
+            end, tokens = start, 0
+            while end < len(section_tokens) and (end == start or tokens + section_tokens[end] <= self.chunking_window_tokens):
+                tokens += section_tokens[end]
+                end += 1
+            windows.append((start, end))
+            if end >= len(section_tokens):
+                break
+            start = max(end - self.chunking_window_overlap, start + 1)
+        return windows
+
+    def _chunk_in_windows(self, sections: List[str], section_tokens: List[int]) -> List[str]:
+        """
+        Split a long document with one concurrent LLM call per window.
+
+        Where two windows overlap, each window decides the split points in the half of the
+        overlap next to its own interior, since it sees more context there. Windows whose
+        call fails are split locally by token count.
+        """
+        windows = self._build_windows(section_tokens)
+        # Range of split points each window is responsible for
+        boundaries = [0] + [
+            (windows[k + 1][0] + windows[k][1]) // 2 for k in range(len(windows) - 1)
+        ] + [len(sections)]
+
+        prompts = [CHUNKING_PROMPT.format(document_text=self._mark_sections(sections, range(start, end))) for start, end in windows]
+        responses = self.chunker_model.batch(
+            prompts, config={"max_concurrency": self.chunking_concurrency}, return_exceptions=True
+        )
+        if all(isinstance(response, Exception) for response in responses):
+            raise responses[0]
+
+        split_after = set()
+        for k, ((start, end), response) in enumerate(zip(windows, responses)):
+            owned = range(max(start, boundaries[k]), min(end, boundaries[k + 1]))
+            if isinstance(response, Exception):
+                self.logger.warning(f"Chunking window {k + 1}/{len(windows)} failed, splitting it locally: {response}")
+                split_after.update(self._local_split_points(section_tokens, owned))
+                continue
+            # Ignore split points outside the window (the model only saw these sections)
+            split_after.update(point for point in self._parse_split_points(response.content) if point in owned)
+
+        self.logger.info(f"Chunked {len(sections)} sections in {len(windows)} windows")
+        return self._group_sections(sections, split_after)
+
+    def _local_split_points(self, section_tokens: List[int], section_ids) -> List[int]:
+        """Split points that close a chunk once it reaches `chunk_size` tokens."""
+        points = []
+        tokens = 0
+        for i in section_ids:
+            tokens += section_tokens[i]
+            if tokens >= self.chunk_size:
+                points.append(i)
+                tokens = 0
+        return points
+
+    @staticmethod
+    def _group_sections(sections: List[str], split_after) -> List[str]:
+        """Join consecutive sections into chunks, ending a chunk after every split point."""
+        grouped = []
+        current_section = []
+        for i, section in enumerate(sections):
+            current_section.append(f"\n{section}\n")
+            if i in split_after:
+                grouped.append("".join(current_section).strip())
+                current_section = []
+        if current_section:
+            grouped.append("".join(current_section).strip())
+        return [chunk for chunk in grouped if chunk]
+
+    def _split_locally(self, sections: List[str]) -> List[str]:
+        """
+        Split a document without the LLM.
+
+        Sections (which start at headings) are merged until a chunk would exceed `chunk_size`
+        tokens; a section longer than that is cut into `chunk_size` token pieces that overlap
+        by `chunk_overlap` tokens.
+
+        Args:
+            sections: Document sections split at headings
+
+        Returns:
+            List of document chunks
+        """
+        chunks = []
+        current, current_tokens = [], 0
+        for section in sections:
+            tokens = self._count_tokens(section)
+            if current and current_tokens + tokens > self.chunk_size:
+                chunks.append("\n".join(current).strip())
+                current, current_tokens = [], 0
+            if tokens > self.chunk_size:
+                chunks.extend(self._split_by_tokens(section))
+                continue
+            current.append(section)
+            current_tokens += tokens
+        if current:
+            chunks.append("\n".join(current).strip())
+        return [chunk for chunk in chunks if chunk]
+
+    def _split_by_tokens(self, text: str) -> List[str]:
+        """Cut a text into overlapping pieces of `chunk_size` tokens."""
+        step = max(1, self.chunk_size - self.chunk_overlap)
+        if self.encoding is None:
+            # Character windows at the same 4 characters per token estimate as `_count_tokens`
+            return [text[start:start + self.chunk_size * 4].strip() for start in range(0, len(text), step * 4)]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return [
+            self.encoding.decode(tokens[start:start + self.chunk_size]).strip()
+            for start in range(0, max(1, len(tokens) - self.chunk_overlap), step)
+        ]
+
+    @staticmethod
+    def _parse_split_points(llm_response: str) -> List[int]:
+        """Read the chunk IDs from a 'split_after: 3, 5' answer."""
+        if "split_after:" not in llm_response:
+            return []
+        return [int(point) for point in re.findall(r"\d+", llm_response.split("split_after:")[1])]
+
     def _split_text_by_llm_suggestions(self, chunked_text: str, llm_response: str) -> List[str]:
         """
         Split text according to LLM suggested split points.
@@ -188,10 +429,7 @@ class ContentProcessor:
             List of document chunks
         """
         # Extract split points from LLM response
-        split_after = [] 
-        if "split_after:" in llm_response:
-            split_points = llm_response.split("split_after:")[1].strip()
-            split_after = [int(x.strip()) for x in split_points.replace(',', ' ').split()] 
+        split_after = self._parse_split_points(llm_response)
 
         # If no splits were suggested, return the whole text as one section
         if not split_after:
@@ -0,0 +1,138 @@
+import re
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+def load_token_encoding(model_name: Optional[str], default_encoding: str):
+    """
+    Load the tiktoken encoding of a model, or the given default encoding.
+
+    Args:
+        model_name: Name of the model, None to use the default encoding
+        default_encoding: tiktoken encoding used when the model is unknown to tiktoken
+
+    Returns:
+        The encoding, or None when tiktoken is unavailable (callers estimate from characters)
+    """
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model_name) if model_name else tiktoken.get_encoding(default_encoding)
+        except KeyError:
+            return tiktoken.get_encoding(default_encoding)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Tokenizer unavailable, estimating token counts from characters: {e}")
+        return None
+
+class ContextPacker:
+    """
+    Packs retrieved chunks into a context that fits a token budget.
+
+    Chunks are deduplicated (exact and near-duplicate overlaps), ranked by relevance score
+    and added until the budget is spent; the first chunk that does not fit is truncated
+    when enough room is left.
+    """
+    SEPARATOR = "\n\n===DOCUMENT SECTION===\n\n"
+
+    def __init__(self, config, model_name: Optional[str] = None):
+        """
+        Initialize the packer.
+
+        Args:
+            config: Configuration object with RAG settings
+            model_name: Name of the response model, used to pick its tokenizer
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_tokens = config.rag.max_context_length
+        self.dedup_threshold = config.rag.context_dedup_threshold
+        self.min_partial_tokens = config.rag.context_min_partial_tokens
+        self.encoding = load_token_encoding(model_name, config.rag.context_tokenizer_encoding)
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens of a text."""
+        if self.encoding is None:
+            return (len(text) + 3) // 4
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Cut a text down to at most `max_tokens` tokens."""
+        if self.encoding is None:
+            return text[:max_tokens * 4]
+        return self.encoding.decode(self.encoding.encode(text, disallowed_special=())[:max_tokens])
+
+    @staticmethod
+    def _relevance(doc: Dict[str, Any]) -> float:
+        """Best available relevance score of a chunk."""
+        return doc.get("combined_score", doc.get("rerank_score", doc.get("score", 0.0)))
+
+    @staticmethod
+    def _shingles(text: str) -> set:
+        """Word 5-grams used to detect overlapping chunks."""
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < 5:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + 5]) for i in range(len(words) - 4)}
+
+    def _deduplicate(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop chunks that repeat, or mostly overlap with, a more relevant chunk (docs are sorted by relevance)."""
+        kept, kept_shingles, seen_hashes = [], [], set()
+        for doc in docs:
+            content = doc["content"].strip()
+            content_hash = hashlib.sha256(" ".join(content.split()).encode("utf-8")).hexdigest()
+            if content_hash in seen_hashes:
+                continue
+            shingles = self._shingles(content)
+            # Overlap relative to the smaller chunk, so a chunk contained in another counts as a duplicate
+            if any(
+                len(shingles & other) / max(1, min(len(shingles), len(other))) >= self.dedup_threshold
+                for other in kept_shingles
+            ):
+                continue
+            seen_hashes.add(content_hash)
+            kept_shingles.append(shingles)
+            kept.append(doc)
+        return kept
+
+    def pack(self, docs: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Build the context for the response prompt.
+
+        Args:
+            docs: Reranked document dictionaries with content and scores
+
+        Returns:
+            Tuple of (context string, documents included in the context, packing report)
+        """
+        ranked = sorted(docs, key=self._relevance, reverse=True)
+        unique = self._deduplicate(ranked)
+
+        separator_tokens = self.count_tokens(self.SEPARATOR)
+        sections, packed_docs = [], []
+        used_tokens = 0
+        truncated = 0
+        for doc in unique:
+            cost = self.count_tokens(doc["content"]) + (separator_tokens if sections else 0)
+            remaining = self.max_tokens - used_tokens
+            if cost <= remaining:
+                sections.append(doc["content"])
+                packed_docs.append(doc)
+                used_tokens += cost
+                continue
+            # Fill the leftover room with the beginning of the next most relevant chunk
+            room = remaining - (separator_tokens if sections else 0)
+            if room >= self.min_partial_tokens:
+                sections.append(self._truncate(doc["content"], room))
+                packed_docs.append(doc)
+                used_tokens += room + (separator_tokens if len(sections) > 1 else 0)
+                truncated += 1
+            break
+
+        report = {
+            "context_tokens": used_tokens,
+            "max_context_tokens": self.max_tokens,
+            "chunks_retrieved": len(docs),
+            "chunks_duplicate": len(docs) - len(unique),
+            "chunks_packed": len(packed_docs),
+            "chunks_truncated": truncated
+        }
+        return self.SEPARATOR.join(sections), packed_docs, report
@@ -0,0 +1,145 @@
+import io
+import os
+import base64
+import logging
+import threading
+from typing import Dict, Any, List, Optional, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+class ImageVerdict(NamedTuple):
+    """Outcome of the pre-filter for one image."""
+    reason: Optional[str]  # Why the image is skipped, None to summarize it
+    phash: Optional[int]  # Perceptual hash, None when the image could not be decoded
+
+class ImageFilter:
+    """
+    Cheap local screening of extracted figures before they are sent to the vision model.
+
+    Images are skipped when they are tiny, nearly blank (one dominant color with nothing drawn
+    across the image, so line art and binarized diagrams are kept), or perceptually identical to an image the summarizer judged 'non-informative' before (logos
+    and decoration repeated across documents). Perceptual similarity never stands in for a
+    summary: adjacent scan slices or charts sharing a template look alike but differ in content.
+    """
+    SKIP_REASONS = ("too_small", "low_entropy", "dominant_color", "known_non_informative")
+    INK_BANDS = 16  # Horizontal and vertical bands the image is split into to see where it is drawn on
+
+    def __init__(self, config):
+        """
+        Initialize the filter.
+
+        Args:
+            config: Configuration object with RAG settings
+        """
+        self.logger = logging.getLogger(__name__)
+        self.min_side = config.rag.image_filter_min_side
+        self.min_entropy = config.rag.image_filter_min_entropy
+        self.max_dominant_color = config.rag.image_filter_max_dominant_color
+        self.min_ink_bands = config.rag.image_filter_min_ink_bands
+        self.max_hash_distance = config.rag.image_filter_max_hash_distance
+        self._non_informative_hashes = []  # Perceptual hashes of images the summarizer called non-informative
+        self._lock = threading.Lock()
+        self.counters = {"images": 0, **{reason: 0 for reason in self.SKIP_REASONS}}
+
+    @staticmethod
+    def _load(image: str) -> Image.Image:
+        """Decode an image given as a data URI or a file path."""
+        if image.startswith("data:"):
+            return Image.open(io.BytesIO(base64.b64decode(image.split(",", 1)[1])))
+        if os.path.isfile(image):
+            return Image.open(image)
+        raise ValueError("Unsupported image reference")
+
+    @staticmethod
+    def _perceptual_hash(gray: Image.Image) -> int:
+        """64-bit difference hash: brightness gradients of a 9x8 thumbnail."""
+        pixels = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+        return int("".join("1" if bit else "0" for bit in bits), 2)
+
+    def _is_near(self, phash: int, hashes: List[int]) -> Optional[int]:
+        """Position of the first hash within the distance threshold, None if there is none."""
+        for position, other in enumerate(hashes):
+            if bin(phash ^ other).count("1") <= self.max_hash_distance:
+                return position
+        return None
+
+    def _ink_bands(self, ink: np.ndarray) -> int:
+        """Number of bands along one axis that contain any drawn pixel."""
+        return sum(1 for band in np.array_split(ink, self.INK_BANDS) if band.any())
+
+    def _check(self, image: Image.Image) -> Optional[str]:
+        """Size and blankness checks of a decoded image; returns the skip reason."""
+        if min(image.size) < self.min_side:
+            return "too_small"
+
+        # Share of the most frequent color, with 4 bits per channel
+        rgb = np.asarray(image.convert("RGB"), dtype=np.uint16) >> 4
+        colors = (rgb[..., 0] << 8) | (rgb[..., 1] << 4) | rgb[..., 2]
+        counts = np.bincount(colors.ravel())
+        if counts.max() / colors.size < self.max_dominant_color:
+            return None
+
+        # Line art is also mostly background, but it is drawn across the image in both
+        # directions, unlike blank pages, plain fills and separator rules
+        ink = colors != counts.argmax()
+        if min(self._ink_bands(ink.any(axis=1)), self._ink_bands(ink.any(axis=0))) >= self.min_ink_bands:
+            return None
+
+        gray = np.asarray(image.convert("L"))
+        histogram = np.bincount(gray.ravel(), minlength=256) / gray.size
+        nonzero = histogram[histogram > 0]
+        if float(-(nonzero * np.log2(nonzero)).sum()) < self.min_entropy:
+            return "low_entropy"
+        return "dominant_color"
+
+    def screen(self, images: List[str]) -> List[ImageVerdict]:
+        """
+        Decide which images of a document need a vision summary.
+
+        Args:
+            images: Images of one document (data URIs or file paths)
+
+        Returns:
+            One verdict per image; images that cannot be decoded are kept for the summarizer
+        """
+        verdicts = []
+        with self._lock:
+            known_non_informative = list(self._non_informative_hashes)
+
+        for index, image_ref in enumerate(images):
+            try:
+                image = self._load(image_ref)
+                image.load()
+            except Exception as e:
+                self.logger.debug(f"Could not decode image {index}, keeping it: {e}")
+                verdicts.append(ImageVerdict(None, None))
+                continue
+
+            reason = self._check(image)
+            phash = self._perceptual_hash(image.convert("L")) if reason is None else None
+            if reason is None and self._is_near(phash, known_non_informative) is not None:
+                reason = "known_non_informative"
+            verdicts.append(ImageVerdict(reason, phash))
+
+        with self._lock:
+            self.counters["images"] += len(images)
+            for verdict in verdicts:
+                if verdict.reason:
+                    self.counters[verdict.reason] += 1
+        return verdicts
+
+    def remember_non_informative(self, phashes: List[int]) -> None:
+        """Skip perceptually identical images from now on."""
+        with self._lock:
+            for phash in phashes:
+                if self._is_near(phash, self._non_informative_hashes) is None:
+                    self._non_informative_hashes.append(phash)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report how many images were screened and why they were skipped."""
+        with self._lock:
+            counters = dict(self.counters)
+        skipped = sum(counters[reason] for reason in self.SKIP_REASONS)
+        return {**counters, "skipped": skipped, "skip_rate": skipped / counters["images"] if counters["images"] else 0.0}
@@ -0,0 +1,106 @@
+import os
+import base64
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+class ImageSummaryCache:
+    """
+    Persistent image summary store keyed by the hash of the image bytes.
+
+    Identical figures (logos, repeated diagrams) are summarized once, across documents and
+    ingestion runs. Keys include the summarizer deployment and prompt, so changing either
+    does not reuse old summaries.
+    """
+    def __init__(self, db_path: str, namespace: str = ""):
+        """
+        Open (or create) the cache.
+
+        Args:
+            db_path: Path of the SQLite database file
+            namespace: Summarizer deployment and prompt the summaries belong to
+        """
+        self.logger = logging.getLogger(__name__)
+        self.namespace = namespace
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS image_summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, image: str) -> str:
+        """
+        Build the cache key of an image.
+
+        Args:
+            image: Image as a data URI (as extracted by the document parser) or a file path
+
+        Returns:
+            Hash of the image bytes combined with the namespace
+        """
+        if image.startswith("data:") and "," in image:
+            image_bytes = base64.b64decode(image.split(",", 1)[1])
+        elif os.path.isfile(image):
+            with open(image, "rb") as f:
+                image_bytes = f.read()
+        else:
+            image_bytes = image.encode("utf-8")
+        return f"{hashlib.sha256(image_bytes).hexdigest()}:{self.namespace}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Look up summaries.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of the keys found to their summaries
+        """
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT key, summary FROM image_summaries WHERE key IN ({placeholders})", batch
+                ).fetchall())
+            self.hits += len([key for key in keys if key in found])
+            self.misses += len([key for key in keys if key not in found])
+        return found
+
+    def put_many(self, summaries: Dict[str, str]) -> None:
+        """
+        Store summaries.
+
+        Args:
+            summaries: Mapping of cache key to summary
+        """
+        if not summaries:
+            return
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO image_summaries (key, summary) VALUES (?, ?)",
+                    list(summaries.items()),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error persisting image summaries: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache size and hit/miss counters."""
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM image_summaries").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -0,0 +1,128 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Set
+
+def source_key(document_path: str, data_root: str) -> str:
+    """
+    Key of a source file: its path relative to the data root, with forward slashes.
+
+    Keys do not depend on where the checkout lives or how the path was spelled.
+    """
+    return os.path.relpath(os.path.abspath(document_path), os.path.abspath(data_root)).replace(os.sep, "/")
+
+class IngestionManifest:
+    """
+    Record of what is in the knowledge base: a content hash per source file and the IDs
+    and content hashes of its chunks.
+
+    Unchanged files are skipped on re-ingestion, and the chunks of changed or removed
+    files can be found and deleted.
+    """
+    def __init__(self, db_path: str, data_root: str):
+        """
+        Open (or create) the manifest.
+
+        Args:
+            db_path: Path of the SQLite database file
+            data_root: Directory the source files are recorded relative to
+        """
+        self.data_root = data_root
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                ingested_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                doc_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def source_key(self, document_path: str) -> str:
+        """Key of a source file, see `source_key`."""
+        return source_key(document_path, self.data_root)
+
+    @staticmethod
+    def file_hash(document_path: str) -> str:
+        """SHA-256 of a file's content."""
+        digest = hashlib.sha256()
+        with open(document_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def chunk_hash(chunk: str) -> str:
+        """SHA-256 of a chunk's text."""
+        return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+    def content_hash(self, document_path: str) -> Optional[str]:
+        """Content hash recorded for a file, None if it was never ingested."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM files WHERE source = ?", (self.source_key(document_path),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def chunk_ids(self, document_path: str) -> List[str]:
+        """IDs of the chunks recorded for a file."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT doc_id FROM chunks WHERE source = ?", (self.source_key(document_path),)
+            ).fetchall()
+        return [doc_id for (doc_id,) in rows]
+
+    def all_chunk_ids(self) -> Set[str]:
+        """IDs of every recorded chunk."""
+        with self._lock:
+            rows = self._conn.execute("SELECT doc_id FROM chunks").fetchall()
+        return {doc_id for (doc_id,) in rows}
+
+    def sources_in(self, directory_path: str) -> List[str]:
+        """Paths of the recorded files located directly in a directory."""
+        directory = self.source_key(directory_path)
+        if directory == ".":
+            directory = ""  # Files directly in the data root have no directory part
+        with self._lock:
+            rows = self._conn.execute("SELECT source FROM files").fetchall()
+        return [os.path.join(self.data_root, source) for (source,) in rows if os.path.dirname(source) == directory]
+
+    def record(self, document_path: str, content_hash: str, chunks: Dict[str, str]) -> None:
+        """
+        Replace the record of a file after its chunks were written.
+
+        Args:
+            document_path: Path of the source file
+            content_hash: Hash of the file content that was ingested
+            chunks: Mapping of chunk ID to chunk hash
+        """
+        source = self.source_key(document_path)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (doc_id, source, chunk_hash) VALUES (?, ?, ?)",
+                [(doc_id, source, chunk_hash) for doc_id, chunk_hash in chunks.items()],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (source, content_hash, ingested_at) VALUES (?, ?, ?)",
+                (source, content_hash, time.time()),
+            )
+
+    def remove(self, document_path: str) -> None:
+        """Forget a file and its chunks."""
+        source = self.source_key(document_path)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self._conn.execute("DELETE FROM files WHERE source = ?", (source,))
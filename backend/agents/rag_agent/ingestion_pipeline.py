@@ -0,0 +1,223 @@
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
+
+from .doc_parser import MedicalDocParser
+from .content_processor import ContentProcessor
+
+# Parser of the current worker process, created on its first document
+_worker_doc_parser = None
+
+def _parse_in_worker(document_path: str, output_dir: str) -> Tuple[str, List[str], float]:
+    """
+    Parse one document in a worker process.
+
+    The docling document itself is not sent back to the parent, only its markdown export
+    (with image placeholders) and the extracted images.
+
+    Returns:
+        Tuple of (markdown, image URIs, parse seconds)
+    """
+    global _worker_doc_parser
+    if _worker_doc_parser is None:
+        _worker_doc_parser = MedicalDocParser()
+    start_time = time.time()
+    parsed_document, images = _worker_doc_parser.parse_document(document_path, output_dir)
+    return ContentProcessor.export_markdown(parsed_document), images, time.time() - start_time
+
+class IngestionPipeline:
+    """
+    Staged ingestion of many documents.
+
+    Documents flow through three stages that run concurrently:
+    1. parse: docling in a process pool (CPU-bound)
+    2. enrich: image summarization and LLM chunking in a thread pool (LLM-bound)
+    3. write: a single writer that embeds and upserts the chunks of several documents per batch
+
+    At most `max_pending_documents` documents are between parsing and writing; parsing of
+    further files waits until the writer catches up.
+    """
+    def __init__(self, rag, workers: int, llm_workers: int, max_pending_documents: int, write_batch_size: int):
+        """
+        Initialize the pipeline.
+
+        Args:
+            rag: MedicalRAG instance providing the content processor and vector store
+            workers: Number of parsing processes
+            llm_workers: Number of documents summarized and chunked concurrently
+            max_pending_documents: Documents in flight between parsing and writing
+            write_batch_size: Chunks written per vector store batch
+        """
+        self.logger = logging.getLogger(__name__)
+        self.rag = rag
+        self.workers = workers
+        self.llm_workers = llm_workers
+        self.max_pending_documents = max(max_pending_documents, workers)
+        self.write_batch_size = write_batch_size
+        self.stage_stats = {
+            stage: {"documents": 0, "chunks": 0, "failed": 0, "busy_seconds": 0.0}
+            for stage in ("parse", "enrich", "write")
+        }
+        self._stats_lock = threading.Lock()
+
+    def _record(self, stage: str, documents: int = 0, chunks: int = 0, failed: int = 0, seconds: float = 0.0) -> None:
+        with self._stats_lock:
+            stats = self.stage_stats[stage]
+            stats["documents"] += documents
+            stats["chunks"] += chunks
+            stats["failed"] += failed
+            stats["busy_seconds"] += seconds
+
+    def _enrich(self, document_path: str, markdown: str, images: List[str]) -> List[str]:
+        """Summarize the images of a parsed document and split it into semantic chunks."""
+        content_processor = self.rag.content_processor
+        image_summaries = content_processor.summarize_images(images)
+        formatted_document = content_processor.format_markdown_with_images(markdown, image_summaries)
+        return content_processor.chunk_document(formatted_document)
+
+    def run(self, files: List[str], file_hashes: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Ingest files through the pipeline.
+
+        Args:
+            files: Paths of the files to ingest
+            file_hashes: Content hash of every file, recorded in the manifest once it is written
+
+        Returns:
+            Dictionary with per-file outcomes, chunk count and per-stage throughput
+        """
+        start_time = time.time()
+        output_dir = self.rag.parsed_content_dir
+        slots = threading.BoundedSemaphore(self.max_pending_documents)
+        # Set when the writer stops, so the feeder does not wait for slots that are never released
+        stop = threading.Event()
+        # Finished documents (chunks) and failures, consumed by the writer in this thread
+        results = queue.Queue()
+
+        enrich_executor = ThreadPoolExecutor(max_workers=self.llm_workers, thread_name_prefix="ingest-llm")
+        # Spawned workers do not inherit the parent's threads and locks (fork would)
+        parse_executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+        def enrich(document_path, markdown, images):
+            enrich_start = time.time()
+            try:
+                chunks = self._enrich(document_path, markdown, images)
+                self._record("enrich", documents=1, chunks=len(chunks), seconds=time.time() - enrich_start)
+                results.put((document_path, chunks, None))
+            except Exception as e:
+                self._record("enrich", failed=1, seconds=time.time() - enrich_start)
+                results.put((document_path, None, f"Chunking failed: {e}"))
+
+        def on_parsed(document_path, future):
+            try:
+                markdown, images, parse_seconds = future.result()
+            except Exception as e:
+                self._record("parse", failed=1)
+                results.put((document_path, None, f"Parsing failed: {e}"))
+                return
+            self._record("parse", documents=1, seconds=parse_seconds)
+            enrich_executor.submit(enrich, document_path, markdown, images)
+
+        def feed():
+            for document_path in files:
+                # Backpressure: wait for the writer to free a slot
+                while not slots.acquire(timeout=0.5):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                self.logger.info(f"Parsing {document_path}")
+                try:
+                    future = parse_executor.submit(_parse_in_worker, document_path, output_dir)
+                except Exception as e:
+                    # The pool is broken (e.g. a worker crashed), report the file instead of stalling the writer
+                    self._record("parse", failed=1)
+                    results.put((document_path, None, f"Parsing failed: {e}"))
+                    continue
+                future.add_done_callback(lambda done, path=document_path: on_parsed(path, done))
+
+        feeder = threading.Thread(target=feed, name="ingest-feed", daemon=True)
+        feeder.start()
+
+        failed_files = []
+        documents_ingested = 0
+        chunks_processed = 0
+        completed = 0
+        try:
+            while completed < len(files):
+                # Collect finished documents until the batch is full or nothing else is ready
+                batch, batch_chunks, collected = [], 0, 0
+                document_path, chunks, error = results.get()
+                while True:
+                    completed += 1
+                    collected += 1
+                    if error:
+                        self.logger.error(f"Error ingesting {document_path}: {error}")
+                        failed_files.append({"file": document_path, "error": error})
+                    else:
+                        batch.append((chunks, document_path))
+                        batch_chunks += len(chunks)
+                    if batch_chunks >= self.write_batch_size or completed == len(files):
+                        break
+                    try:
+                        document_path, chunks, error = results.get_nowait()
+                    except queue.Empty:
+                        break
+                if not batch:
+                    for _ in range(collected):
+                        slots.release()
+                    continue
+
+                write_start = time.time()
+                try:
+                    self.rag.store_documents(batch, file_hashes)
+                    self._record("write", documents=len(batch), chunks=batch_chunks, seconds=time.time() - write_start)
+                    documents_ingested += len(batch)
+                    chunks_processed += batch_chunks
+                    self.logger.info(f"Wrote {batch_chunks} chunks of {len(batch)} documents ({completed}/{len(files)} files done)")
+                except Exception as e:
+                    self._record("write", failed=len(batch), seconds=time.time() - write_start)
+                    self.logger.error(f"Error writing {len(batch)} documents: {e}")
+                    failed_files.extend({"file": path, "error": f"Writing failed: {e}"} for _chunks, path in batch)
+                # Documents leave the pipeline only once written
+                for _ in range(collected):
+                    slots.release()
+        finally:
+            stop.set()
+            feeder.join()
+            # After a writer error, documents not yet parsed or enriched are dropped
+            parse_executor.shutdown(wait=True, cancel_futures=True)
+            enrich_executor.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.time() - start_time
+        return {
+            "documents_ingested": documents_ingested,
+            "failed_documents": len(failed_files),
+            "failed_files": failed_files,
+            "chunks_processed": chunks_processed,
+            "stages": self.stats(elapsed),
+            **self.rag.content_processor.stats(),
+            "processing_time": elapsed
+        }
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        """
+        Report per-stage throughput.
+
+        Args:
+            elapsed: Wall-clock seconds of the run
+
+        Returns:
+            Per stage: documents, chunks, failures, busy time summed over its workers,
+            documents per second of wall-clock time and average seconds per document
+        """
+        with self._stats_lock:
+            stats = {stage: dict(counters) for stage, counters in self.stage_stats.items()}
+        for counters in stats.values():
+            counters["documents_per_second"] = counters["documents"] / elapsed if elapsed else 0.0
+            counters["seconds_per_document"] = counters["busy_seconds"] / counters["documents"] if counters["documents"] else 0.0
+        return stats
@@ -0,0 +1,113 @@
+import os
+import json
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+# Files written by tools/export_reranker_onnx.py
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model.int8.onnx"
+ONNX_METADATA_FILE = "reranker_onnx.json"
+
+def rankings_agree(expected: np.ndarray, actual: np.ndarray, tolerance: float) -> bool:
+    """
+    Whether two backends rank the same pairs alike.
+
+    Pairs whose expected scores are more than twice the tolerance apart must keep their
+    order; near ties may swap, since the backends' scores differ by up to the tolerance.
+    """
+    expected, actual = np.asarray(expected), np.asarray(actual)
+    clearly_better = expected[:, None] - expected[None, :] > 2 * tolerance
+    return bool(np.all(actual[:, None] > actual[None, :], where=clearly_better))
+
+class OnnxCrossEncoder:
+    """
+    Cross-encoder scoring with ONNX Runtime on CPU, a drop-in replacement for `CrossEncoder.predict`.
+    """
+    def __init__(self, model_dir: str, quantized: bool = True, num_threads: Optional[int] = None):
+        """
+        Load an exported cross-encoder.
+
+        Args:
+            model_dir: Directory written by the export tool (ONNX files, tokenizer, metadata)
+            quantized: Use the dynamically quantized int8 model when it was exported
+            num_threads: Intra-op threads of the inference session, None for the runtime default
+        """
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.logger = logging.getLogger(__name__)
+        with open(os.path.join(model_dir, ONNX_METADATA_FILE)) as f:
+            self.metadata = json.load(f)
+
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized and self.metadata.get("quantized") else ONNX_MODEL_FILE
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = self.metadata.get("max_length") or 512
+        self.model_name = self.metadata["model_name"]
+        self.model_file = model_file
+        self.logger.info(f"Loaded ONNX reranker {self.model_name} ({model_file})")
+
+    def predict(self, pairs: List[tuple], batch_size: int = 32) -> np.ndarray:
+        """
+        Score query-document pairs.
+
+        Args:
+            pairs: (query, document) pairs
+            batch_size: Number of pairs per forward pass
+
+        Returns:
+            One relevance score per pair, with the same activation as the source CrossEncoder
+        """
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            features = self.tokenizer(
+                [pair[0] for pair in batch],
+                [pair[1] for pair in batch],
+                padding=True,
+                truncation="longest_first",
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            inputs = {name: value.astype(np.int64) for name, value in features.items() if name in self.input_names}
+            logits = self.session.run(None, inputs)[0]
+            scores.append(logits[:, 0] if logits.shape[1] == 1 else logits)
+
+        scores = np.concatenate(scores) if scores else np.array([], dtype=np.float32)
+        if self.metadata.get("activation") == "sigmoid":
+            scores = 1 / (1 + np.exp(-scores))
+        return scores
+
+def load_onnx_reranker(config) -> Optional[OnnxCrossEncoder]:
+    """
+    Load the exported ONNX reranker if it matches the configured model.
+
+    Args:
+        config: Configuration object with reranker settings
+
+    Returns:
+        The ONNX reranker, or None when it is missing, stale or cannot be loaded
+    """
+    logger = logging.getLogger(__name__)
+    model_dir = config.rag.reranker_onnx_dir
+    if not os.path.exists(os.path.join(model_dir, ONNX_METADATA_FILE)):
+        return None
+    try:
+        reranker = OnnxCrossEncoder(model_dir, quantized=config.rag.reranker_onnx_quantized)
+    except Exception as e:
+        logger.warning(f"Could not load the ONNX reranker, using PyTorch: {e}")
+        return None
+    if reranker.model_name != config.rag.reranker_model:
+        logger.warning(
+            f"ONNX reranker was exported from {reranker.model_name}, not {config.rag.reranker_model}; using PyTorch"
+        )
+        return None
+    return reranker
@@ -1,10 +1,101 @@
 import os
 import re
+import time
+import queue
 import logging
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union
 from sentence_transformers import CrossEncoder
 
+from .onnx_reranker import load_onnx_reranker
+
+class RerankBatcher:
+    """
+    Coalesces cross-encoder scoring requests of concurrent queries into single `predict` calls.
+
+    A worker thread takes the first waiting request, then keeps collecting requests until
+    the batch holds `max_batch_size` pairs or `max_wait_ms` has passed, and scores them together.
+    """
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 5):
+        """
+        Start the batching worker.
+
+        Args:
+            model: Cross-encoder with a `predict(pairs)` method
+            max_batch_size: Maximum number of pairs scored in one call
+            max_wait_ms: Longest a request waits for others to join its batch
+        """
+        self.logger = logging.getLogger(__name__)
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._requests = queue.Queue()
+        self.batches = 0
+        self.pairs_scored = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def predict(self, pairs: List[tuple]) -> List[float]:
+        """
+        Score query-document pairs, possibly together with pairs of other queries.
+
+        Args:
+            pairs: (query, document) pairs
+
+        Returns:
+            One relevance score per pair
+        """
+        if not pairs:
+            return []
+        future = Future()
+        self._requests.put((list(pairs), future))
+        return future.result()
+
+    def _run(self) -> None:
+        """Collect and score batches until the process exits."""
+        while True:
+            batch = [self._requests.get()]
+            batch_pairs = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while batch_pairs < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                batch_pairs += len(request[0])
+            self._score(batch)
+
+    def _score(self, batch: List[tuple]) -> None:
+        """Run one forward pass over all pairs of the batch and hand back each request's scores."""
+        all_pairs = [pair for pairs, _future in batch for pair in pairs]
+        try:
+            scores = self.model.predict(all_pairs, batch_size=self.max_batch_size)
+        except Exception as e:
+            for _pairs, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.pairs_scored += len(all_pairs)
+        offset = 0
+        for pairs, future in batch:
+            future.set_result([float(score) for score in scores[offset:offset + len(pairs)]])
+            offset += len(pairs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report how many pairs were scored and the average batch size."""
+        return {
+            "batches": self.batches,
+            "pairs_scored": self.pairs_scored,
+            "average_batch_size": self.pairs_scored / self.batches if self.batches else 0.0
+        }
+
 class Reranker:
     """
     Reranks retrieved documents using a cross-encoder model for more accurate results.
@@ -24,11 +115,37 @@ class Reranker:
         try:
             self.model_name = config.rag.reranker_model
             self.logger.info(f"Loading reranker model: {self.model_name}")
-            self.model = CrossEncoder(self.model_name)
+            # Prefer the exported ONNX model (see tools/export_reranker_onnx.py), fall back to PyTorch
+            self.model = load_onnx_reranker(config) if config.rag.reranker_backend == "onnx" else None
+            self.backend = "onnx" if self.model is not None else "torch"
+            if self.model is None:
+                self.model = CrossEncoder(self.model_name)
             self.top_k = config.rag.reranker_top_k
+            self.adaptive_retrieval = config.rag.adaptive_retrieval
+            self.dominance_margin = config.rag.adaptive_dominance_margin
+            self.batcher = RerankBatcher(
+                self.model,
+                max_batch_size=config.rag.rerank_max_batch_size,
+                max_wait_ms=config.rag.rerank_max_wait_ms,
+            ) if config.rag.rerank_batching else None
         except Exception as e:
             self.logger.error(f"Error loading reranker model: {e}")
             raise
+
+        # Adaptive reranking counters
+        self.queries = 0
+        self.candidates_scored = 0
+        self.short_circuits = 0
+
+    def _top_hit_dominates(self, documents: List[Dict[str, Any]]) -> bool:
+        """Whether the best dense similarity is far enough ahead of the runner-up to skip the cross-encoder."""
+        if not self.adaptive_retrieval or len(documents) < 2:
+            return False
+        # Only dense cosine similarities measure how decisive a match is, fused hybrid scores do not
+        if any(doc.get("dense_score") is None for doc in documents):
+            return False
+        scores = sorted((doc["dense_score"] for doc in documents), reverse=True)
+        return scores[0] - scores[1] >= self.dominance_margin
     
     def rerank(self, query: str, documents: Union[List[Dict[str, Any]], List[str]], parsed_content_dir: str) -> List[Dict[str, Any]]:
         """
@@ -75,20 +192,28 @@ class Reranker:
                             else:
                                 doc["content"] = f"Document {i}"
             
-            # Create query-document pairs for scoring
-            pairs = [(query, doc["content"]) for doc in documents]
-            
-            # Get relevance scores
-            scores = self.model.predict(pairs)
-            
-            # Add scores to documents
-            for i, score in enumerate(scores):
-                documents[i]["rerank_score"] = float(score)  # Store the new score from reranking
-                # If the original document didn't have a score, use the rerank score
-                if "score" not in documents[i]:
-                    documents[i]["score"] = 1.0
-                # Combine (average) the original score and rerank score
-                documents[i]["combined_score"] = (documents[i]["score"] + float(score)) / 2
+            self.queries += 1
+            if self._top_hit_dominates(documents):
+                # Easy query: keep the retrieval order instead of running the cross-encoder
+                self.short_circuits += 1
+                for doc in documents:
+                    doc["combined_score"] = doc["score"]
+            else:
+                # Create query-document pairs for scoring
+                pairs = [(query, doc["content"]) for doc in documents]
+                
+                # Get relevance scores (batched with concurrent queries when enabled)
+                scores = self.batcher.predict(pairs) if self.batcher else self.model.predict(pairs)
+                self.candidates_scored += len(pairs)
+                
+                # Add scores to documents
+                for i, score in enumerate(scores):
+                    documents[i]["rerank_score"] = float(score)  # Store the new score from reranking
+                    # If the original document didn't have a score, use the rerank score
+                    if "score" not in documents[i]:
+                        documents[i]["score"] = 1.0
+                    # Combine (average) the original score and rerank score
+                    documents[i]["combined_score"] = (documents[i]["score"] + float(score)) / 2
             
             # Sort by combined score
             reranked_docs = sorted(documents, key=lambda x: x["combined_score"], reverse=True)
@@ -115,4 +240,12 @@ class Reranker:
             self.logger.error(f"Error during reranking: {e}")
             # Fallback to original ranking if reranking fails
             self.logger.warning("Falling back to original ranking")
-            return documents
\ No newline at end of file
+            return documents
+
+    def stats(self) -> Dict[str, Any]:
+        """Report how many candidates the cross-encoder scored per query."""
+        return {
+            "queries": self.queries,
+            "short_circuits": self.short_circuits,
+            "average_candidates_scored": self.candidates_scored / self.queries if self.queries else 0.0
+        }
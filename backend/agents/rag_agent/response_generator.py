@@ -1,6 +1,9 @@
 import logging
 from typing import List, Dict, Any, Optional, Union
 
+from .context_packer import ContextPacker
+from agents.streaming import ANSWER_STREAM_TAG
+
 class ResponseGenerator:
     """
     Generates responses based on retrieved context and user query.
@@ -16,6 +19,10 @@ class ResponseGenerator:
         self.logger = logging.getLogger(__name__)
         self.response_generator_model = config.rag.response_generator_model
         self.include_sources = getattr(config.rag, "include_sources", True)
+        self.context_packer = ContextPacker(config, model_name=getattr(self.response_generator_model, "model_name", None))
+        self.requests = 0
+        self.context_tokens = 0
+        self.prompt_tokens = 0
 
     def _build_prompt(
             self,
@@ -106,20 +113,25 @@ class ResponseGenerator:
         """
         try:
            
-            # Extract content from documents for context
-            doc_texts = [doc["content"] for doc in retrieved_docs]
-            
-            # Combine retrieved documents into a single context
-            context = "\n\n===DOCUMENT SECTION===\n\n".join(doc_texts)
+            # Combine the most relevant, non-overlapping documents into a context within the token budget
+            context, context_docs, context_report = self.context_packer.pack(retrieved_docs)
             
             # Build the prompt
             prompt = self._build_prompt(query, context, chat_history)
-            
-            # Generate response
-            response = self.response_generator_model.invoke(prompt)
+            context_report["prompt_tokens"] = self.context_packer.count_tokens(prompt)
+            self.requests += 1
+            self.context_tokens += context_report["context_tokens"]
+            self.prompt_tokens += context_report["prompt_tokens"]
+            self.logger.info(
+                f"   Packed {context_report['chunks_packed']}/{context_report['chunks_retrieved']} chunks into "
+                f"{context_report['context_tokens']} context tokens ({context_report['prompt_tokens']} prompt tokens)"
+            )
+            
+            # Generate response (tagged so that its tokens can be streamed to the user)
+            response = self.response_generator_model.invoke(prompt, config={"tags": [ANSWER_STREAM_TAG]})
             
             # Extract sources for citation
-            sources = self._extract_sources(retrieved_docs) if hasattr(self, 'include_sources') and self.include_sources else []
+            sources = self._extract_sources(context_docs) if hasattr(self, 'include_sources') and self.include_sources else []
             
             # Calculate confidence
             confidence = self._calculate_confidence(retrieved_docs)
@@ -143,7 +155,8 @@ class ResponseGenerator:
             result = {
                 "response": response_with_source_and_picture_paths,
                 "sources": sources,
-                "confidence": confidence
+                "confidence": confidence,
+                "context": context_report
             }
             
             return result
@@ -231,4 +244,12 @@ class ResponseGenerator:
             scores = [doc.get("score", 0) for doc in documents[:3]]
             
         # Average of top 3 document scores or fewer if less than 3
-        return sum(scores) / len(scores) if scores else 0.0
\ No newline at end of file
+        return sum(scores) / len(scores) if scores else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Report the average number of tokens sent per request."""
+        return {
+            "requests": self.requests,
+            "average_context_tokens": self.context_tokens / self.requests if self.requests else 0.0,
+            "average_prompt_tokens": self.prompt_tokens / self.requests if self.requests else 0.0
+        }
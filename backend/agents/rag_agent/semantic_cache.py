@@ -0,0 +1,191 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+class SemanticCache:
+    """
+    Caches RAG answers by the embedding of the (rewritten, English) query.
+
+    A new query reuses a cached answer when its cosine similarity to a cached query
+    is above the threshold and both were asked after the same earlier questions, so a
+    follow-up ("what about its treatment?") never gets the answer given in another
+    conversation. Only the user's turns count: earlier answers differ between runs and
+    would make every follow-up a miss. Entries expire after a TTL, the least recently used are evicted beyond
+    capacity, and everything is dropped when documents are ingested.
+    """
+    def __init__(self, config):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            config: Configuration object with RAG settings
+        """
+        self.logger = logging.getLogger(__name__)
+        self.embedding_model = config.rag.embedding_model
+        self.similarity_threshold = config.rag.semantic_cache_threshold
+        self.ttl = config.rag.semantic_cache_ttl
+        self.max_entries = config.rag.semantic_cache_size
+        self.ingestion_marker_path = config.rag.ingestion_marker_path
+
+        self._entries = OrderedDict()  # (context, query) -> (normalized vector, response, created at), least recently used first
+        self._matrix = None  # Stacked vectors of all entries, rebuilt lazily after changes
+        self._keys = []
+        self._contexts = None  # Context of every row of the matrix
+        self._lock = threading.Lock()
+        self._ingestion_version = self._read_ingestion_version()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _read_ingestion_version(self) -> Optional[float]:
+        """Read the modification time of the marker file touched on every ingestion."""
+        try:
+            return os.path.getmtime(self.ingestion_marker_path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _normalize_turn(text: str) -> str:
+        """Case- and whitespace-insensitive form of a user turn."""
+        return " ".join(text.lower().split())
+
+    @classmethod
+    def context_key(cls, chat_history: Optional[str], query: str) -> str:
+        """
+        Fingerprint of the questions that precede a query.
+
+        Args:
+            chat_history: Recent conversation as passed to the RAG agent ("User: ..." and
+                "Assistant: ..." turns), ending with the current query
+            query: Rewritten English query
+
+        Returns:
+            Hash of the earlier user turns, empty for the first question of a conversation
+        """
+        user_turns, in_user_turn = [], False
+        for line in str(chat_history or "").splitlines():
+            if line.startswith("User: "):
+                user_turns.append(line[len("User: "):])
+                in_user_turn = True
+            elif line.startswith("Assistant: "):
+                in_user_turn = False
+            elif in_user_turn:
+                user_turns[-1] += "\n" + line
+
+        user_turns = [cls._normalize_turn(turn) for turn in user_turns]
+        if user_turns and user_turns[-1] == cls._normalize_turn(query):
+            user_turns.pop()
+        history = "\n".join(turn for turn in user_turns if turn)
+        return hashlib.sha256(history.encode("utf-8")).hexdigest() if history else ""
+
+    def lookup(self, query: str, context: str = "") -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            query: Rewritten English query
+            context: Fingerprint of the earlier conversation, see `context_key`
+
+        Returns:
+            Tuple of (cached response or None, query embedding to pass to `store`)
+        """
+        # Documents were ingested (possibly by another process) since the cache was filled
+        ingestion_version = self._read_ingestion_version()
+        if ingestion_version != self._ingestion_version:
+            self.invalidate()
+            self._ingestion_version = ingestion_version
+
+        query_vector = np.asarray(self.embedding_model.embed_query(query), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+
+        with self._lock:
+            self._expire()
+            if self._entries:
+                if self._matrix is None:
+                    self._keys = list(self._entries.keys())
+                    self._matrix = np.stack([self._entries[key][0] for key in self._keys])
+                    self._contexts = np.array([key[0] for key in self._keys])
+                similarities = np.where(self._contexts == context, self._matrix @ query_vector, -1.0)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    key = self._keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.logger.info(f"Semantic cache hit (similarity {similarities[best]:.3f}) for: {key[1]}")
+                    return dict(self._entries[key][1]), query_vector
+            self.misses += 1
+        return None, query_vector
+
+    def store(self, query: str, query_vector: np.ndarray, response: Dict[str, Any], context: str = "") -> None:
+        """
+        Cache an answer.
+
+        Args:
+            query: Rewritten English query
+            query_vector: Normalized query embedding returned by `lookup`
+            response: RAG response dictionary (answer, sources, confidence)
+            context: Fingerprint of the earlier conversation, see `context_key`
+        """
+        key = (context, query)
+        with self._lock:
+            self._entries[key] = (query_vector, dict(response), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self) -> None:
+        """Drop every cached answer, e.g. after new documents were ingested."""
+        with self._lock:
+            if self._entries:
+                self.logger.info("Semantic cache invalidated")
+            self._entries.clear()
+            self._matrix = None
+            self.invalidations += 1
+
+    def _expire(self) -> None:
+        """Remove entries older than the TTL (caller holds the lock)."""
+        now = time.time()
+        expired = [key for key, (_vector, _response, created) in self._entries.items() if now - created > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache size, hit/miss and invalidation counters."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations
+        }
+
+def mark_ingestion(config) -> None:
+    """Touch the ingestion marker so that every process drops its cached answers."""
+    marker_path = config.rag.ingestion_marker_path
+    os.makedirs(os.path.dirname(os.path.abspath(marker_path)), exist_ok=True)
+    with open(marker_path, "a"):
+        pass
+    os.utime(marker_path, None)
+
+# Process-wide cache shared by every MedicalRAG instance
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_semantic_cache(config) -> SemanticCache:
+    """Return the process-wide semantic cache, creating it on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SemanticCache(config)
+    return _shared_cache
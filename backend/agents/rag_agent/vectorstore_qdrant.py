@@ -1,7 +1,9 @@
 import os
 import re
 import logging
-from uuid import uuid4
+import threading
+from collections import OrderedDict
+from uuid import UUID, uuid5
 from pathlib import Path
 from typing import List, Dict, Any, Tuple, Optional
 
@@ -11,6 +13,67 @@ from langchain_qdrant import FastEmbedSparse, QdrantVectorStore, RetrievalMode
 from qdrant_client import QdrantClient, models
 from qdrant_client.http.models import Distance, SparseVectorParams, VectorParams, OptimizersConfigDiff
 
+from .ingestion_manifest import IngestionManifest, source_key
+
+# Namespace of the deterministic chunk IDs
+CHUNK_ID_NAMESPACE = UUID("5b0c7d3e-8a41-4c4f-9f1e-2d6a9c1e7b52")
+
+class ChunkCache:
+    """
+    Least recently used cache of chunk texts keyed by doc_id, bounded by total size in bytes.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, doc_id: str) -> Optional[str]:
+        """Return the cached chunk text, or None on a miss."""
+        with self._lock:
+            content = self._entries.get(doc_id)
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(doc_id)
+            self.hits += 1
+            return content
+
+    def put(self, doc_id: str, content: str) -> None:
+        """Cache a chunk text, evicting the least recently used beyond the byte budget."""
+        size = len(content.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(doc_id, None)
+            if previous is not None:
+                self.size_bytes -= len(previous.encode('utf-8'))
+            self._entries[doc_id] = content
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted.encode('utf-8'))
+
+    def clear(self) -> None:
+        """Drop every cached chunk."""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache size and hit/miss counters."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
 class VectorStore:
     """
     Create vector store, ingest documents, retrieve relevant documents
@@ -22,24 +85,68 @@ class VectorStore:
         self.distance_metric = config.rag.distance_metric
         self.embedding_model = config.rag.embedding_model
         self.retrieval_top_k = config.rag.top_k
+        self.adaptive_retrieval = config.rag.adaptive_retrieval
+        self.adaptive_max_k = max(config.rag.adaptive_max_k, config.rag.top_k)
+        self.adaptive_flat_score_margin = config.rag.adaptive_flat_score_margin
         self.vector_search_type = config.rag.vector_search_type
         self.vectorstore_local_path = config.rag.vector_local_path
         self.docstore_local_path = config.rag.doc_local_path
+        self.ingestion_data_root = config.rag.ingestion_data_root
+        self.chunks_from_payload = config.rag.chunks_from_payload
+        self.chunk_cache = ChunkCache(config.rag.chunk_cache_bytes) if config.rag.chunk_cache_bytes > 0 else None
 
         # Use the singleton client instead of creating a new one
         # self.client = QdrantClientManager.get_client(config)
         self.client = QdrantClient(path=self.vectorstore_local_path)
 
+        # Adaptive retrieval counters
+        self.retrieval_queries = 0
+        self.widened_queries = 0
+        self.candidates_retrieved = 0
+
+        # Retrieval handle built once and reused until the next ingestion
+        self._sparse_embeddings = None
+        self._retrieval_handle = None
+        self._collection_exists = None
+
     def _does_collection_exist(self) -> bool:
-        """Check if the collection already exists in Qdrant."""
+        """Check if the collection already exists in Qdrant (memoized until `invalidate`)."""
+        if self._collection_exists:
+            return True
         try:
             collection_info = self.client.get_collections()
             collection_names = [collection.name for collection in collection_info.collections]
-            return self.collection_name in collection_names
+            self._collection_exists = self.collection_name in collection_names
+            return self._collection_exists
         except Exception as e:
             self.logger.error(f"Error checking for collection existence: {e}")
             return False
 
+    def _get_sparse_embeddings(self) -> FastEmbedSparse:
+        """Load the BM25 sparse encoder once."""
+        if self._sparse_embeddings is None:
+            self._sparse_embeddings = FastEmbedSparse(model_name="Qdrant/bm25")
+        return self._sparse_embeddings
+
+    def _build_vectorstore(self) -> QdrantVectorStore:
+        """Wrap the client, dense embedder and sparse encoder in a hybrid vector store."""
+        return QdrantVectorStore(
+            client=self.client,
+            collection_name=self.collection_name,
+            embedding=self.embedding_model,
+            sparse_embedding=self._get_sparse_embeddings(),
+            retrieval_mode=RetrievalMode.HYBRID,
+            vector_name="dense",
+            sparse_vector_name="sparse",
+        )
+
+    def invalidate(self) -> None:
+        """Drop the cached retrieval handle and collection state, e.g. after an ingestion."""
+        self._retrieval_handle = None
+        self._collection_exists = None
+        if self.chunk_cache:
+            self.chunk_cache.clear()
+
     def _create_collection(self):
         """Create a new collection with dense and sparse vectors."""
         try:
@@ -62,30 +169,23 @@ class VectorStore:
         Returns:
             Tuple containing (vectorstore, docstore)
         """
+        if self._retrieval_handle is not None:
+            return self._retrieval_handle
+
         # Check if collection exists
         if not self._does_collection_exist():
             self.logger.error(f"Collection {self.collection_name} does not exist. Please ingest documents first.")
             raise ValueError(f"Collection {self.collection_name} does not exist")
             
-        # Setup sparse embeddings
-        sparse_embeddings = FastEmbedSparse(model_name="Qdrant/bm25")
-        
         # Initialize vector store
-        qdrant_vectorstore = QdrantVectorStore(
-            client=self.client,
-            collection_name=self.collection_name,
-            embedding=self.embedding_model,
-            sparse_embedding=sparse_embeddings,
-            retrieval_mode=RetrievalMode.HYBRID,
-            vector_name="dense",
-            sparse_vector_name="sparse",
-        )
+        qdrant_vectorstore = self._build_vectorstore()
         
         # Document storage
         docstore = LocalFileStore(self.docstore_local_path)
         
+        self._retrieval_handle = (qdrant_vectorstore, docstore)
         self.logger.info(f"Successfully loaded existing vectorstore and docstore")
-        return qdrant_vectorstore, docstore
+        return self._retrieval_handle
 
     def create_vectorstore(
             self,
@@ -102,27 +202,71 @@ class VectorStore:
         Returns:
             Tuple containing (vectorstore, docstore, doc_ids)
         """
-        
-        # Generate unique IDs for each chunk
-        doc_ids = [str(uuid4()) for _ in range(len(document_chunks))]
+        self.ingest_chunks([(document_chunks, document_path)])
+
+    @staticmethod
+    def make_chunk_ids(document_chunks: List[str], source: str) -> List[str]:
+        """
+        Derive chunk IDs from the source file and the chunk content.
+
+        Re-ingesting the same chunk of the same file yields the same ID (repeated chunks are
+        told apart by their occurrence), so it overwrites instead of duplicating it.
+
+        Args:
+            document_chunks: List of document chunks
+            source: Key of the original document (path relative to the data root, see `source_key`)
+
+        Returns:
+            One UUID string per chunk
+        """
+        occurrences = {}
+        doc_ids = []
+        for chunk in document_chunks:
+            chunk_hash = IngestionManifest.chunk_hash(chunk)
+            occurrence = occurrences.get(chunk_hash, 0)
+            occurrences[chunk_hash] = occurrence + 1
+            doc_ids.append(str(uuid5(CHUNK_ID_NAMESPACE, f"{source}:{chunk_hash}:{occurrence}")))
+        return doc_ids
+
+    def ingest_chunks(self, documents: List[Tuple[List[str], str]], skip_ids: Optional[set] = None) -> Tuple[List[List[str]], int]:
+        """
+        Write the chunks of several documents in one batch (one embedding and upsert pass).
+
+        Args:
+            documents: (document chunks, document path) pairs
+            skip_ids: IDs of chunks that are already stored, they are not written again
+
+        Returns:
+            Tuple of (chunk IDs per document, number of chunks written)
+        """
+        skip_ids = skip_ids or set()
+        chunk_ids = []
+        doc_ids = []
+        document_chunks = []
         
         # Create langchain documents
         langchain_documents = []
-        for id_idx, chunk in enumerate(document_chunks):
-            langchain_documents.append(
-                Document(
-                    page_content=chunk,
-                    metadata={
-                        "source": os.path.basename(document_path),
-                        "doc_id": doc_ids[id_idx],
-                        # "source_path": Path(os.path.abspath(document_path)).as_uri()
-                        "source_path": os.path.join("http://localhost:8000/", document_path)
-                    }
+        for chunks, document_path in documents:
+            document_ids = self.make_chunk_ids(chunks, source_key(document_path, self.ingestion_data_root))
+            chunk_ids.append(document_ids)
+            for doc_id, chunk in zip(document_ids, chunks):
+                if doc_id in skip_ids:
+                    continue
+                doc_ids.append(doc_id)
+                document_chunks.append(chunk)
+                langchain_documents.append(
+                    Document(
+                        page_content=chunk,
+                        metadata={
+                            "source": os.path.basename(document_path),
+                            "doc_id": doc_id,
+                            # "source_path": Path(os.path.abspath(document_path)).as_uri()
+                            "source_path": os.path.join("http://localhost:8000/", document_path)
+                        }
+                    )
                 )
-            )
-        
-        # Setup sparse embeddings
-        sparse_embeddings = FastEmbedSparse(model_name="Qdrant/bm25")
+        if not langchain_documents:
+            return chunk_ids, 0
         
         # Check if collection exists, create if it doesn't
         collection_exists = self._does_collection_exist()
@@ -133,15 +277,7 @@ class VectorStore:
             self.logger.info(f"Collection {self.collection_name} already exists, will upsert documents")
         
         # Initialize vector store
-        qdrant_vectorstore = QdrantVectorStore(
-            client=self.client,
-            collection_name=self.collection_name,
-            embedding=self.embedding_model,
-            sparse_embedding=sparse_embeddings,
-            retrieval_mode=RetrievalMode.HYBRID,
-            vector_name="dense",
-            sparse_vector_name="sparse",
-        )
+        qdrant_vectorstore = self._build_vectorstore()
         
         # Document storage for parent documents
         docstore = LocalFileStore(self.docstore_local_path)
@@ -153,6 +289,57 @@ class VectorStore:
         encoded_chunks = [chunk.encode('utf-8') for chunk in document_chunks]
         docstore.mset(list(zip(doc_ids, encoded_chunks)))
 
+        # The next retrieval picks up the new documents with a fresh handle
+        self.invalidate()
+        return chunk_ids, len(doc_ids)
+
+    def unmanaged_chunk_ids(self, managed_ids: set) -> List[str]:
+        """
+        Find stored chunks that are not recorded in the ingestion manifest.
+
+        These are chunks written before incremental ingestion existed (random IDs), which
+        re-ingestion would duplicate instead of overwrite.
+
+        Args:
+            managed_ids: IDs of the chunks recorded in the manifest
+
+        Returns:
+            IDs of the other chunks in the collection
+        """
+        if not self._does_collection_exist():
+            return []
+        unmanaged = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            unmanaged.extend(str(point.id) for point in points if str(point.id) not in managed_ids)
+            if offset is None:
+                return unmanaged
+
+    def delete_chunks(self, doc_ids: List[str]) -> None:
+        """
+        Delete chunks from the vector store and the document store.
+
+        Args:
+            doc_ids: IDs of the chunks to delete
+        """
+        if not doc_ids:
+            return
+        if self._does_collection_exist():
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.PointIdsList(points=doc_ids)
+            )
+        LocalFileStore(self.docstore_local_path).mdelete(doc_ids)
+        self.logger.info(f"Deleted {len(doc_ids)} stale chunks")
+        self.invalidate()
+
     def retrieve_relevant_chunks(
             self,
             query: str,
@@ -174,16 +361,20 @@ class VectorStore:
         # Use similarity_search_with_score to get documents and scores
         results = vectorstore.similarity_search_with_score(
             query=query,
-            k=self.retrieval_top_k
+            k=self.adaptive_max_k if self.adaptive_retrieval else self.retrieval_top_k
         )
+        dense_scores = {}
+        if self.adaptive_retrieval:
+            dense_scores = self._dense_similarities(query, results)
+            results = self._select_retrieval_depth(results, dense_scores)
         
         retrieved_docs = []
         # picture_reference_paths = []
+
+        chunk_contents = self._fetch_chunk_contents([chunk for chunk, _score in results], docstore)
         
         for chunk, score in results:
-            # Get full document from doc store as bytes and decode to string
-            doc_content_bytes = docstore.mget([chunk.metadata['doc_id']])[0]
-            doc_content = doc_content_bytes.decode('utf-8')
+            doc_content = chunk_contents[chunk.metadata['doc_id']]
             
             # Add metadata to the document
             # formatted_doc = f"{doc_content}\nFollowing are the 'filename' and 'path as uri' of the source document for the current chunk: {chunk.metadata['source']}, {chunk.metadata['source_path']}"
@@ -194,6 +385,7 @@ class VectorStore:
                 "id": chunk.metadata['doc_id'],
                 "content": formatted_doc,
                 "score": score,  # Use the actual similarity score
+                "dense_score": dense_scores.get(self._point_id(chunk)),
                 "source": chunk.metadata['source'],
                 "source_path": chunk.metadata['source_path'],
             }
@@ -209,4 +401,113 @@ class VectorStore:
             #     picture_reference_paths.append(picture_path)
         
         # return retrieved_docs, picture_reference_paths
-        return retrieved_docs
\ No newline at end of file
+        return retrieved_docs
+
+    @staticmethod
+    def _point_id(chunk: Document) -> str:
+        """Qdrant point ID of a retrieved chunk."""
+        return str(chunk.metadata.get('_id', chunk.metadata['doc_id']))
+
+    def _dense_similarities(self, query: str, results: List[Tuple[Document, float]]) -> Dict[str, float]:
+        """
+        Score the hybrid candidates by dense cosine similarity alone.
+
+        Hybrid search returns RRF-fused scores, which only reflect how the dense and sparse
+        rankings agree; the cosine similarities say how close the matches actually are.
+
+        Args:
+            query: User query (its embedding is served from the embedding cache)
+            results: (document, score) pairs of the hybrid search
+
+        Returns:
+            Dictionary mapping point ID to cosine similarity, empty when the lookup fails
+        """
+        point_ids = [self._point_id(chunk) for chunk, _score in results]
+        if not point_ids:
+            return {}
+        try:
+            points = self.client.query_points(
+                collection_name=self.collection_name,
+                query=self.embedding_model.embed_query(query),
+                using="dense",
+                query_filter=models.Filter(must=[models.HasIdCondition(has_id=point_ids)]),
+                limit=len(point_ids),
+                with_payload=False,
+            ).points
+        except Exception as e:
+            self.logger.warning(f"Dense similarity lookup failed, keeping the default retrieval depth: {e}")
+            return {}
+        return {str(point.id): point.score for point in points}
+
+    def _select_retrieval_depth(self, results: List[Tuple[Document, float]], dense_scores: Dict[str, float]) -> List[Tuple[Document, float]]:
+        """
+        Keep the wider candidate set only when the dense similarities do not separate the top hits.
+
+        Args:
+            results: (document, score) pairs of the widest search, best first
+            dense_scores: Cosine similarity of every candidate, keyed by point ID
+
+        Returns:
+            The first `top_k` results, or all of them when the similarity distribution is flat
+        """
+        self.retrieval_queries += 1
+        similarities = sorted(dense_scores.values(), reverse=True)
+        if len(results) > self.retrieval_top_k:
+            if (
+                len(similarities) > self.retrieval_top_k
+                and similarities[0] - similarities[self.retrieval_top_k - 1] <= self.adaptive_flat_score_margin
+            ):
+                self.widened_queries += 1
+            else:
+                results = results[:self.retrieval_top_k]
+        self.candidates_retrieved += len(results)
+        return results
+
+    def retrieval_stats(self) -> Dict[str, Any]:
+        """Report how many candidates adaptive retrieval kept per query."""
+        return {
+            "queries": self.retrieval_queries,
+            "widened_queries": self.widened_queries,
+            "average_candidates_retrieved": self.candidates_retrieved / self.retrieval_queries if self.retrieval_queries else 0.0
+        }
+
+    def _fetch_chunk_contents(self, chunks: List[Document], docstore: LocalFileStore) -> Dict[str, str]:
+        """
+        Resolve the text of retrieved chunks with at most one docstore read.
+
+        The text comes from the Qdrant payload when configured, then from the chunk cache,
+        and every remaining doc_id is fetched with a single `mget`.
+
+        Args:
+            chunks: Documents returned by the vector store
+            docstore: Document store containing actual content
+
+        Returns:
+            Dictionary mapping doc_id to chunk text
+        """
+        contents = {}
+        missing_ids = []
+        for chunk in chunks:
+            doc_id = chunk.metadata['doc_id']
+            if self.chunks_from_payload and chunk.page_content:
+                contents[doc_id] = chunk.page_content
+                continue
+            cached = self.chunk_cache.get(doc_id) if self.chunk_cache else None
+            if cached is not None:
+                contents[doc_id] = cached
+            elif doc_id not in missing_ids:
+                missing_ids.append(doc_id)
+
+        if missing_ids:
+            for doc_id, doc_content_bytes in zip(missing_ids, docstore.mget(missing_ids)):
+                if doc_content_bytes is None:
+                    self.logger.warning(f"Chunk {doc_id} is missing from the docstore, using the vector store payload")
+                    continue
+                contents[doc_id] = doc_content_bytes.decode('utf-8')
+                if self.chunk_cache:
+                    self.chunk_cache.put(doc_id, contents[doc_id])
+
+        # Fall back to the payload text for chunks the docstore does not have
+        for chunk in chunks:
+            contents.setdefault(chunk.metadata['doc_id'], chunk.page_content)
+        return contents
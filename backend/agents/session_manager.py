@@ -0,0 +1,147 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+class SessionThreadManager:
+    """
+    Maps API sessions to isolated LangGraph threads and keeps checkpoint storage bounded.
+
+    Each session gets its own thread in the checkpoint store. Idle threads are evicted
+    (least recently used first, or once they exceed the TTL) and a background compactor
+    keeps only the most recent checkpoints of every thread that changed.
+    """
+    def __init__(self, checkpoint_store, config):
+        """
+        Initialize the session manager.
+
+        Args:
+            checkpoint_store: Checkpoint store backing the compiled agent graph
+            config: Configuration object with session settings
+        """
+        self.logger = logging.getLogger(__name__)
+        self.checkpoint_store = checkpoint_store
+        self.max_sessions = config.session.max_sessions
+        self.session_ttl = config.session.session_ttl
+        self.max_checkpoints_per_thread = config.session.max_checkpoints_per_thread
+        self.compaction_interval = config.session.compaction_interval
+
+        # thread_id -> last access time, least recently used first (resumed from the store after a restart)
+        self._sessions = OrderedDict(
+            sorted(checkpoint_store.load_sessions().items(), key=lambda item: item[1])
+        )
+        self._dirty_threads = set()
+        self._lock = threading.Lock()
+        self._compactor = None
+        self.evicted_sessions = 0
+        self.pruned_checkpoints = 0
+
+    def get_thread_config(self, session_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Get the LangGraph run config for a session, registering it if needed.
+
+        Args:
+            session_id: Session identifier issued by the API (cookie)
+
+        Returns:
+            Run config pointing at the session's own thread
+        """
+        self._ensure_compactor()
+        thread_id = session_id or "default"
+        now = time.time()
+        with self._lock:
+            self._sessions[thread_id] = now
+            self._sessions.move_to_end(thread_id)
+            expired = self._collect_evictions(now)
+        self.checkpoint_store.touch_session(thread_id, now)
+        for expired_thread_id in expired:
+            self._evict(expired_thread_id)
+        return {"configurable": {"thread_id": thread_id}}
+
+    async def aget_thread_config(self, session_id: Optional[str]) -> Dict[str, Any]:
+        """Async variant of `get_thread_config`; the checkpoint store writes run on a worker thread."""
+        return await asyncio.to_thread(self.get_thread_config, session_id)
+
+    def mark_updated(self, thread_id: str) -> None:
+        """Schedule a thread for background compaction after a turn."""
+        with self._lock:
+            self._dirty_threads.add(thread_id)
+
+    def _collect_evictions(self, now: float) -> list:
+        """Pop sessions that are idle for longer than the TTL or exceed the LRU capacity."""
+        expired = []
+        while self._sessions:
+            thread_id, last_access = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_sessions or now - last_access > self.session_ttl:
+                self._sessions.popitem(last=False)
+                self._dirty_threads.discard(thread_id)
+                expired.append(thread_id)
+            else:
+                break
+        return expired
+
+    def _evict(self, thread_id: str) -> None:
+        """Remove an evicted thread from the checkpoint store."""
+        try:
+            self.checkpoint_store.delete_thread(thread_id)
+            self.evicted_sessions += 1
+            self.logger.info(f"Evicted conversation thread: {thread_id}")
+        except Exception as e:
+            self.logger.error(f"Error evicting conversation thread {thread_id}: {e}")
+
+    def compact(self) -> None:
+        """Compact every thread updated since the last run and evict idle sessions."""
+        with self._lock:
+            dirty_threads = list(self._dirty_threads)
+            self._dirty_threads.clear()
+            expired = self._collect_evictions(time.time())
+        for thread_id in expired:
+            self._evict(thread_id)
+        for thread_id in dirty_threads:
+            try:
+                self.pruned_checkpoints += self.checkpoint_store.compact_thread(
+                    thread_id, self.max_checkpoints_per_thread
+                )
+            except Exception as e:
+                self.logger.error(f"Error compacting conversation thread {thread_id}: {e}")
+        if dirty_threads or expired:
+            self.checkpoint_store.maintenance()
+
+    def _ensure_compactor(self) -> None:
+        """Start the background compaction thread on first use."""
+        if self._compactor is not None:
+            return
+        with self._lock:
+            if self._compactor is None:
+                self._compactor = threading.Thread(target=self._compaction_loop, daemon=True)
+                self._compactor.start()
+
+    def _compaction_loop(self) -> None:
+        """Run compaction every `compaction_interval` seconds."""
+        while True:
+            time.sleep(self.compaction_interval)
+            try:
+                self.compact()
+            except Exception as e:
+                self.logger.error(f"Error during checkpoint compaction: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report session and checkpoint storage usage.
+
+        Returns:
+            Dictionary with session counts and checkpoint storage statistics
+        """
+        with self._lock:
+            active_sessions = len(self._sessions)
+            pending_compaction = len(self._dirty_threads)
+        return {
+            "active_sessions": active_sessions,
+            "max_sessions": self.max_sessions,
+            "evicted_sessions": self.evicted_sessions,
+            "pending_compaction": pending_compaction,
+            "pruned_checkpoints": self.pruned_checkpoints,
+            **self.checkpoint_store.stats()
+        }
@@ -0,0 +1,61 @@
+import re
+from typing import List
+
+# Tag of the LLM calls whose tokens form the user-facing answer (all other LLM calls are not streamed)
+ANSWER_STREAM_TAG = "answer_stream"
+
+# Whitespace after a sentence end, or a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?:;])\s+|\n+")
+
+class SentenceChunker:
+    """
+    Cuts streamed text into sentence-sized chunks for incremental post-processing.
+
+    Text is only cut at sentence ends or line breaks, and a chunk is released once it
+    holds at least `min_chars` characters. Joining all chunks reproduces the input exactly.
+    """
+    def __init__(self, min_chars: int = 120):
+        """
+        Initialize the chunker.
+
+        Args:
+            min_chars: Minimum chunk length, so that short sentences are processed together
+        """
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text.
+
+        Args:
+            text: Next piece of the stream
+
+        Returns:
+            Chunks that are complete now
+        """
+        self.buffer += text
+        chunks = []
+        while len(self.buffer) >= self.min_chars:
+            cut = None
+            for match in SENTENCE_BOUNDARY.finditer(self.buffer, self.min_chars - 1):
+                # Keep the boundary whitespace with the chunk it ends; never cut at the very end,
+                # the boundary may still grow with the next piece
+                if match.end() < len(self.buffer):
+                    cut = match.end()
+                    break
+            if cut is None:
+                break
+            chunks.append(self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
+        return chunks
+
+    def flush(self) -> List[str]:
+        """Return the remaining text as a final chunk."""
+        chunks = [self.buffer] if self.buffer else []
+        self.buffer = ""
+        return chunks
+
+    def split(self, text: str) -> List[str]:
+        """Chunk a complete text in one go."""
+        return self.feed(text) + self.flush()
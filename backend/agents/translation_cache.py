@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+class TranslationCache:
+    """
+    Content-addressed translation cache: an in-process LRU backed by an optional SQLite file.
+
+    Entries are keyed by (content hash, target language, model deployment), so a
+    different translation model never reuses another model's output.
+    """
+    def __init__(self, max_entries: int = 2048, db_path: Optional[str] = None, namespace: str = ""):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of translations kept in memory
+            db_path: Path of the SQLite file for persistent storage, None for memory only
+            namespace: Model deployment the translations belong to
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translation TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def make_key(self, text: str, target_lang: str) -> str:
+        """Build the cache key from the content hash, the target language and the model deployment."""
+        return f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}:{target_lang}:{self.namespace}"
+
+    def get(self, text: str, target_lang: str) -> Optional[str]:
+        """
+        Look up a cached translation, in memory first and on disk second.
+
+        Args:
+            text: Source text
+            target_lang: Target language code
+
+        Returns:
+            The cached translation, or None on a miss
+        """
+        key = self.make_key(text, target_lang)
+        with self._lock:
+            translation = self._entries.get(key)
+            if translation is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return translation
+
+            if self._conn is not None:
+                row = self._conn.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, target_lang: str, translation: str) -> None:
+        """
+        Store a translation in memory and on disk.
+
+        Args:
+            text: Source text
+            target_lang: Target language code
+            translation: Translated text
+        """
+        key = self.make_key(text, target_lang)
+        with self._lock:
+            self._remember(key, translation)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO translations (key, translation) VALUES (?, ?)",
+                        (key, translation),
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    self.logger.error(f"Error persisting translation: {e}")
+
+    async def aget(self, text: str, target_lang: str) -> Optional[str]:
+        """Async variant of `get`; the SQLite lookup runs on a worker thread instead of the event loop."""
+        if self._conn is None:
+            return self.get(text, target_lang)
+        return await asyncio.to_thread(self.get, text, target_lang)
+
+    async def aput(self, text: str, target_lang: str, translation: str) -> None:
+        """Async variant of `put`; the SQLite write runs on a worker thread instead of the event loop."""
+        if self._conn is None:
+            self.put(text, target_lang, translation)
+            return
+        await asyncio.to_thread(self.put, text, target_lang, translation)
+
+    def _remember(self, key: str, translation: str) -> None:
+        """Add an entry to the in-memory LRU, evicting the least recently used beyond capacity."""
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache size and hit/miss counters."""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0
+        }
@@ -1,17 +1,17 @@
-import requests
+from agents.http_pool import HttpPool
 
 class PubmedSearchAgent:
     """
     Processes medical documents for the RAG system with context-aware chunking.
     """
-    def __init__(self):
+    def __init__(self, http_pool: HttpPool):
         """
         Initialize the Pubmed search agent.
         
         Args:
-            query: User query
+            http_pool: Shared HTTP pool, keeps the connection to PubMed open between searches
         """
-        pass
+        self.http_pool = http_pool
 
     def search_pubmed(self, pubmed_api_url, query: str) -> str:
         """Search PubMed for relevant medical articles."""
@@ -23,7 +23,7 @@ class PubmedSearchAgent:
         }
         
         try:
-            response = requests.get(pubmed_api_url, params=params)
+            response = self.http_pool.get(pubmed_api_url, params=params)
             data = response.json()
             article_ids = data.get("esearchresult", {}).get("idlist", [])
             if not article_ids:
@@ -1,39 +1,38 @@
-import requests
-from langchain_community.tools.tavily_search import TavilySearchResults
+from agents.http_pool import HttpPool
 
 class TavilySearchAgent:
     """
     Processes general documents for the RAG system with context-aware chunking.
     """
-    def __init__(self):
+    def __init__(self, http_pool: HttpPool, api_url: str, api_key: str, max_results: int = 5):
         """
         Initialize the Tavily search agent.
         
         Args:
-            query: User query
+            http_pool: Shared HTTP pool, keeps the connection to Tavily open between searches
+            api_url: Tavily search endpoint
+            api_key: Tavily API key
+            max_results: Number of results per search
         """
-        pass
+        self.http_pool = http_pool
+        self.api_url = api_url
+        self.api_key = api_key
+        self.max_results = max_results
 
     def search_tavily(self, query: str) -> str:
         """Perform a general web search using Tavily API."""
-
-        tavily_search = TavilySearchResults(max_results = 5)
-
-        # url = "https://api.tavily.com/search"
-        # params = {
-        #     "api_key": tavily_api_key,
-        #     "query": query,
-        #     "num_results": 5
-        # }
+        payload = {
+            "api_key": self.api_key,
+            # Strip any surrounding quotes from the query
+            "query": query.strip('"\''),
+            "max_results": self.max_results,
+            "search_depth": "advanced"
+        }
         
         try:
-            # response = requests.get(url, params=params)
-            # Strip any surrounding quotes from the query
-            query = query.strip('"\'')
-            # print("Printing query:", query)
-            search_docs = tavily_search.invoke(query)
-            # data = response.json()
-            # if "results" in data:
+            response = self.http_pool.post(self.api_url, json=payload)
+            response.raise_for_status()
+            search_docs = response.json().get("results", [])
             if len(search_docs):
                 return "\n".join(["title: " + str(res["title"]) + " - " + 
                                   "url: " + str(res["url"]) + " - " + 
@@ -41,4 +40,4 @@ class TavilySearchAgent:
                                   "score: " + str(res["score"]) for res in search_docs])
             return "No relevant results found."
         except Exception as e:
-            return f"Error retrieving web search results: {e}"
\ No newline at end of file
+            return f"Error retrieving web search results: {e}"
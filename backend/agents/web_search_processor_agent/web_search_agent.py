@@ -1,6 +1,6 @@
-import requests
 from typing import Dict
 
+from agents.http_pool import get_http_pool
 from .pubmed_search import PubmedSearchAgent
 from .tavily_search import TavilySearchAgent
 
@@ -10,10 +10,16 @@ class WebSearchAgent:
     """
     
     def __init__(self, config):
-        self.tavily_search_agent = TavilySearchAgent()
+        http_pool = get_http_pool(config)
+        self.tavily_search_agent = TavilySearchAgent(
+            http_pool,
+            api_url=config.web_search.tavily_api_url,
+            api_key=config.tavily_api_key,
+            max_results=config.web_search.tavily_max_results
+        )
         
-        # self.pubmed_search_agent = PubmedSearchAgent()
-        # self.pubmed_api_url = config.pubmed_api_url
+        # self.pubmed_search_agent = PubmedSearchAgent(http_pool)
+        # self.pubmed_api_url = config.web_search.pubmed_api_url
     
     def search(self, query: str) -> str:
         """
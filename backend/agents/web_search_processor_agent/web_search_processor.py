@@ -1,5 +1,6 @@
 import os
 from .web_search_agent import WebSearchAgent
+from agents.streaming import ANSWER_STREAM_TAG
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
@@ -68,7 +69,7 @@ class WebSearchProcessor:
             f"Query: {query}\n\nWeb Search Results:\n{web_results}\n\nResponse:"
         )
         
-        # Invoke the LLM to process the results
-        response = self.llm.invoke(llm_prompt)
+        # Invoke the LLM to process the results (tagged so that its tokens can be streamed to the user)
+        response = self.llm.invoke(llm_prompt, config={"tags": [ANSWER_STREAM_TAG]})
         
         return response
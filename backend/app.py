@@ -1,31 +1,50 @@
 import os
+import json
 import uuid
+import asyncio
 import tempfile
 from typing import Dict, Union, Optional, List
 import glob
 import threading
 import time
 from io import BytesIO
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Request, Response, Cookie
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 import uvicorn
-import requests
 from werkzeug.utils import secure_filename
 from pydub import AudioSegment
 
 from config import Config
-from agents.agent_decision import process_query
+from agents.http_pool import get_http_pool
+from agents.agent_decision import aprocess_query, stream_query, get_agent_graph, get_metrics, prewarm_translations, rag_service
 
 # Load configuration
 config = Config()
 
+# Keep-alive connections to the Azure Speech API, shared with the web search integrations
+http_pool = get_http_pool(config)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build shared resources once at startup instead of per request."""
+    start_time = time.time()
+    get_agent_graph()
+    print(f"Compiled agent graph in {time.time() - start_time:.3f}s")
+    # Load the RAG models in the background, /health reports when they are ready
+    rag_service.warmup()
+    # Translate canned responses in the background (served from disk after the first run)
+    threading.Thread(target=prewarm_translations, daemon=True).start()
+    yield
+    await http_pool.aclose()
+
 # Initialize FastAPI app
-app = FastAPI(title="Multi-Agent Medical Chatbot", version="2.0")
+app = FastAPI(title="Multi-Agent Medical Chatbot", version="2.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -83,10 +102,15 @@ class SpeechRequest(BaseModel):
 @app.get("/health")
 def health_check():
     """Health check endpoint for Docker health checks"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "rag": rag_service.status()}
+
+@app.get("/metrics")
+def metrics():
+    """Runtime metrics (sessions, checkpoint memory)"""
+    return get_metrics()
 
 @app.post("/api/chat")
-def chat(
+async def chat(
     request: QueryRequest, 
     response: Response, 
     session_id: Optional[str] = Cookie(None)
@@ -97,7 +121,7 @@ def chat(
         session_id = str(uuid.uuid4())
     
     try:
-        response_data = process_query(request.query)
+        response_data = await aprocess_query(request.query, session_id=session_id)
         response_text = response_data['messages'][-1].content
         
         # Set session cookie
@@ -122,6 +146,37 @@ def chat(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+def chat_stream(
+    request: QueryRequest,
+    session_id: Optional[str] = Cookie(None)
+):
+    """Process user text query and stream the response as server-sent events."""
+    # Generate session ID for cookie if it doesn't exist
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    def event_stream():
+        try:
+            for event in stream_query(request.query, session_id=session_id):
+                # If it's the skin lesion segmentation agent, check for output image
+                if event["type"] == "done" and event["agent"] == "SKIN_LESION_AGENT, HUMAN_VALIDATION":
+                    segmentation_path = os.path.join(SKIN_LESION_OUTPUT, "segmentation_plot.png")
+                    if os.path.exists(segmentation_path):
+                        event["result_image"] = f"{config.api.base_url}/data/runtime/analysis_output/segmentation_plot.png"
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
+    response = StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Set session cookie
+    response.set_cookie(key="session_id", value=session_id)
+    return response
+
 @app.post("/api/upload")
 async def upload_image(
     response: Response,
@@ -165,7 +220,7 @@ async def upload_image(
     
     try:
         query = {"text": text, "image": file_path}
-        response_data = process_query(query)
+        response_data = await aprocess_query(query, session_id=session_id)
         response_text = response_data['messages'][-1].content
 
         # Set session cookie
@@ -197,7 +252,7 @@ async def upload_image(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/validate")
-def validate_medical_output(
+async def validate_medical_output(
     response: Response,
     validation_result: str = Form(...), 
     comments: Optional[str] = Form(None),
@@ -217,7 +272,7 @@ def validate_medical_output(
         if comments:
             validation_query += f" Comments: {comments}"
         
-        response_data = process_query(validation_query)
+        response_data = await aprocess_query(validation_query, session_id=session_id)
 
         if validation_result.lower() == 'yes':
             return {
@@ -235,6 +290,13 @@ def validate_medical_output(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def convert_to_mp3(source_path: str, mp3_path: str) -> bytes:
+    """Convert an audio file to MP3 and return the MP3 bytes."""
+    audio = AudioSegment.from_file(source_path)
+    audio.export(mp3_path, format="mp3")
+    with open(mp3_path, "rb") as mp3_file:
+        return mp3_file.read()
+
 @app.post("/api/transcribe")
 async def transcribe_audio(audio: UploadFile = File(...), language: str = Form("vi-VN")):
     """Endpoint to transcribe speech using Azure Speech-to-Text API"""
@@ -255,7 +317,7 @@ async def transcribe_audio(audio: UploadFile = File(...), language: str = Form("
             f.write(audio_content)
         
         # Debug: Print file size to check if it's empty
-        file_size = os.path.getsize(temp_audio)
+        file_size = len(audio_content)
         print(f"Received audio file size: {file_size} bytes")
         
         if file_size == 0:
@@ -268,13 +330,11 @@ async def transcribe_audio(audio: UploadFile = File(...), language: str = Form("
         mp3_path = f"./{SPEECH_DIR}/speech_{uuid.uuid4()}.mp3"
         
         try:
-            # Use pydub with format detection
-            audio = AudioSegment.from_file(temp_audio)
-            audio.export(mp3_path, format="mp3")
+            # Use pydub with format detection (ffmpeg decoding is CPU-bound, keep it off the event loop)
+            audio_data = await asyncio.get_running_loop().run_in_executor(None, convert_to_mp3, temp_audio, mp3_path)
             
             # Debug: Print MP3 file size
-            mp3_size = os.path.getsize(mp3_path)
-            print(f"Converted MP3 file size: {mp3_size} bytes")
+            print(f"Converted MP3 file size: {len(audio_data)} bytes")
 
             # Azure Speech-to-Text API
             azure_url = f"https://{config.speech.azure_speech_region}.stt.speech.microsoft.com/speech/recognition/conversation/cognitiveservices/v1"
@@ -289,11 +349,9 @@ async def transcribe_audio(audio: UploadFile = File(...), language: str = Form("
                 "format": "detailed"
             }
             
-            with open(mp3_path, "rb") as mp3_file:
-                audio_data = mp3_file.read()
-            print(f"Converted audio file into byte array successfully!")
-
-            response = requests.post(azure_url, params=params, headers=headers, data=audio_data)
+            response = await http_pool.apost(
+                azure_url, params=params, headers=headers, content=audio_data, timeout=config.speech.request_timeout
+            )
             
             if response.status_code != 200:
                 return JSONResponse(
@@ -372,7 +430,9 @@ async def generate_speech(request: SpeechRequest):
         """
 
         # Send request to Azure Speech API
-        response = requests.post(azure_url, headers=headers, data=ssml.encode('utf-8'))
+        response = await http_pool.apost(
+            azure_url, headers=headers, content=ssml.encode('utf-8'), timeout=config.speech.request_timeout
+        )
 
         if response.status_code != 200:
             return JSONResponse(
@@ -13,6 +13,7 @@ Each llm definition has unique temperature value relevant to the specific class.
 import os
 from dotenv import load_dotenv
 from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
+from agents.embedding_cache import CachedEmbeddings
 
 # Load environment variables from .env file
 load_dotenv()
@@ -27,6 +28,22 @@ class AgentDecisoinConfig:
             openai_api_version = os.getenv("openai_api_version"),  # Ensure this matches your API version
             temperature = 0.1  # Deterministic
         )
+        self.concurrent_preflight = True  # Run input guardrails in parallel with image analysis and routing
+        self.preflight_workers = 8  # Thread pool size for the concurrent preflight
+        self.fast_route_embeddings = True  # Match queries against the examples below before calling the decision LLM
+        self.fast_route_similarity_threshold = 0.90  # Minimum cosine similarity for an embedding match
+        self.fast_route_max_words = 8  # Longer queries skip the embedding match (the examples below are short small talk)
+        self.fast_route_min_word_overlap = 0.5  # Share of query words that must occur in the examples for the query to be embedded
+        self.fast_route_examples = {  # Example utterances per agent for embedding-based routing
+            "CONVERSATION_AGENT": [
+                "Hello, how are you?",
+                "Good morning!",
+                "Thank you for your help.",
+                "Who are you?",
+                "What can you do?",
+                "Goodbye, see you later.",
+            ],
+        }
 
 class ConversationConfig:
     def __init__(self):
@@ -38,6 +55,12 @@ class ConversationConfig:
             openai_api_version = os.getenv("openai_api_version"),  # Ensure this matches your API version
             temperature = 0.7  # Creative but factual
         )
+        self.rewrite_english_queries = False  # Obviously English queries skip the normalization LLM call unless enabled
+        self.translation_cache_size = 2048  # Translations kept in memory across turns
+        self.translation_cache_path = "./data/runtime/translation_cache.sqlite"  # Persistent translation store, None for memory only
+        self.translation_prewarm_languages = ["vi"]  # Fixed response templates are translated to these languages at startup
+        self.stream_chunk_min_chars = 120  # Streamed answers are guardrailed and translated in sentence chunks of at least this length
+        self.stream_workers = 8  # Chunks post-processed concurrently while the answer is still being generated
 
 class WebSearchConfig:
     def __init__(self):
@@ -50,6 +73,9 @@ class WebSearchConfig:
             temperature = 0.3  # Slightly creative but factual
         )
         self.context_limit = 20     # include last 20 messsages (10 Q&A pairs) in history
+        self.tavily_api_url = "https://api.tavily.com/search"
+        self.tavily_max_results = 5
+        self.pubmed_api_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
 
 class RAGConfig:
     def __init__(self):
@@ -63,8 +89,12 @@ class RAGConfig:
         self.url = os.getenv("QDRANT_URL")
         self.api_key = os.getenv("QDRANT_API_KEY")
         self.collection_name = "medical_assistance_rag"  # Ensure a valid name
-        self.chunk_size = 512  # Modify based on documents and performance
-        self.chunk_overlap = 50  # Modify based on documents and performance
+        self.chunk_size = 512  # Tokens per chunk of the local splitter (fallback and "local" chunking mode)
+        self.chunk_overlap = 50  # Tokens shared by consecutive pieces of an oversized section
+        self.chunking_mode = "llm"  # "llm" for semantic chunking, "local" to split by headings and tokens without LLM calls (bulk ingestion)
+        self.chunking_window_tokens = 6000  # Longer documents are chunked in windows of at most this many tokens
+        self.chunking_window_overlap = 2  # Sections repeated at the start of the next window
+        self.chunking_concurrency = 4  # Windows of one document chunked concurrently
         # self.embedding_model = "text-embedding-3-large"
         # Initialize Azure OpenAI Embeddings
         self.embedding_model = AzureOpenAIEmbeddings(
@@ -74,6 +104,11 @@ class RAGConfig:
             openai_api_key = os.getenv("embedding_openai_api_key"),  # Replace with your Azure OpenAI API key
             openai_api_version = os.getenv("embedding_openai_api_version")  # Ensure this matches your API version
         )
+        # Persistent content-hash -> vector cache in front of the embeddings deployment
+        self.use_embedding_cache = True
+        self.embedding_cache_dir = "./data/knowledge_base/embedding_cache"
+        if self.use_embedding_cache:
+            self.embedding_model = CachedEmbeddings(self.embedding_model, self.embedding_cache_dir)
         self.llm = AzureChatOpenAI(
             deployment_name = os.getenv("deployment_name"),  # Replace with your Azure deployment name
             model_name = os.getenv("model_name"),  # Replace with your Azure model name
@@ -88,7 +123,8 @@ class RAGConfig:
             azure_endpoint = os.getenv("azure_endpoint"),  # Replace with your Azure endpoint
             openai_api_key = os.getenv("openai_api_key"),  # Replace with your Azure OpenAI API key
             openai_api_version = os.getenv("openai_api_version"),  # Ensure this matches your API version
-            temperature = 0.5  # Slightly creative but factual
+            temperature = 0.5,  # Slightly creative but factual
+            max_retries = 6  # Rate limits and transient errors are retried with backoff, honouring Retry-After
         )
         self.chunker_model = AzureChatOpenAI(
             deployment_name = os.getenv("deployment_name"),  # Replace with your Azure deployment name
@@ -98,6 +134,25 @@ class RAGConfig:
             openai_api_version = os.getenv("openai_api_version"),  # Ensure this matches your API version
             temperature = 0.0  # factual
         )
+        # Image summarization during ingestion: concurrent vision calls, cached by the hash of the image bytes
+        self.image_summary_concurrency = 8  # Images of a document summarized at once
+        self.image_summary_cache_path = "./data/knowledge_base/image_summary_cache.sqlite"  # None to disable the cache
+        # Local pre-filter: images failing these checks are treated as 'non-informative' without a vision call
+        self.image_prefilter = True
+        self.image_filter_min_side = 48  # Pixels, smaller images are icons / bullets
+        self.image_filter_max_dominant_color = 0.98  # Share of the most frequent color, above is blank, a fill, a separator or line art
+        self.image_filter_min_ink_bands = 3  # Row and column bands (of 16) such an image must draw in to be kept as line art
+        self.image_filter_min_entropy = 1.0  # Bits of the grayscale histogram; skipped images below are reported as low_entropy, above as dominant_color
+        self.image_filter_max_hash_distance = 6  # Perceptual hash bits that may differ for an image to match a known non-informative one
+        # Parallel ingestion (tools/ingest_rag_data.py --workers): docling parsing in worker processes,
+        # summarization / chunking LLM calls in threads, one batched writer into Qdrant and the docstore
+        self.ingestion_workers = 1  # Parsing processes, 1 ingests the files one after another
+        self.ingestion_llm_workers = 8  # Documents summarized and chunked concurrently
+        self.ingestion_max_pending_documents = 16  # Documents between parsing and writing, parsing waits when reached
+        self.ingestion_write_batch_size = 256  # Chunks embedded and upserted per write
+        # Content hashes of ingested files and chunks: unchanged files are skipped, chunks of changed / removed files deleted
+        self.ingestion_manifest_path = "./data/knowledge_base/ingestion_manifest.sqlite"
+        self.ingestion_data_root = "./data"  # Sources are recorded relative to this directory, so chunk IDs survive moving the checkout
         self.response_generator_model = AzureChatOpenAI(
             deployment_name = os.getenv("deployment_name"),  # Replace with your Azure deployment name
             model_name = os.getenv("model_name"),  # Replace with your Azure model name
@@ -108,13 +163,31 @@ class RAGConfig:
         )
         self.top_k = 5
         self.vector_search_type = 'similarity'  # or 'mmr'
+        # Adaptive retrieval depth: search up to `adaptive_max_k` candidates but keep `top_k` unless the scores are flat.
+        # Both margins compare dense cosine similarities (hybrid RRF scores only encode rank agreement); calibrate them
+        # against the ingested collection before enabling
+        self.adaptive_retrieval = False
+        self.adaptive_max_k = 10  # Widest candidate set passed to the reranker
+        self.adaptive_flat_score_margin = 0.03  # Scores are flat when the top_k-th cosine is within this margin of the top one
+        self.adaptive_dominance_margin = 0.08  # Skip the cross-encoder when the top cosine leads the second by at least this margin
+        self.chunks_from_payload = True  # Read chunk text from the Qdrant payload (page_content) instead of the docstore
+        self.chunk_cache_bytes = 32 * 1024 * 1024  # In-memory LRU of docstore chunks, bounded by size (0 disables)
 
         self.huggingface_token = os.getenv("HUGGINGFACE_TOKEN")
 
         self.reranker_model = "cross-encoder/ms-marco-TinyBERT-L-6"
         self.reranker_top_k = 3
+        self.reranker_backend = "onnx"  # "onnx" uses the exported model when present (tools/export_reranker_onnx.py), "torch" always uses sentence-transformers
+        self.reranker_onnx_dir = "./data/models/reranker_onnx"  # Output directory of the ONNX export
+        self.reranker_onnx_quantized = True  # Use the dynamically quantized int8 model
+        self.rerank_batching = True  # Coalesce query-document pairs of concurrent queries into one cross-encoder call
+        self.rerank_max_batch_size = 64  # Maximum number of pairs scored in one call
+        self.rerank_max_wait_ms = 5  # Longest a query waits for others to join its batch
 
         self.max_context_length = 8192  # (Change based on your need) # 1024 proved to be too low (retrieved content length > context length = no context added) in formatting context in response_generator code
+        self.context_tokenizer_encoding = "o200k_base"  # tiktoken encoding used when the response model is unknown to tiktoken
+        self.context_dedup_threshold = 0.8  # Share of overlapping word 5-grams above which a less relevant chunk is dropped
+        self.context_min_partial_tokens = 128  # Smallest leftover budget worth filling with a truncated chunk
 
         self.include_sources = True  # Show links to reference documents and images along with corresponding query response
 
@@ -123,6 +196,13 @@ class RAGConfig:
 
         self.context_limit = 20     # include last 20 messsages (10 Q&A pairs) in history
 
+        # Semantic cache of RAG answers, keyed by the embedding of the rewritten English query
+        self.use_semantic_cache = True
+        self.semantic_cache_threshold = 0.95  # Minimum cosine similarity to reuse a cached answer
+        self.semantic_cache_ttl = 3600  # Seconds a cached answer stays valid
+        self.semantic_cache_size = 512  # Maximum number of cached answers, least recently used are evicted
+        self.ingestion_marker_path = "./data/knowledge_base/.last_ingestion"  # Touched on ingestion to invalidate cached answers in every process
+
 class MedicalCVConfig:
     def __init__(self):
         self.brain_tumor_model_path = "./agents/image_analysis_agent/brain_tumor_agent/models/brain_tumor_segmentation.pth"
@@ -146,6 +226,20 @@ class SpeechConfig:
         self.azure_speech_key = os.getenv("AZURE_SPEECH_KEY")
         self.azure_speech_region = os.getenv("AZURE_SPEECH_REGION")
         self.azure_speech_voice_name = "vi-VN-HoaiMyNeural"  # Vietnamese female voice
+        self.request_timeout = 30  # Seconds per Azure Speech API request
+
+class HttpConfig:
+    def __init__(self):
+        self.max_connections_per_host = 10  # Concurrent requests per host, shared by all sessions of the process
+        self.host_limits = {}  # Per-host overrides of max_connections_per_host, e.g. {"api.tavily.com": 4}
+        self.max_keepalive_connections = 20  # Idle connections kept open for reuse
+        self.keepalive_expiry = 60  # Seconds an idle connection stays open
+        self.timeout = 20  # Seconds per read / write
+        self.connect_timeout = 5  # Seconds to establish a connection
+        self.max_retries = 2  # Retries after connection errors and retryable responses
+        self.backoff_factor = 0.5  # Seconds before the first retry, doubled for every further retry
+        self.max_backoff = 8  # Upper bound of a single backoff, also for Retry-After
+        self.retry_statuses = [429, 500, 502, 503, 504]
 
 class ValidationConfig:
     def __init__(self):
@@ -160,6 +254,15 @@ class ValidationConfig:
         self.validation_timeout = 300
         self.default_action = "reject"
 
+class SessionConfig:
+    def __init__(self):
+        self.max_sessions = 1000  # Conversation threads kept in memory, least recently used are evicted first
+        self.session_ttl = 3600  # Seconds of inactivity before a conversation thread is evicted
+        self.max_checkpoints_per_thread = 2  # Older checkpoints of a thread are dropped by the background compactor
+        self.checkpointer_backend = "sqlite"  # "sqlite" (persistent, survives restarts) or "memory"
+        self.checkpoint_db_path = "./data/runtime/conversation_checkpoints.sqlite"  # Used by the sqlite backend
+        self.compaction_interval = 30  # Seconds between background compaction runs
+
 class APIConfig:
     def __init__(self):
         self.host = "0.0.0.0"
@@ -186,6 +289,8 @@ class Config:
         self.api = APIConfig()
         self.speech = SpeechConfig()
         self.validation = ValidationConfig()
+        self.session = SessionConfig()
+        self.http = HttpConfig()
         self.ui = UIConfig()
         self.eleven_labs_api_key = os.getenv("ELEVEN_LABS_API_KEY")
         self.tavily_api_key = os.getenv("TAVILY_API_KEY")
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend packages the same way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Placeholder credentials so the configuration can build its (unused) API clients offline
+for name in ("deployment_name", "model_name", "azure_endpoint", "openai_api_key", "openai_api_version",
+             "embedding_deployment_name", "embedding_model_name", "embedding_azure_endpoint",
+             "embedding_openai_api_key", "embedding_openai_api_version"):
+    os.environ.setdefault(name, "https://example.invalid" if name.endswith("endpoint") else "test")
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Default configuration whose relative data paths point into a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    from config import Config
+    return Config()
@@ -0,0 +1,121 @@
+import threading
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from agents.checkpoint_store import MemoryCheckpointStore, SqliteCheckpointStore
+
+
+def put_checkpoints(saver, thread_id, count):
+    """Write `count` checkpoints, each with a new version of the messages channel."""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    for version in range(1, count + 1):
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_versions"] = {"messages": version}
+        if hasattr(saver, "blobs"):
+            saver.blobs[(thread_id, "", "messages", version)] = ("json", b"x" * 10)
+        config = saver.put(config, checkpoint, {}, {"messages": version})
+    return config
+
+
+def make_store_with_blobs():
+    """Memory store whose saver keeps channel values in `blobs`, as newer releases do."""
+    store = MemoryCheckpointStore()
+    store.checkpointer.blobs = {}
+    return store
+
+
+def test_compact_keeps_latest_checkpoints():
+    store = MemoryCheckpointStore()
+    put_checkpoints(store.checkpointer, "t1", 5)
+
+    assert store.compact_thread("t1", keep=2) == 3
+    assert store.stats()["checkpoints"] == 2
+    assert store.compact_thread("t1", keep=2) == 0
+
+
+def test_compact_drops_unreferenced_blobs():
+    store = make_store_with_blobs()
+    put_checkpoints(store.checkpointer, "t1", 5)
+    put_checkpoints(store.checkpointer, "t2", 2)
+
+    store.compact_thread("t1", keep=2)
+
+    versions = sorted(key[3] for key in store.checkpointer.blobs if key[0] == "t1")
+    assert versions == [4, 5]
+    assert sum(1 for key in store.checkpointer.blobs if key[0] == "t2") == 2
+
+
+def test_delete_thread_removes_blobs():
+    store = make_store_with_blobs()
+    put_checkpoints(store.checkpointer, "t1", 3)
+    put_checkpoints(store.checkpointer, "t2", 1)
+
+    store.delete_thread("t1")
+
+    assert "t1" not in store.checkpointer.storage
+    assert all(key[0] == "t2" for key in store.checkpointer.blobs)
+
+
+def test_stats_count_blobs():
+    store = make_store_with_blobs()
+    put_checkpoints(store.checkpointer, "t1", 3)
+
+    stats = store.stats()
+    assert stats["checkpoints"] == 3
+    assert stats["blobs"] == 3
+    assert stats["checkpoint_bytes"] >= 30
+
+
+def test_compaction_does_not_race_writes():
+    store = MemoryCheckpointStore()
+    saver = store.checkpointer
+    errors = []
+
+    def writer(thread_id):
+        try:
+            config = put_checkpoints(saver, thread_id, 1)
+            for _ in range(200):
+                config = saver.put(config, empty_checkpoint(), {}, {})
+                saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+        except Exception as e:
+            errors.append(e)
+
+    writers = [threading.Thread(target=writer, args=(f"t{i}",)) for i in range(4)]
+    for thread in writers:
+        thread.start()
+    while any(thread.is_alive() for thread in writers):
+        for i in range(4):
+            store.compact_thread(f"t{i}", keep=2)
+        store.stats()
+    for thread in writers:
+        thread.join()
+
+    assert errors == []
+
+
+def test_sqlite_compact_keeps_latest_and_drops_their_writes(tmp_path):
+    store = SqliteCheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    config = put_checkpoints(store.checkpointer, "t1", 5)
+    store.checkpointer.put_writes(config, [("messages", "latest")], "task")
+
+    assert store.compact_thread("t1", keep=2) == 3
+    assert store.stats()["checkpoints"] == 2
+    latest = store.checkpointer.get_tuple({"configurable": {"thread_id": "t1", "checkpoint_ns": ""}})
+    assert latest.config["configurable"]["checkpoint_id"] == config["configurable"]["checkpoint_id"]
+    assert latest.pending_writes
+
+
+def test_sqlite_sessions_survive_restart(tmp_path):
+    db_path = str(tmp_path / "checkpoints.sqlite")
+    store = SqliteCheckpointStore(db_path)
+    put_checkpoints(store.checkpointer, "t1", 2)
+    store.touch_session("t1", 10.0)
+    store.touch_session("t2", 20.0)
+
+    reopened = SqliteCheckpointStore(db_path)
+    assert reopened.load_sessions() == {"t1": 10.0, "t2": 20.0}
+    assert reopened.stats()["checkpoints"] == 2
+
+    reopened.delete_thread("t1")
+    assert reopened.load_sessions() == {"t2": 20.0}
+    assert reopened.stats()["checkpoints"] == 0
@@ -0,0 +1,71 @@
+import pytest
+
+from agents.rag_agent.context_packer import ContextPacker
+
+TOPICS = ["pneumonia", "melanoma", "glioma", "asthma", "diabetes", "sepsis", "anemia", "migraine"]
+
+
+def chunk(topic, score, sentences=20):
+    """A chunk about one topic; chunks about different topics share no word 5-grams."""
+    content = " ".join(f"Sentence {i} explains how {topic} is diagnosed and treated in case {i}." for i in range(sentences))
+    return {"content": content, "score": score}
+
+
+@pytest.fixture
+def packer(config):
+    config.rag.max_context_length = 600
+    config.rag.context_min_partial_tokens = 50
+    return ContextPacker(config)
+
+
+def test_context_fits_the_token_budget(packer):
+    docs = [chunk(topic, score=1.0 - i / 10) for i, topic in enumerate(TOPICS)]
+
+    context, packed, report = packer.pack(docs)
+
+    assert report["context_tokens"] <= packer.max_tokens
+    assert packer.count_tokens(context) <= packer.max_tokens
+    assert 0 < report["chunks_packed"] < len(docs)
+
+
+def test_most_relevant_chunks_come_first(packer):
+    docs = [chunk("asthma", score=0.2), chunk("pneumonia", score=0.9), chunk("glioma", score=0.5)]
+
+    _context, packed, _report = packer.pack(docs)
+
+    assert [doc["score"] for doc in packed] == sorted((doc["score"] for doc in packed), reverse=True)
+    assert packed[0]["score"] == 0.9
+
+
+def test_leftover_budget_is_filled_with_a_truncated_chunk(packer):
+    first = chunk("pneumonia", score=0.9, sentences=5)
+    second = chunk("melanoma", score=0.8, sentences=100)
+
+    context, packed, report = packer.pack([first, second])
+
+    assert report["chunks_truncated"] == 1
+    assert len(packed) == 2
+    assert context.startswith(first["content"])
+    assert second["content"] not in context
+
+
+def test_exact_and_near_duplicates_are_dropped(packer):
+    original = chunk("pneumonia", score=0.9, sentences=4)
+    reformatted = {"content": "  " + original["content"].replace(" ", "\n", 3), "score": 0.8}
+    contained = {"content": original["content"].split(" Sentence 3")[0], "score": 0.7}
+    distinct = chunk("melanoma", score=0.6, sentences=4)
+
+    _context, packed, report = packer.pack([original, reformatted, contained, distinct])
+
+    assert packed == [original, distinct]
+    assert report["chunks_duplicate"] == 2
+
+
+def test_partial_overlap_below_the_threshold_is_kept(packer):
+    first = chunk("pneumonia", score=0.9, sentences=10)
+    # Shares its first two sentences with the first chunk, the rest is new
+    overlapping = {"content": " ".join(first["content"].split(". ")[:2]) + ". " + chunk("glioma", 0.0, 8)["content"], "score": 0.8}
+
+    _context, packed, _report = packer.pack([first, overlapping])
+
+    assert len(packed) == 2
@@ -0,0 +1,66 @@
+import re
+
+import pytest
+
+from agents.fast_router import FastRouter
+
+
+class BagOfWordsEmbeddings:
+    """Deterministic stand-in for the embedding model that counts its calls."""
+    def __init__(self):
+        self.vocabulary = {}
+        self.query_calls = 0
+
+    def _embed(self, text):
+        vector = [0.0] * 64
+        for word in re.findall(r"[a-z']+", text.lower()):
+            vector[self.vocabulary.setdefault(word, len(self.vocabulary)) % 64] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return self._embed(text)
+
+
+@pytest.fixture
+def router(config):
+    config.rag.embedding_model = BagOfWordsEmbeddings()
+    return FastRouter(config)
+
+
+def test_greeting_is_routed_by_rule_without_embedding(router):
+    decision = router.route("Hello there!", False, None)
+
+    assert decision["agent"] == "CONVERSATION_AGENT"
+    assert decision["method"] == "rule"
+    assert router.embedding_model.query_calls == 0
+
+
+def test_image_is_routed_to_its_vision_agent(router):
+    decision = router.route("what is this?", True, "chest x-ray")
+
+    assert decision["agent"] == "CHEST_XRAY_AGENT"
+    assert router.embedding_model.query_calls == 0
+
+
+def test_medical_query_skips_the_embedding(router):
+    assert router.route("chest pain when breathing", False, None) is None
+    assert router.embedding_model.query_calls == 0
+    assert router.stats()["embeddings_skipped"] == 1
+
+
+def test_paraphrase_of_an_example_is_embedded_and_matched(router):
+    decision = router.route("what can you do", False, None)
+
+    assert decision["agent"] == "CONVERSATION_AGENT"
+    assert decision["method"] == "embedding"
+    assert router.stats()["queries_embedded"] == 1
+
+
+def test_long_query_skips_the_embedding(router):
+    query = "what can you do for me if I have had a cough for two weeks"
+    assert router.route(query, False, None) is None
+    assert router.embedding_model.query_calls == 0
@@ -0,0 +1,51 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from agents.rag_agent.image_filter import ImageFilter
+
+
+@pytest.fixture
+def image_filter(config):
+    return ImageFilter(config)
+
+
+def flowchart(width, height, line_width):
+    """Black-and-white flowchart: three boxes joined by arrows and a side branch."""
+    image = Image.new("1", (width, height), 1)
+    draw = ImageDraw.Draw(image)
+    box_width, box_height = width // 4, height // 6
+    left = width // 3
+    for step in range(3):
+        top = height // 12 + step * height // 3
+        draw.rectangle((left, top, left + box_width, top + box_height), outline=0, width=line_width)
+        draw.text((left + 10, top + box_height // 2), f"Step {step + 1}", fill=0)
+        if step < 2:
+            middle = left + box_width // 2
+            draw.line((middle, top + box_height, middle, top + height // 3), fill=0, width=line_width)
+    side = left + box_width + width // 10
+    draw.rectangle((side, height // 2 - box_height, side + box_width, height // 2), outline=0, width=line_width)
+    return image
+
+
+@pytest.mark.parametrize("size, line_width", [((600, 400), 2), ((1200, 800), 1)])
+def test_black_and_white_diagram_is_kept(image_filter, size, line_width):
+    assert image_filter._check(flowchart(*size, line_width)) is None
+
+
+def test_blank_page_is_skipped(image_filter):
+    assert image_filter._check(Image.new("RGB", (300, 300), "white")) == "low_entropy"
+
+
+def test_separator_rule_is_skipped(image_filter):
+    image = Image.new("RGB", (300, 100), "white")
+    ImageDraw.Draw(image).line((0, 50, 300, 50), fill="black", width=2)
+    assert image_filter._check(image) is not None
+
+
+def test_tiny_icon_is_skipped(image_filter):
+    assert image_filter._check(Image.new("RGB", (16, 16), "red")) == "too_small"
+
+
+def test_photo_like_image_is_kept(image_filter):
+    image = Image.linear_gradient("L").convert("RGB")
+    assert image_filter._check(image) is None
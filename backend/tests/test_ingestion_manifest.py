@@ -0,0 +1,33 @@
+import os
+
+from agents.rag_agent.ingestion_manifest import IngestionManifest, source_key
+from agents.rag_agent.vectorstore_qdrant import VectorStore
+
+
+def test_source_key_does_not_depend_on_the_checkout_location(tmp_path):
+    first_checkout = tmp_path / "first" / "data"
+    second_checkout = tmp_path / "second" / "data"
+
+    assert source_key(str(first_checkout / "docs" / "a.pdf"), str(first_checkout)) == "docs/a.pdf"
+    assert source_key(str(second_checkout / "docs" / "a.pdf"), str(second_checkout)) == "docs/a.pdf"
+    assert VectorStore.make_chunk_ids(["chunk"], source_key(str(first_checkout / "docs" / "a.pdf"), str(first_checkout))) == \
+        VectorStore.make_chunk_ids(["chunk"], source_key(str(second_checkout / "docs" / "a.pdf"), str(second_checkout)))
+
+
+def test_source_key_does_not_depend_on_path_spelling(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data_root = "./data"
+
+    assert source_key("data/docs/a.pdf", data_root) == "docs/a.pdf"
+    assert source_key("./data/docs/../docs/a.pdf", data_root) == "docs/a.pdf"
+    assert source_key(os.path.abspath("data/docs/a.pdf"), data_root) == "docs/a.pdf"
+
+
+def test_manifest_finds_chunks_by_any_spelling_of_the_path(tmp_path):
+    data_root = tmp_path / "data"
+    manifest = IngestionManifest(str(tmp_path / "manifest.sqlite"), str(data_root))
+    manifest.record(str(data_root / "docs" / "a.pdf"), "hash-a", {"id-1": "chunk-hash-1"})
+
+    assert manifest.content_hash(str(data_root / "docs" / ".." / "docs" / "a.pdf")) == "hash-a"
+    assert manifest.chunk_ids(str(data_root / "docs" / "a.pdf")) == ["id-1"]
+    assert manifest.all_chunk_ids() == {"id-1"}
@@ -0,0 +1,29 @@
+import threading
+from types import SimpleNamespace
+
+from agents.rag_agent.ingestion_pipeline import IngestionPipeline
+
+
+def test_writer_error_does_not_deadlock_the_feeder(tmp_path):
+    # One slot: the feeder is blocked waiting for it when the writer fails on the first document
+    rag = SimpleNamespace(parsed_content_dir=str(tmp_path))
+    pipeline = IngestionPipeline(rag, workers=1, llm_workers=1, max_pending_documents=1, write_batch_size=10)
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("writer crashed")
+    pipeline.logger.error = crash
+
+    outcome = {}
+
+    def run():
+        try:
+            pipeline.run([str(tmp_path / f"missing-{i}.pdf") for i in range(5)], {})
+        except RuntimeError as e:
+            outcome["error"] = e
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    runner.join(timeout=60)
+
+    assert not runner.is_alive()
+    assert str(outcome["error"]) == "writer crashed"
@@ -0,0 +1,29 @@
+import pytest
+
+from agents.language_detection import detect_language_locally
+
+
+@pytest.mark.parametrize("text", [
+    "toi bi dau bung do an",
+    "to bi ho",
+    "No me siento bien",
+    "Me duele la cabeza",
+    "Was ist das?",
+    "ok",
+])
+def test_ambiguous_ascii_is_left_to_the_llm(text):
+    assert detect_language_locally(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "hello",
+    "how are you",
+    "What are the symptoms of pneumonia?",
+    "I have a headache and fever",
+])
+def test_unambiguous_english(text):
+    assert detect_language_locally(text) == "en"
+
+
+def test_accented_vietnamese():
+    assert detect_language_locally("tôi bị đau bụng") == "vi"
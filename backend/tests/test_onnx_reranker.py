@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+from agents.rag_agent.onnx_reranker import load_onnx_reranker, rankings_agree
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_ABS_DIFF = 0.05  # Same tolerance as the parity check of tools/export_reranker_onnx.py
+
+# Each query with passages of decreasing relevance
+QUERIES = {
+    "What are the symptoms of pneumonia?": [
+        "Pneumonia causes cough with phlegm, fever, chills and difficulty breathing.",
+        "Pneumonia is an infection that inflames the air sacs in one or both lungs.",
+        "Chest X-rays are used to confirm a pneumonia diagnosis.",
+        "Brain tumors are abnormal growths of cells in the brain.",
+        "Regular exercise improves cardiovascular health.",
+    ],
+    "How is melanoma diagnosed?": [
+        "A skin biopsy is the main way to diagnose melanoma and other skin cancers.",
+        "Dermatologists examine suspicious moles using dermoscopy before a biopsy.",
+        "Melanoma is the most dangerous type of skin cancer.",
+        "Vaccination schedules for children differ between countries.",
+        "The liver filters blood coming from the digestive tract.",
+    ],
+    "What is a glioma?": [
+        "Gliomas are tumors that arise from glial cells in the brain or spine.",
+        "Glioblastoma is the most aggressive form of glioma in adults.",
+        "MRI scans are used to locate brain tumors.",
+        "Pneumonia causes cough with phlegm, fever, chills and difficulty breathing.",
+        "Regular exercise improves cardiovascular health.",
+    ],
+}
+
+
+@pytest.fixture
+def backends(config):
+    config.rag.reranker_onnx_dir = os.path.join(BACKEND_DIR, config.rag.reranker_onnx_dir)
+    onnx_model = load_onnx_reranker(config)
+    if onnx_model is None:
+        pytest.skip("No ONNX reranker exported for the configured model (run tools/export_reranker_onnx.py)")
+    from sentence_transformers import CrossEncoder
+    try:
+        torch_model = CrossEncoder(config.rag.reranker_model)
+    except Exception as e:
+        pytest.skip(f"Reranker model unavailable: {e}")
+    return torch_model, onnx_model, config.rag.reranker_top_k
+
+
+@pytest.mark.parametrize("query", list(QUERIES))
+def test_onnx_scores_match_pytorch(backends, query):
+    torch_model, onnx_model, top_k = backends
+    pairs = [(query, passage) for passage in QUERIES[query]]
+
+    expected = np.asarray(torch_model.predict(pairs))
+    actual = np.asarray(onnx_model.predict(pairs))
+
+    assert np.max(np.abs(expected - actual)) <= MAX_ABS_DIFF
+    assert rankings_agree(expected, actual, MAX_ABS_DIFF)
+    # The ONNX top-k holds the PyTorch top-k, up to near ties at the cut-off
+    kth_best = np.sort(expected)[::-1][top_k - 1]
+    assert all(expected[index] >= kth_best - 2 * MAX_ABS_DIFF for index in np.argsort(-actual)[:top_k])
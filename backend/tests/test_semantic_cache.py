@@ -0,0 +1,90 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.rag_agent import semantic_cache
+from agents.rag_agent.semantic_cache import SemanticCache, mark_ingestion
+
+
+class KeywordEmbeddings:
+    """Identical texts get identical vectors, different texts orthogonal ones."""
+    def __init__(self):
+        self.texts = {}
+
+    def embed_query(self, text):
+        vector = [0.0] * 32
+        vector[self.texts.setdefault(text, len(self.texts)) % 32] = 1.0
+        return vector
+
+
+@pytest.fixture
+def cache(config):
+    config.rag.embedding_model = KeywordEmbeddings()
+    config.rag.semantic_cache_size = 2
+    return SemanticCache(config)
+
+
+def ask(cache, query, context=""):
+    """Look up a query and cache an answer on a miss; returns the cached response or None."""
+    response, vector = cache.lookup(query, context)
+    if response is None:
+        cache.store(query, vector, {"response": f"answer to {query}"}, context)
+    return response
+
+
+def test_repeated_query_hits(cache):
+    assert ask(cache, "What is pneumonia?") is None
+    assert ask(cache, "What is pneumonia?") == {"response": "answer to What is pneumonia?"}
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_after_the_ttl(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    ask(cache, "What is pneumonia?")
+
+    now[0] += cache.ttl - 1
+    assert ask(cache, "What is pneumonia?") is not None
+    now[0] += 2
+    assert ask(cache, "What is pneumonia?") is None
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    ask(cache, "first")
+    ask(cache, "second")
+    ask(cache, "first")  # Now the most recently used
+    ask(cache, "third")
+
+    assert cache.stats()["entries"] == 2
+    assert ask(cache, "first") is not None
+    assert ask(cache, "second") is None
+
+
+def test_context_mismatch_misses(cache):
+    ask(cache, "What about its treatment?", context=SemanticCache.context_key("User: What is pneumonia?\n", ""))
+
+    other_context = SemanticCache.context_key("User: What is melanoma?\n", "")
+    assert ask(cache, "What about its treatment?", context=other_context) is None
+
+
+def test_ingestion_marker_invalidates(cache, config):
+    ask(cache, "What is pneumonia?")
+    mark_ingestion(config)
+    # The marker's mtime is the version; make sure it differs even on coarse file systems
+    os.utime(config.rag.ingestion_marker_path, (time.time() + 10, time.time() + 10))
+
+    assert ask(cache, "What is pneumonia?") is None
+    assert cache.stats()["invalidations"] >= 1
+
+
+def test_context_key_ignores_assistant_answers():
+    first = "User: What is pneumonia?\nAssistant: Pneumonia is a lung infection.\nUser: What about its treatment?\n"
+    second = "User: what is  pneumonia?\nAssistant: An infection of the lungs,\nusually bacterial.\nUser: What about its treatment?\n"
+
+    assert SemanticCache.context_key(first, "What about its treatment?") == \
+        SemanticCache.context_key(second, "What about its treatment?")
+    assert SemanticCache.context_key("User: What is pneumonia?\n", "What is pneumonia?") == ""
+    assert SemanticCache.context_key(first, "What about its treatment?") != \
+        SemanticCache.context_key(first.replace("pneumonia", "melanoma"), "What about its treatment?")
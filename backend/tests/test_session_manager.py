@@ -0,0 +1,84 @@
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from agents import session_manager
+from agents.checkpoint_store import MemoryCheckpointStore, SqliteCheckpointStore
+from agents.session_manager import SessionThreadManager
+from test_checkpoint_store import put_checkpoints
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    return SqliteCheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+
+
+def test_async_thread_config_touches_the_store_off_the_event_loop(config, sqlite_store):
+    manager = SessionThreadManager(sqlite_store, config)
+    threads = []
+    touch_session = sqlite_store.touch_session
+
+    def recording_touch(thread_id, last_access):
+        threads.append(threading.current_thread())
+        touch_session(thread_id, last_access)
+    sqlite_store.touch_session = recording_touch
+
+    thread_config = asyncio.run(manager.aget_thread_config("session-1"))
+
+    assert thread_config == {"configurable": {"thread_id": "session-1"}}
+    assert threads and threading.main_thread() not in threads
+    assert "session-1" in sqlite_store.load_sessions()
+
+
+@pytest.fixture
+def manager(config):
+    config.session.max_sessions = 2
+    config.session.session_ttl = 100
+    config.session.max_checkpoints_per_thread = 2
+    store = MemoryCheckpointStore()
+    manager = SessionThreadManager(store, config)
+    manager._compactor = threading.current_thread()  # Tests run compaction themselves
+    return manager
+
+
+def test_least_recently_used_session_is_evicted(manager):
+    put_checkpoints(manager.checkpoint_store.checkpointer, "a", 1)
+    manager.get_thread_config("a")
+    manager.get_thread_config("b")
+    manager.get_thread_config("a")
+    manager.get_thread_config("c")
+
+    assert list(manager._sessions) == ["a", "c"]
+    assert manager.evicted_sessions == 1
+    assert "a" in manager.checkpoint_store.checkpointer.storage
+
+
+def test_idle_session_is_evicted_after_the_ttl(manager, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_manager, "time", SimpleNamespace(time=lambda: now[0], sleep=time.sleep))
+    put_checkpoints(manager.checkpoint_store.checkpointer, "idle", 1)
+    manager.get_thread_config("idle")
+
+    now[0] += manager.session_ttl + 1
+    manager.compact()
+
+    assert "idle" not in manager._sessions
+    assert "idle" not in manager.checkpoint_store.checkpointer.storage
+
+
+def test_compaction_keeps_the_latest_checkpoints_of_updated_threads(manager):
+    saver = manager.checkpoint_store.checkpointer
+    for thread_id in ("updated", "untouched"):
+        manager.get_thread_config(thread_id)
+        put_checkpoints(saver, thread_id, 5)
+    manager.mark_updated("updated")
+
+    manager.compact()
+
+    assert len(saver.storage["updated"][""]) == 2
+    assert len(saver.storage["untouched"][""]) == 5
+    assert manager.stats()["pruned_checkpoints"] == 3
+    assert manager.stats()["pending_compaction"] == 0
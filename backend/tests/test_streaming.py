@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from agents.streaming import SentenceChunker
+
+ANSWER = (
+    "Pneumonia is an infection of the lungs. It causes cough, fever and shortness of breath! "
+    "Is it contagious? Often: yes.\n\nTreatment depends on the cause; bacterial pneumonia is treated "
+    "with antibiotics.\n- Rest\n- Fluids\n- Follow-up chest X-ray after 6 weeks..."
+)
+
+
+def stream(chunker, text, seed):
+    """Feed text in random pieces, as the LLM stream does, and flush at the end."""
+    rng = random.Random(seed)
+    chunks, position = [], 0
+    while position < len(text):
+        step = rng.randint(1, 12)
+        chunks.extend(chunker.feed(text[position:position + step]))
+        position += step
+    return chunks + chunker.flush()
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("min_chars", [1, 20, 120, 1000])
+def test_chunks_concatenate_back_to_the_input(seed, min_chars):
+    chunks = stream(SentenceChunker(min_chars), ANSWER, seed)
+
+    assert "".join(chunks) == ANSWER
+    assert all(len(chunk) >= min_chars for chunk in chunks[:-1])
+
+
+def test_chunks_end_at_sentence_boundaries():
+    chunks = SentenceChunker(20).split(ANSWER)
+
+    assert len(chunks) > 1
+    for chunk in chunks[:-1]:
+        assert chunk[-1].isspace()
+        assert chunk.rstrip()[-1] in ".!?:;" or "\n" in chunk[-2:]
+
+
+def test_flush_drops_buffered_text():
+    chunker = SentenceChunker(120)
+    assert chunker.feed("Stale partial answer that was retried") == []
+
+    assert chunker.flush() == ["Stale partial answer that was retried"]
+    assert chunker.flush() == []
+    assert chunker.split("Fresh answer.") == ["Fresh answer."]
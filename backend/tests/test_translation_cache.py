@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+from agents.translation_cache import TranslationCache
+
+
+def test_async_access_runs_sqlite_off_the_event_loop(tmp_path):
+    cache = TranslationCache(db_path=str(tmp_path / "translations.sqlite"))
+    threads = []
+    get = cache.get
+
+    def recording_get(text, target_lang):
+        threads.append(threading.current_thread())
+        return get(text, target_lang)
+    cache.get = recording_get
+
+    async def run():
+        await cache.aput("Hello", "vi", "Xin chào")
+        return await cache.aget("Hello", "vi")
+
+    assert asyncio.run(run()) == "Xin chào"
+    assert threads and threading.main_thread() not in threads
+
+
+def test_translations_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "translations.sqlite")
+    TranslationCache(db_path=db_path, namespace="gpt-4o").put("Hello", "vi", "Xin chào")
+
+    reopened = TranslationCache(db_path=db_path, namespace="gpt-4o")
+    assert reopened.get("Hello", "vi") == "Xin chào"
+    assert reopened.get("Hello", "vi") == "Xin chào"
+    assert (reopened.disk_hits, reopened.memory_hits) == (1, 1)
+
+
+def test_other_model_or_language_misses(tmp_path):
+    db_path = str(tmp_path / "translations.sqlite")
+    TranslationCache(db_path=db_path, namespace="gpt-4o").put("Hello", "vi", "Xin chào")
+
+    assert TranslationCache(db_path=db_path, namespace="gpt-4o-mini").get("Hello", "vi") is None
+    assert TranslationCache(db_path=db_path, namespace="gpt-4o").get("Hello", "fr") is None
+
+
+def test_memory_is_bounded_and_falls_back_to_disk(tmp_path):
+    cache = TranslationCache(max_entries=2, db_path=str(tmp_path / "translations.sqlite"))
+    for text in ("one", "two", "three"):
+        cache.put(text, "vi", text.upper())
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get("one", "vi") == "ONE"
+    assert cache.disk_hits == 1
+
+
+def test_memory_only_cache_evicts_least_recently_used():
+    cache = TranslationCache(max_entries=2)
+    cache.put("one", "vi", "ONE")
+    cache.put("two", "vi", "TWO")
+    cache.get("one", "vi")
+    cache.put("three", "vi", "THREE")
+
+    assert cache.get("one", "vi") == "ONE"
+    assert cache.get("two", "vi") is None
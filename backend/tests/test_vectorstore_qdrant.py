@@ -0,0 +1,59 @@
+from agents.rag_agent.vectorstore_qdrant import ChunkCache, VectorStore
+
+
+def test_chunk_cache_stays_within_its_byte_budget():
+    cache = ChunkCache(max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.put("c", "cccc")
+
+    assert cache.size_bytes == 8
+    assert cache.get("a") is None
+    assert cache.get("b") == "bbbb"
+
+
+def test_chunk_cache_evicts_least_recently_used():
+    cache = ChunkCache(max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")
+    cache.put("c", "cccc")
+
+    assert cache.get("a") == "aaaa"
+    assert cache.get("b") is None
+
+
+def test_chunk_cache_counts_encoded_bytes():
+    cache = ChunkCache(max_bytes=10)
+    cache.put("vi", "điều trị")  # 8 characters, 11 bytes in UTF-8
+
+    assert cache.get("vi") is None
+    assert cache.size_bytes == 0
+
+
+def test_chunk_cache_replaces_an_entry_without_leaking_size():
+    cache = ChunkCache(max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("a", "aa")
+
+    assert cache.size_bytes == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_chunk_ids_are_stable_across_runs():
+    # Stored IDs must never change, or re-ingestion would duplicate every chunk
+    chunks = ["Pneumonia is a lung infection.", "Pneumonia is a lung infection."]
+
+    assert VectorStore.make_chunk_ids(chunks, "docs/pneumonia.pdf") == [
+        "3c527d60-a62f-5686-9490-edcbce503295",
+        "69b84710-b1ba-55f6-ac73-d4ff0f39e241",
+    ]
+
+
+def test_chunk_ids_differ_across_sources_and_repeats():
+    chunks = ["Shared disclaimer.", "Shared disclaimer.", "Specific content."]
+    first = VectorStore.make_chunk_ids(chunks, "docs/a.pdf")
+    second = VectorStore.make_chunk_ids(chunks, "docs/b.pdf")
+
+    assert len(set(first)) == 3
+    assert not set(first) & set(second)
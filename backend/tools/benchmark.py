@@ -0,0 +1,175 @@
+# Import libraries
+import sys
+import time
+import argparse
+import logging
+import warnings
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent)) # Add project root to path if needed
+warnings.filterwarnings('ignore')
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+parser = argparse.ArgumentParser(description="Micro-benchmarks for the request path.")
+parser.add_argument("--target", type=str, default="graph", choices=["graph", "retrieval", "rerank", "onnx", "router"], help="Component to benchmark")
+parser.add_argument("--iterations", type=int, default=20, help="Number of timed iterations")
+parser.add_argument("--query", type=str, default="What are the common symptoms of pneumonia?", help="Query used by retrieval benchmarks")
+parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrent queries for the rerank benchmark")
+args = parser.parse_args()
+
+def report(label, timings):
+    """Print mean / median / p95 latency in milliseconds."""
+    timings = sorted(t * 1000 for t in timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<40} mean {statistics.mean(timings):8.2f} ms | median {statistics.median(timings):8.2f} ms | p95 {p95:8.2f} ms")
+
+# Per-request graph construction cost: rebuilding on every call vs. reusing the compiled graph
+def benchmark_graph(iterations):
+    from agents.agent_decision import create_agent_graph, get_agent_graph, invalidate_agent_graph
+
+    before = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        create_agent_graph()
+        before.append(time.perf_counter() - start)
+
+    invalidate_agent_graph()
+    start = time.perf_counter()
+    get_agent_graph()
+    first_build = time.perf_counter() - start
+
+    after = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        get_agent_graph()
+        after.append(time.perf_counter() - start)
+
+    print(f"Graph construction ({iterations} iterations, first shared build {first_build * 1000:.2f} ms)")
+    report("before: create_agent_graph() per request", before)
+    report("after: get_agent_graph() per request", after)
+
+# Per-query retrieval cost: rebuilding the sparse encoder and vector store handle vs. reusing it
+# (requires an ingested collection)
+def benchmark_retrieval(iterations, query):
+    from config import Config
+    from agents.rag_agent.vectorstore_qdrant import VectorStore
+
+    vector_store = VectorStore(Config())
+
+    before = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        vector_store.invalidate()
+        vector_store._sparse_embeddings = None
+        vectorstore, docstore = vector_store.load_vectorstore()
+        vector_store.retrieve_relevant_chunks(query=query, vectorstore=vectorstore, docstore=docstore)
+        before.append(time.perf_counter() - start)
+
+    vector_store.load_vectorstore()
+    after = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        vectorstore, docstore = vector_store.load_vectorstore()
+        vector_store.retrieve_relevant_chunks(query=query, vectorstore=vectorstore, docstore=docstore)
+        after.append(time.perf_counter() - start)
+
+    print(f"Retrieval latency per query ({iterations} iterations)")
+    report("before: handle rebuilt per query", before)
+    report("after: cached retrieval handle", after)
+
+# Cross-encoder throughput under concurrent queries: one predict() per query vs. the micro-batcher
+def benchmark_rerank(iterations, concurrency_levels):
+    from config import Config
+    from sentence_transformers import CrossEncoder
+    from agents.rag_agent.reranker import RerankBatcher
+
+    config = Config()
+    model = CrossEncoder(config.rag.reranker_model)
+    model.predict([("warmup", "warmup")])
+    batcher = RerankBatcher(model, config.rag.rerank_max_batch_size, config.rag.rerank_max_wait_ms)
+
+    passage = "Pneumonia is an infection that inflames the air sacs in one or both lungs, which may fill with fluid. " * 6
+    queries = [[(f"What are the symptoms of pneumonia? ({i})", passage)] * config.rag.top_k for i in range(iterations)]
+    pairs_total = sum(len(pairs) for pairs in queries)
+
+    print(f"Reranking throughput ({iterations} queries x {config.rag.top_k} pairs, model {config.rag.reranker_model})")
+    for concurrency in concurrency_levels:
+        for label, score in (("unbatched", model.predict), ("micro-batched", batcher.predict)):
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                start = time.perf_counter()
+                list(executor.map(score, queries))
+                elapsed = time.perf_counter() - start
+            print(f"concurrency {concurrency:<3} {label:<15} {pairs_total / elapsed:10.1f} pairs/sec")
+    print(f"micro-batcher: {batcher.stats()}")
+
+# Per-query reranking latency on CPU: PyTorch vs. the exported ONNX models (run tools/export_reranker_onnx.py first)
+def benchmark_onnx(iterations):
+    from config import Config
+    from sentence_transformers import CrossEncoder
+    from agents.rag_agent.onnx_reranker import OnnxCrossEncoder
+
+    config = Config()
+    passage = "Pneumonia is an infection that inflames the air sacs in one or both lungs, which may fill with fluid. " * 6
+    pairs = [("What are the symptoms of pneumonia?", passage)] * config.rag.top_k
+
+    backends = [("torch fp32", CrossEncoder(config.rag.reranker_model))]
+    backends.append(("onnx fp32", OnnxCrossEncoder(config.rag.reranker_onnx_dir, quantized=False)))
+    quantized = OnnxCrossEncoder(config.rag.reranker_onnx_dir, quantized=True)
+    if quantized.model_file != backends[-1][1].model_file:
+        backends.append(("onnx int8", quantized))
+
+    print(f"Reranking latency per query ({iterations} iterations, {len(pairs)} pairs, model {config.rag.reranker_model})")
+    for label, model in backends:
+        model.predict(pairs)
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            model.predict(pairs)
+            timings.append(time.perf_counter() - start)
+        report(label, timings)
+
+# Latency the fast router adds to short queries it cannot resolve, before they go to the decision LLM:
+# embedding every short query vs. only those whose words occur in the intent examples
+def benchmark_router(iterations):
+    from config import Config
+    from agents.fast_router import FastRouter
+
+    config = Config()
+    # Bypass the embedding cache, so every embedded query pays for the embedding call
+    config.rag.embedding_model = getattr(config.rag.embedding_model, "embeddings", config.rag.embedding_model)
+    router = FastRouter(config)
+    router._get_example_vectors()
+    queries = [
+        "What is pneumonia?",
+        "chest pain when breathing deeply",
+        "Is a fever of 39 dangerous?",
+        "Can you explain my x-ray result?",
+        "what can you help me with",
+    ]
+
+    print(f"Fast router latency of queries that fall back to the decision LLM ({iterations} iterations x {len(queries)} queries)")
+    for label, min_word_overlap in (("before: every short query embedded", 0.0), ("after: word overlap check", config.agent_decision.fast_route_min_word_overlap)):
+        router.min_word_overlap = min_word_overlap
+        router.embedding_counts.clear()
+        timings = []
+        for _ in range(iterations):
+            for query in queries:
+                start = time.perf_counter()
+                decision = router.route(query, False, None)
+                if decision is None:
+                    timings.append(time.perf_counter() - start)
+        report(label, timings)
+        print(f"{'':<40} {router.embedding_counts['embedded']} embedded, {router.embedding_counts['skipped']} skipped")
+
+if __name__ == "__main__":
+    if args.target == "graph":
+        benchmark_graph(args.iterations)
+    elif args.target == "retrieval":
+        benchmark_retrieval(args.iterations, args.query)
+    elif args.target == "rerank":
+        benchmark_rerank(args.iterations, args.concurrency)
+    elif args.target == "onnx":
+        benchmark_onnx(args.iterations)
+    elif args.target == "router":
+        benchmark_router(args.iterations)
@@ -0,0 +1,128 @@
+# Import libraries
+import os
+import sys
+import json
+import inspect
+import argparse
+import logging
+import warnings
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent)) # Add project root to path if needed
+warnings.filterwarnings('ignore')
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+parser = argparse.ArgumentParser(description="Export the reranker cross-encoder to ONNX (optionally int8 quantized) and check score parity.")
+parser.add_argument("--output-dir", type=str, default=None, help="Output directory (defaults to config.rag.reranker_onnx_dir)")
+parser.add_argument("--no-quantize", action="store_true", help="Skip dynamic int8 quantization")
+parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+parser.add_argument("--max-abs-diff", type=float, default=0.05, help="Largest allowed score difference to the PyTorch model")
+args = parser.parse_args()
+
+import numpy as np
+import torch
+from sentence_transformers import CrossEncoder
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+from config import Config
+from agents.rag_agent.onnx_reranker import OnnxCrossEncoder, rankings_agree, ONNX_MODEL_FILE, ONNX_QUANTIZED_MODEL_FILE, ONNX_METADATA_FILE
+
+# Load configuration
+config = Config()
+
+# Query-document pairs covering relevant, unrelated and truncated passages
+PARITY_PAIRS = [
+    ("What are the symptoms of pneumonia?", "Pneumonia causes cough with phlegm, fever, chills and difficulty breathing."),
+    ("What are the symptoms of pneumonia?", "Brain tumors are abnormal growths of cells in the brain."),
+    ("How is melanoma diagnosed?", "A skin biopsy is the main way to diagnose melanoma and other skin cancers."),
+    ("How is melanoma diagnosed?", "Regular exercise improves cardiovascular health."),
+    ("Can COVID-19 be seen on a chest X-ray?", "Chest radiographs of COVID-19 patients often show bilateral ground-glass opacities. " * 40),
+    ("What is a glioma?", "Gliomas are tumors that arise from glial cells in the brain or spine."),
+    ("What is a glioma?", "Vaccination schedules for children differ between countries."),
+    ("hello", "The liver filters blood coming from the digestive tract."),
+]
+
+def export_model(model, output_dir):
+    """Export the transformer behind the CrossEncoder with dynamic batch and sequence axes."""
+    tokenizer = model.tokenizer
+    features = tokenizer(["query"], ["document"], padding=True, truncation=True, return_tensors="pt")
+    torch_model = model.model.eval()
+
+    # Graph inputs follow the order of the forward() signature, not the tokenizer output
+    input_names = [name for name in inspect.signature(torch_model.forward).parameters if name in features]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            torch_model,
+            (),
+            kwargs={name: features[name] for name in input_names},
+            f=os.path.join(output_dir, ONNX_MODEL_FILE),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=args.opset,
+        )
+    tokenizer.save_pretrained(output_dir)
+
+def check_parity(model, output_dir, quantized):
+    """Compare ONNX scores with the PyTorch CrossEncoder on fixed pairs; return (max abs diff, same ranking)."""
+    expected = np.asarray(model.predict(PARITY_PAIRS))
+    actual = OnnxCrossEncoder(output_dir, quantized=quantized).predict(PARITY_PAIRS)
+    max_abs_diff = float(np.max(np.abs(expected - actual)))
+    same_ranking = rankings_agree(expected, actual, args.max_abs_diff)
+    return max_abs_diff, same_ranking
+
+def main():
+    output_dir = args.output_dir or config.rag.reranker_onnx_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"Loading {config.rag.reranker_model}...")
+    model = CrossEncoder(config.rag.reranker_model)
+
+    print(f"Exporting to {os.path.join(output_dir, ONNX_MODEL_FILE)}...")
+    export_model(model, output_dir)
+
+    quantize = not args.no_quantize
+    if quantize:
+        print(f"Quantizing to {os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)}...")
+        quantize_dynamic(
+            os.path.join(output_dir, ONNX_MODEL_FILE),
+            os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE),
+            weight_type=QuantType.QInt8,
+        )
+
+    metadata = {
+        "model_name": config.rag.reranker_model,
+        "max_length": model.max_length or model.tokenizer.model_max_length,
+        "activation": "sigmoid" if isinstance(model.default_activation_function, torch.nn.Sigmoid) else "identity",
+        "quantized": quantize,
+        "opset": args.opset,
+    }
+    with open(os.path.join(output_dir, ONNX_METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    # Parity check against the PyTorch model
+    max_abs_diff, same_ranking = check_parity(model, output_dir, quantized=False)
+    passed = max_abs_diff <= args.max_abs_diff and same_ranking
+    print(f"Parity fp32: max abs diff {max_abs_diff:.4f}, same ranking {same_ranking} -> {'OK' if passed else 'FAILED'}")
+    if not passed:
+        # Do not leave a model behind that the reranker would pick up
+        os.remove(os.path.join(output_dir, ONNX_METADATA_FILE))
+        print("Parity check failed, the ONNX model will not be used.")
+        return False
+
+    if quantize:
+        max_abs_diff, same_ranking = check_parity(model, output_dir, quantized=True)
+        quantized_ok = max_abs_diff <= args.max_abs_diff and same_ranking
+        print(f"Parity int8: max abs diff {max_abs_diff:.4f}, same ranking {same_ranking} -> {'OK' if quantized_ok else 'FAILED'}")
+        if not quantized_ok:
+            metadata["quantized"] = False
+            with open(os.path.join(output_dir, ONNX_METADATA_FILE), "w") as f:
+                json.dump(metadata, f, indent=2)
+            print("The reranker will use the fp32 ONNX model.")
+    return True
+
+if __name__ == "__main__":
+    export_success = main()
+    sys.exit(0 if export_success else 1)
@@ -12,23 +12,30 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 parser = argparse.ArgumentParser(description="Process some command-line arguments.")
 parser.add_argument("--file", type=str, required=False, help="Enter file path to ingest")
 parser.add_argument("--dir", type=str, required=False, help="Enter directory path of files to ingest")
+parser.add_argument("--workers", type=int, default=None, help="Parsing processes for --dir, more than 1 runs the parallel pipeline (defaults to config.rag.ingestion_workers)")
+parser.add_argument("--force", action="store_true", help="Re-ingest files even if they are unchanged since the last ingestion; also deletes chunks missing from the ingestion manifest (a knowledge base built before incremental ingestion) so it is rebuilt once")
 args = parser.parse_args()
 
 # Import your components
 from agents.rag_agent import MedicalRAG
 from config import Config
-# Load configuration
-config = Config()
-rag = MedicalRAG(config)
 
 # Document ingestion
 def data_ingestion():
+    # Built here rather than at import time: parsing workers re-import this script
+    config = Config()
+    rag = MedicalRAG(config)
+
     if args.file: # only one file
         file_path = args.file
-        result = rag.ingest_file(file_path)
+        try:
+            rag.remove_unmanaged_chunks(args.force)
+            result = rag.ingest_file(file_path, force=args.force)
+        except ValueError as e:
+            result = {"success": False, "error": str(e)}
     elif args.dir: # multiple files
         dir_path = args.dir
-        result = rag.ingest_directory(dir_path)
+        result = rag.ingest_directory(dir_path, workers=args.workers, force=args.force)
 
     print("Ingestion result:", json.dumps(result, indent=2))
 
@@ -38,4 +45,4 @@ if __name__ == "__main__":
     print("\nIngesting documents...")
     ingestion_success = data_ingestion()
     if ingestion_success:
-        print("\nSuccessfully ingested the documents.")
\ No newline at end of file
+        print("\nSuccessfully ingested the documents.")
@@ -7,7 +7,7 @@ import { Button } from '@/components/ui/button';
 import { Textarea } from '@/components/ui/textarea';
 import { Card } from '@/components/ui/card';
 import { Mic, MicOff, Paperclip, Send, Trash2 } from 'lucide-react';
-import { sendChatMessage, uploadImage, sendValidation, transcribeAudio } from '@/lib/api';
+import { streamChatMessage, uploadImage, sendValidation, transcribeAudio } from '@/lib/api';
 
 export function Chat() {
   const [messages, setMessages] = useState<MessageType[]>([
@@ -45,23 +45,42 @@ export function Chat() {
     setIsProcessing(true);
 
     try {
-      let response;
       if (selectedImage) {
         const imageFile = await fetch(selectedImage).then((r) => r.blob());
-        response = await uploadImage(new File([imageFile], 'image.jpg'), input.trim());
+        const response = await uploadImage(new File([imageFile], 'image.jpg'), input.trim());
+
+        setMessages((prev) => [
+          ...prev,
+          {
+            role: 'assistant',
+            content: response.response,
+            agent: response.agent,
+            resultImage: response.result_image,
+          },
+        ]);
       } else {
-        response = await sendChatMessage(input.trim());
-      }
+        // Show the answer while it is being generated, the last message is replaced in place
+        const updateLastMessage = (update: Partial<MessageType>) =>
+          setMessages((prev) => [...prev.slice(0, -1), { ...prev[prev.length - 1], ...update }]);
 
-      setMessages((prev) => [
-        ...prev,
-        {
-          role: 'assistant',
-          content: response.response,
-          agent: response.agent,
-          resultImage: response.result_image,
-        },
-      ]);
+        let streamedContent = '';
+        setMessages((prev) => [...prev, { role: 'assistant', content: '' }]);
+        try {
+          const response = await streamChatMessage(input.trim(), (event) => {
+            streamedContent = event.type === 'reset' ? '' : streamedContent + (event.content || '');
+            updateLastMessage({ content: streamedContent });
+          });
+          updateLastMessage({
+            content: response.response,
+            agent: response.agent,
+            resultImage: response.result_image,
+          });
+        } catch (error) {
+          // Drop the partial answer before reporting the error
+          setMessages((prev) => prev.slice(0, -1));
+          throw error;
+        }
+      }
     } catch (error) {
       console.error('Error sending message:', error);
       setMessages((prev) => [
@@ -1,4 +1,4 @@
-import { ChatResponse, ValidationResponse, SpeechRequest } from '@/types/chat';
+import { ChatResponse, ValidationResponse, SpeechRequest, StreamEvent } from '@/types/chat';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -22,6 +22,63 @@ export async function sendChatMessage(message: string): Promise<ChatResponse> {
   return response.json();
 }
 
+// Streams the answer as server-sent events; onEvent receives every delta / reset event
+export async function streamChatMessage(
+  message: string,
+  onEvent: (event: StreamEvent) => void
+): Promise<ChatResponse> {
+  const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      query: message,
+      conversation_history: [],
+    }),
+    credentials: 'include',
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to send message');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line, the payload is on the data line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const dataLine = rawEvent.split('\n').find((line) => line.startsWith('data: '));
+      if (!dataLine) continue;
+
+      const event: StreamEvent = JSON.parse(dataLine.slice(6));
+      if (event.type === 'error') {
+        throw new Error(event.detail || 'Failed to stream message');
+      }
+      if (event.type === 'done') {
+        return {
+          status: 'success',
+          response: event.response || '',
+          agent: event.agent || '',
+          result_image: event.result_image,
+        };
+      }
+      onEvent(event);
+    }
+  }
+
+  throw new Error('Stream ended before the response was complete');
+}
+
 export async function uploadImage(image: File, text: string = ''): Promise<ChatResponse> {
   const formData = new FormData();
   formData.append('image', image);
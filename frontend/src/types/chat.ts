@@ -13,6 +13,15 @@ export interface ChatResponse {
   result_image?: string;
 }
 
+export interface StreamEvent {
+  type: 'delta' | 'reset' | 'done' | 'error';
+  content?: string;
+  response?: string;
+  agent?: string;
+  result_image?: string;
+  detail?: string;
+}
+
 export interface ValidationResponse {
   status: string;
   message: string;